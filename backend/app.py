@@ -1,10 +1,20 @@
-﻿from flask import Flask, jsonify, request
+﻿from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import pymysql
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
 
+from columnar import negotiate_format, table_response, to_records
+from counting import CountCache, count_rows, parse_count_mode
+from db_pool import ConnectionPool, PoolTimeout
+from export import EXPORT_FORMATS, encode_rows, fetch_batches, parse_export_format
+from geo import nearby_prefilter
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_predicate
+from quantile_sketch import TDigest, parse_percentiles, percentile_label
+from response_cache import DataVersion, ResponseCache, cached_response
+from shaping import KM_PER_MILE, Column, query_columns, query_shaped, shape, shape_rows
+
 app = Flask(__name__)
 CORS(app)
 
@@ -15,17 +25,55 @@ DB_PASSWORD = os.getenv("MYSQL_PASSWORD", os.getenv("DB_PASSWORD", ""))
 DB_NAME = os.getenv("MYSQL_DATABASE", os.getenv("DB_NAME", "nyc_taxi_db"))
 DB_PORT = int(os.getenv("MYSQL_PORT", os.getenv("DB_PORT", 3306)))
 
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 3600))
+
+db_pool = ConnectionPool(
+    {
+        "host": DB_HOST,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "database": DB_NAME,
+        "port": DB_PORT,
+        "cursorclass": pymysql.cursors.DictCursor,
+        "autocommit": True
+    },
+    max_size=DB_POOL_SIZE,
+    wait_timeout=DB_POOL_TIMEOUT,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME
+)
+
+# Exact COUNT(*) results are cached per filter signature for this many seconds
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", 60))
+
+# Streaming exports: rows per fetch from the server-side cursor, and how long
+# MySQL waits on a slow client before aborting (net_write_timeout, seconds)
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 5000))
+EXPORT_NET_WRITE_TIMEOUT = int(os.getenv("EXPORT_NET_WRITE_TIMEOUT", 600))
+
 def get_db_connection():
-    """Create and return a MySQL database connection"""
-    conn = pymysql.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        port=DB_PORT,
-        cursorclass=pymysql.cursors.DictCursor
-    )
-    return conn
+    """Check out a pooled MySQL connection (use as a context manager)"""
+    return db_pool.connection()
+
+# Response cache (invalidated when scripts/load_data.py bumps data_version)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 300))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+DATA_VERSION_POLL = float(os.getenv("DATA_VERSION_POLL", 5))
+
+response_cache = ResponseCache(max_bytes=RESPONSE_CACHE_MAX_BYTES, ttl=RESPONSE_CACHE_TTL)
+data_version = DataVersion(get_db_connection, poll_interval=DATA_VERSION_POLL)
+# Counts are keyed by the data version too, like the cached responses
+count_cache = CountCache(ttl=COUNT_CACHE_TTL, version=data_version.current)
+# Routes serving several formats (JSON / Arrow / columnar JSON) cache one entry per format
+cached = cached_response(response_cache, data_version)
+cached_negotiated = cached_response(
+    response_cache, data_version,
+    vary=lambda: negotiate_format(request.accept_mimetypes)
+)
 
 def handle_errors(f):
     """Decorator to handle errors consistently"""
@@ -33,11 +81,46 @@ def handle_errors(f):
     def decorated_function(*args, **kwargs):
         try:
             return f(*args, **kwargs)
+        except PoolTimeout as e:
+            app.logger.warning(f"Pool exhausted in {f.__name__}: {str(e)}")
+            return jsonify({"error": str(e)}), 503
         except Exception as e:
             app.logger.error(f"Error in {f.__name__}: {str(e)}")
             return jsonify({"error": str(e)}), 500
     return decorated_function
 
+def parse_day(value, name):
+    """Parse a YYYY-MM-DD query argument (ValueError names the argument)"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} '{value}'. Use YYYY-MM-DD")
+
+def parse_bounded_int(value, name, low, high, meaning=''):
+    """Parse an optional integer query argument within [low, high] (ValueError names the argument)"""
+    if value is None or value.strip() == '':
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or not low <= number <= high:
+        raise ValueError(f"Invalid {name} '{value}'. Use an integer from {low} to {high}{meaning}")
+    return number
+
+def day_range(start, end):
+    """Turn inclusive start/end days into a half-open [start, end + 1 day) range
+    
+    Comparing the raw column against the bounds (instead of DATE(column))
+    keeps the predicate sargable, so idx_pickup_date / idx_date_vendor or
+    the trip_rollup primary key can serve it as an index range scan.
+    """
+    first = parse_day(start, 'start') if start else None
+    last = parse_day(end, 'end') if end else None
+    if first and last and first > last:
+        raise ValueError("start must not be after end")
+    return first, (last + timedelta(days=1) if last else None)
+
 # ROOT & BASIC ENDPOINTS
 
 @app.route('/', methods=['GET'])
@@ -84,181 +167,301 @@ def api_root():
 @handle_errors
 def health_check():
     """Check if API and database are working"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT 1')
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
     return jsonify({
         "status": "healthy",
         "database": "connected",
+        "pool": db_pool.stats(),
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/pool', methods=['GET'])
+def pool_stats():
+    """Connection pool metrics (in use, waiting, checkout latency)"""
+    return jsonify(db_pool.stats())
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """Response cache metrics (hits, misses, coalesced misses, evictions)"""
+    return jsonify(response_cache.stats())
+
 # STATISTICS & KPIs
 
+# Rollup averages are fetched in the stored units (mph, miles, seconds) and
+# converted once per result column by the shaping layer (see shaping.py)
+STATS_COLUMNS = (
+    Column('total_rows'),
+    Column('avg_speed_kmh', 'avg_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('avg_distance_km', 'avg_distance_miles', scale=KM_PER_MILE, digits=2, null=0),
+    Column('max_distance_km', 'max_distance_miles', scale=KM_PER_MILE, digits=2, null=0),
+    Column('min_distance_km', 'min_distance_miles', scale=KM_PER_MILE, digits=2, null=0)
+)
+
 @app.route('/api/stats', methods=['GET'])
 @handle_errors
+@cached
 def get_stats():
     """Get overall statistics - Returns km/h and km"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) as total_rows FROM nyc_taxi_trips')
-    total_rows = cursor.fetchone()['total_rows']
-    
-    # Convert MPH to KM/H and miles to KM (1 mile = 1.60934 km)
-    cursor.execute('''
-        SELECT 
-            AVG(average_speed_mph * 1.60934) as avg_speed_kmh,
-            AVG(trip_distance_miles * 1.60934) as avg_distance_km,
-            MAX(trip_distance_miles * 1.60934) as max_distance_km,
-            MIN(trip_distance_miles * 1.60934) as min_distance_km
-        FROM nyc_taxi_trips
-    ''')
-    stats = cursor.fetchone()
-    
-    conn.close()
-    
-    return jsonify({
-        "total_rows": total_rows,
-        "avg_speed_kmh": round(stats['avg_speed_kmh'], 2) if stats['avg_speed_kmh'] else 0,
-        "avg_distance_km": round(stats['avg_distance_km'], 2) if stats['avg_distance_km'] else 0,
-        "max_distance_km": round(stats['max_distance_km'], 2) if stats['max_distance_km'] else 0,
-        "min_distance_km": round(stats['min_distance_km'], 2) if stats['min_distance_km'] else 0
-    })
+    with get_db_connection() as conn:
+        # Answered from the trip_rollup cube (sums/counts), not the raw trips
+        stats = query_shaped(conn, '''
+            SELECT 
+                CAST(COALESCE(SUM(trip_count), 0) AS UNSIGNED) as total_rows,
+                SUM(sum_speed_mph) / NULLIF(SUM(speed_count), 0) as avg_speed_mph,
+                SUM(sum_distance_miles) / NULLIF(SUM(trip_count), 0) as avg_distance_miles,
+                MAX(max_distance_miles) as max_distance_miles,
+                MIN(min_distance_miles) as min_distance_miles
+            FROM trip_rollup
+        ''', (), STATS_COLUMNS)
+    
+    return jsonify(to_records(stats)[0])
+
+SUMMARY_COLUMNS = (
+    Column('date'),
+    Column('trips'),
+    Column('avg_speed_kmh', 'avg_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('avg_distance_km', 'avg_distance_miles', scale=KM_PER_MILE, digits=2, null=0),
+    Column('avg_duration_min', 'avg_duration_sec', scale=1 / 60.0, digits=2, null=0)
+)
+
+# One range scan on the trip_rollup primary key (pickup_day leads it): a row
+# per day plus the WITH ROLLUP total (date NULL) for the whole range
+SUMMARY_SQL = '''
+    SELECT 
+        pickup_day as date,
+        CAST(SUM(trip_count) AS UNSIGNED) as trips,
+        SUM(sum_speed_mph) / NULLIF(SUM(speed_count), 0) as avg_speed_mph,
+        SUM(sum_distance_miles) / NULLIF(SUM(trip_count), 0) as avg_distance_miles,
+        SUM(sum_duration) / NULLIF(SUM(trip_count), 0) as avg_duration_sec
+    FROM trip_rollup
+    WHERE pickup_day >= %s AND pickup_day < %s
+    GROUP BY pickup_day WITH ROLLUP
+    ORDER BY GROUPING(pickup_day), pickup_day
+'''
 
 @app.route('/api/summary', methods=['GET'])
 @handle_errors
+@cached
 def get_summary():
-    """Get summary statistics for a specific date"""
+    """Get summary statistics for a date or a date range
+    
+    - ?date=YYYY-MM-DD returns that day's summary (null if there were no trips)
+    - ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive) returns the totals for the
+      range plus a per-day series
+    """
     date = request.args.get('date')
+    start = request.args.get('start')
+    end = request.args.get('end')
     
-    if not date:
-        return jsonify({"error": "Date parameter required"}), 400
+    if not date and not (start and end):
+        return jsonify({"error": "Date parameter (or start and end) required"}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    try:
+        if date:
+            first, stop = day_range(date, date)
+        else:
+            first, stop = day_range(start, end)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    cursor.execute('''
-        SELECT 
-            DATE(pickup_date) as date,
-            COUNT(*) as trips,
-            AVG(average_speed_mph * 1.60934) as avg_speed_kmh,
-            AVG(trip_distance_miles * 1.60934) as avg_distance_km,
-            AVG(trip_duration / 60.0) as avg_duration_min
-        FROM nyc_taxi_trips
-        WHERE DATE(pickup_date) = %s
-        GROUP BY DATE(pickup_date)
-    ''', (date,))
+    with get_db_connection() as conn:
+        summary = query_shaped(conn, SUMMARY_SQL, (first, stop), SUMMARY_COLUMNS)
     
-    result = cursor.fetchone()
-    conn.close()
+    rows = to_records(summary)
+    days = [row for row in rows if row['date'] is not None and row['trips']]
+    totals = next((row for row in rows if row['date'] is None), None)
     
-    if not result or result['trips'] == 0:
-        return jsonify(None), 200
+    if date:
+        return jsonify(days[0] if days else None), 200
     
+    if totals:
+        totals.pop('date')
     return jsonify({
-        "date": str(result['date']),
-        "trips": result['trips'],
-        "avg_speed_kmh": round(result['avg_speed_kmh'], 2) if result['avg_speed_kmh'] else 0,
-        "avg_distance_km": round(result['avg_distance_km'], 2) if result['avg_distance_km'] else 0,
-        "avg_duration_min": round(result['avg_duration_min'], 2) if result['avg_duration_min'] else 0
+        "start": first.isoformat(),
+        "end": (stop - timedelta(days=1)).isoformat(),
+        "totals": totals if totals and totals['trips'] else None,
+        "days": days
     })
 
 # INSIGHTS & ANALYTICS
 
+HOURLY_COLUMNS = (
+    Column('pickup_hour'),
+    Column('trips'),
+    Column('avg_speed_kmh', 'avg_speed_mph', scale=KM_PER_MILE, digits=2)
+)
+
 @app.route('/api/insights/hourly', methods=['GET'])
 @handle_errors
+@cached_negotiated
 def get_hourly_insights():
     """Get trip distribution by hour of day"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT 
-            pickup_hour,
-            COUNT(*) as trips,
-            AVG(average_speed_mph * 1.60934) as avg_speed_kmh
-        FROM nyc_taxi_trips
-        WHERE pickup_hour IS NOT NULL
-        GROUP BY pickup_hour
-        ORDER BY pickup_hour
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
-    
-    # Format results
-    for row in results:
-        if row.get('avg_speed_kmh'):
-            row['avg_speed_kmh'] = round(row['avg_speed_kmh'], 2)
-    
-    return jsonify(results)
+    with get_db_connection() as conn:
+        hourly = query_shaped(conn, '''
+            SELECT 
+                pickup_hour,
+                CAST(SUM(trip_count) AS UNSIGNED) as trips,
+                SUM(sum_speed_mph) / NULLIF(SUM(speed_count), 0) as avg_speed_mph
+            FROM trip_rollup
+            GROUP BY pickup_hour
+            ORDER BY pickup_hour
+        ''', (), HOURLY_COLUMNS)
+    
+    return table_response(negotiate_format(request.accept_mimetypes), hourly)
+
+WEEKDAY_SPEED_COLUMNS = (
+    Column('pickup_day_of_week'),
+    Column('day_name'),
+    Column('avg_speed_kmh', 'avg_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('trips')
+)
 
 @app.route('/api/insights/weekday-speed', methods=['GET'])
 @handle_errors
+@cached_negotiated
 def get_weekday_speed():
     """Get average speed by day of week"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT 
-            pickup_day_of_week,
-            AVG(average_speed_mph * 1.60934) as avg_speed_kmh,
-            COUNT(*) as trips
-        FROM nyc_taxi_trips
-        WHERE pickup_day_of_week IS NOT NULL
-        GROUP BY pickup_day_of_week
-        ORDER BY pickup_day_of_week
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
-    
-    # Format results with day names
+    with get_db_connection() as conn:
+        columns = query_columns(conn, '''
+            SELECT 
+                pickup_day_of_week,
+                SUM(sum_speed_mph) / NULLIF(SUM(speed_count), 0) as avg_speed_mph,
+                CAST(SUM(trip_count) AS UNSIGNED) as trips
+            FROM trip_rollup
+            GROUP BY pickup_day_of_week
+            ORDER BY pickup_day_of_week
+        ''')
+    
+    # Day names
     day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    for row in results:
-        row['avg_speed_kmh'] = round(row['avg_speed_kmh'], 2) if row['avg_speed_kmh'] else 0
-        if 0 <= row['pickup_day_of_week'] <= 6:
-            row['day_name'] = day_names[row['pickup_day_of_week']]
+    columns['day_name'] = [
+        day_names[day] if 0 <= day <= 6 else None
+        for day in columns['pickup_day_of_week']
+    ]
     
-    return jsonify(results)
+    return table_response(
+        negotiate_format(request.accept_mimetypes),
+        shape(columns, WEEKDAY_SPEED_COLUMNS)
+    )
+
+SLOW_HOURS_COLUMNS = (
+    Column('pickup_hour'),
+    Column('avg_sec_per_km', 'avg_sec_per_mile', scale=1 / KM_PER_MILE, digits=2, null=0),
+    Column('avg_speed_kmh', 'avg_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('trips')
+)
 
 @app.route('/api/insights/slow-hours', methods=['GET'])
 @handle_errors
+@cached_negotiated
 def get_slow_hours():
     """Get slowest traffic hours (seconds per km)"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT 
-            pickup_hour,
-            AVG(trip_duration / (trip_distance_miles * 1.60934)) as avg_sec_per_km,
-            AVG(average_speed_mph * 1.60934) as avg_speed_kmh,
-            COUNT(*) as trips
-        FROM nyc_taxi_trips
-        WHERE pickup_hour IS NOT NULL 
-            AND trip_distance_miles > 0
-        GROUP BY pickup_hour
-        ORDER BY pickup_hour
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        # Only trips with a positive distance (the rollup's "moving" measures)
+        slow_hours = query_shaped(conn, '''
+            SELECT 
+                pickup_hour,
+                SUM(sum_moving_sec_per_mile) / NULLIF(SUM(moving_trip_count), 0) as avg_sec_per_mile,
+                SUM(sum_moving_speed_mph) / NULLIF(SUM(moving_speed_count), 0) as avg_speed_mph,
+                CAST(SUM(moving_trip_count) AS UNSIGNED) as trips
+            FROM trip_rollup
+            GROUP BY pickup_hour
+            HAVING trips > 0
+            ORDER BY pickup_hour
+        ''', (), SLOW_HOURS_COLUMNS)
+    
+    return table_response(negotiate_format(request.accept_mimetypes), slow_hours)
+
+@app.route('/api/insights/percentiles', methods=['GET'])
+@handle_errors
+@cached
+def get_percentiles():
+    """Get duration and speed percentiles for any hour / weekday / vendor filter
+    
+    Merges the pre-built t-digest sketches (one per hour, weekday, vendor)
+    instead of reading trips, so results are approximate (well under 1%
+    rank error) but cost milliseconds.
+    """
+    filters = []
+    params = []
+    try:
+        hour = parse_bounded_int(request.args.get('hour'), 'hour', 0, 23)
+        day_of_week = parse_bounded_int(
+            request.args.get('dayOfWeek'), 'dayOfWeek', 0, 6, ' (0 = Monday)'
+        )
+        percentiles = parse_percentiles(request.args.get('percentiles'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if hour is not None:
+        filters.append('pickup_hour = %s')
+        params.append(hour)
+    if day_of_week is not None:
+        filters.append('pickup_day_of_week = %s')
+        params.append(day_of_week)
+    vendor_id = request.args.get('vendorId')
+    if vendor_id:
+        filters.append('vendor_id = %s')
+        params.append(vendor_id)
     
-    # Format results
-    for row in results:
-        row['avg_sec_per_km'] = round(row['avg_sec_per_km'], 2) if row['avg_sec_per_km'] else 0
-        row['avg_speed_kmh'] = round(row['avg_speed_kmh'], 2) if row['avg_speed_kmh'] else 0
+    where_clause = ' WHERE ' + ' AND '.join(filters) if filters else ''
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT metric, trip_count, sketch
+            FROM trip_quantile_sketches
+            {where_clause}
+        ''', tuple(params))
+        rows = cursor.fetchall()
+    
+    sketches = {}
+    trips = {}
+    for row in rows:
+        sketches.setdefault(row['metric'], []).append(TDigest.from_bytes(row['sketch']))
+        trips[row['metric']] = trips.get(row['metric'], 0) + row['trip_count']
+    
+    # Stored units -> API units (speed is stored in mph)
+    metrics = {
+        'duration_seconds': ('duration', 1.0),
+        'speed_kmh': ('speed', KM_PER_MILE)
+    }
+    result = {
+        "filters": {"hour": hour, "dayOfWeek": day_of_week, "vendorId": vendor_id or None},
+        "trips": trips.get('duration', 0),
+        "approximate": True
+    }
+    for name, (metric, factor) in metrics.items():
+        digest = TDigest.merge_all(sketches.get(metric, []))
+        values = digest.quantiles([p / 100 for p in percentiles])
+        result[name] = {
+            percentile_label(p): round(v * factor, 2) if v is not None else None
+            for p, v in zip(percentiles, values)
+        }
     
-    return jsonify(results)
+    return jsonify(result)
+
+NEARBY_COLUMNS = (
+    Column('id'),
+    Column('pickup_latitude'),
+    Column('pickup_longitude'),
+    Column('pickup_datetime'),
+    Column('distance_km', 'trip_distance_miles', scale=KM_PER_MILE, digits=2, null=0),
+    Column('speed_kmh', 'average_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('meters_away', digits=2)
+)
 
 @app.route('/api/insights/near', methods=['GET'])
 @handle_errors
+@cached_negotiated
 def get_nearby_trips():
-    """Get trips near a specific location using Haversine formula"""
+    """Get trips near a specific location using Haversine formula
+    
+    Rows are first narrowed with an indexed grid-cell + bounding-box
+    prefilter derived from the radius; the exact distance only runs on
+    those candidates.
+    """
     try:
         lat = float(request.args.get('lat'))
         lon = float(request.args.get('lon'))
@@ -268,42 +471,28 @@ def get_nearby_trips():
     except (TypeError, ValueError):
         return jsonify({"error": "Invalid parameters. Required: lat, lon"}), 400
     
+    try:
+        count_mode = parse_count_mode(request.args.get('count'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     offset = (page - 1) * page_size
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    # Candidate rows: grid cells / bounding box covering the search radius
+    prefilter_sql, prefilter_params = nearby_prefilter(lat, lon, radius)
     
-    # Haversine formula for distance calculation (result in meters)
-    cursor.execute('''
-        SELECT 
-            id,
-            pickup_latitude,
-            pickup_longitude,
-            pickup_date as pickup_datetime,
-            trip_distance_miles * 1.60934 as distance_km,
-            average_speed_mph * 1.60934 as speed_kmh,
-            (
-                6371000 * acos(
-                    LEAST(1.0, GREATEST(-1.0,
-                        cos(radians(%s)) * cos(radians(pickup_latitude)) * 
-                        cos(radians(pickup_longitude) - radians(%s)) + 
-                        sin(radians(%s)) * sin(radians(pickup_latitude))
-                    ))
-                )
-            ) as meters_away
-        FROM nyc_taxi_trips
-        HAVING meters_away <= %s
-        ORDER BY meters_away
-        LIMIT %s OFFSET %s
-    ''', (lat, lon, lat, radius, page_size, offset))
-    
-    trips = cursor.fetchall()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
     
-    # Get total count
-    cursor.execute('''
-        SELECT COUNT(*) as total
-        FROM (
+        # Haversine formula for distance calculation (result in meters)
+        trips = query_shaped(conn, f'''
             SELECT 
+                id,
+                pickup_latitude,
+                pickup_longitude,
+                pickup_date as pickup_datetime,
+                trip_distance_miles,
+                average_speed_mph,
                 (
                     6371000 * acos(
                         LEAST(1.0, GREATEST(-1.0,
@@ -314,112 +503,122 @@ def get_nearby_trips():
                     )
                 ) as meters_away
             FROM nyc_taxi_trips
+            WHERE {prefilter_sql}
             HAVING meters_away <= %s
-        ) as nearby_trips
-    ''', (lat, lon, lat, radius))
-    
-    total = cursor.fetchone()['total']
-    conn.close()
+            ORDER BY meters_away
+            LIMIT %s OFFSET %s
+        ''', (lat, lon, lat, *prefilter_params, radius, page_size, offset), NEARBY_COLUMNS)
     
-    # Format results
-    for trip in trips:
-        if trip.get('pickup_datetime'):
-            trip['pickup_datetime'] = str(trip['pickup_datetime'])
-        trip['distance_km'] = round(trip['distance_km'], 2) if trip['distance_km'] else 0
-        trip['speed_kmh'] = round(trip['speed_kmh'], 2) if trip['speed_kmh'] else 0
-        trip['meters_away'] = round(trip['meters_away'], 2)
-    
-    return jsonify({
+        # Get total count (exact, cached, estimated or skipped)
+        nearby_select = f'''
+            SELECT 
+                (
+                    6371000 * acos(
+                        LEAST(1.0, GREATEST(-1.0,
+                            cos(radians(%s)) * cos(radians(pickup_latitude)) * 
+                            cos(radians(pickup_longitude) - radians(%s)) + 
+                            sin(radians(%s)) * sin(radians(pickup_latitude))
+                        ))
+                    )
+                ) as meters_away
+            FROM nyc_taxi_trips
+            WHERE {prefilter_sql}
+            HAVING meters_away <= %s
+        '''
+        total, total_is_estimate = count_rows(
+            cursor, count_cache, count_mode,
+            f'SELECT COUNT(*) as total FROM ({nearby_select}) as nearby_trips',
+            nearby_select,
+            (lat, lon, lat, *prefilter_params, radius)
+        )
+    
+    return table_response(negotiate_format(request.accept_mimetypes), trips, meta={
         "page": page,
         "pageSize": page_size,
         "total": total,
-        "data": trips
+        "totalIsEstimate": total_is_estimate
     })
 
 # TRIPS - WITH FILTERING & SORTING
 
-@app.route('/api/trips', methods=['GET'])
-@handle_errors
-def get_trips():
-    """Get paginated trips with filtering and sorting"""
-    # Pagination
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 20, type=int)
-    
-    # Limit page size
-    page_size = min(page_size, 1000)
-    offset = (page - 1) * page_size
-    
-    # Sorting
-    sort_by = request.args.get('sortBy', 'pickup_date')
-    sort_order = request.args.get('sortOrder', 'desc').upper()
-    
-    # Validate sort order
-    if sort_order not in ['ASC', 'DESC']:
-        sort_order = 'DESC'
-    
-    # Validate sort field (prevent SQL injection)
-    valid_sort_fields = [
-        'pickup_date', 'dropoff_datetime', 'trip_distance_miles',
-        'trip_duration', 'average_speed_mph', 'passenger_count', 'id'
-    ]
-    if sort_by not in valid_sort_fields:
-        sort_by = 'pickup_date'
-    
-    # Filters
+def build_trip_filters(args):
+    """Translate the trip filter query arguments into SQL predicates
+    
+    Returns (filters, params, rollup_filters, rollup_params). rollup_filters
+    is None when a filter cannot be answered from trip_rollup (speed,
+    distance, bbox); otherwise the same constraints on the rollup columns.
+    Raises ValueError for malformed dates / numbers.
+    """
     filters = []
     params = []
     
-    # Date range filter
-    start_date = request.args.get('start')
-    end_date = request.args.get('end')
-    if start_date:
-        filters.append('DATE(pickup_date) >= %s')
-        params.append(start_date)
-    if end_date:
-        filters.append('DATE(pickup_date) <= %s')
-        params.append(end_date)
+    # Date/vendor/passenger filters can also be answered from trip_rollup,
+    # which turns the total count into a tiny SUM over pre-aggregated rows
+    rollup_filters = []
+    rollup_params = []
+    
+    # Date range filter: inclusive days, queried as [start, end + 1 day)
+    start_day, stop_day = day_range(args.get('start'), args.get('end'))
+    if start_day:
+        filters.append('pickup_date >= %s')
+        params.append(start_day)
+        rollup_filters.append('pickup_day >= %s')
+        rollup_params.append(start_day)
+    if stop_day:
+        filters.append('pickup_date < %s')
+        params.append(stop_day)
+        rollup_filters.append('pickup_day < %s')
+        rollup_params.append(stop_day)
     
     # Vendor filter
-    vendor_id = request.args.get('vendorId')
+    vendor_id = args.get('vendorId')
     if vendor_id:
         filters.append('vendor_id = %s')
         params.append(vendor_id)
+        rollup_filters.append('vendor_id = %s')
+        rollup_params.append(vendor_id)
     
     # Passenger count filter
-    passenger_count = request.args.get('passengerCount')
+    passenger_count = args.get('passengerCount')
     if passenger_count:
         filters.append('passenger_count = %s')
         params.append(int(passenger_count))
+        rollup_filters.append('passenger_count = %s')
+        rollup_params.append(int(passenger_count))
     
+    # Any filter below this point is not part of the rollup key
     # Speed filters (convert km/h to mph for database query)
-    min_speed = request.args.get('minSpeed')
+    min_speed = args.get('minSpeed')
     if min_speed:
-        min_speed_mph = float(min_speed) / 1.60934
+        rollup_filters = None
+        min_speed_mph = float(min_speed) / KM_PER_MILE
         filters.append('average_speed_mph >= %s')
         params.append(min_speed_mph)
     
-    max_speed = request.args.get('maxSpeed')
+    max_speed = args.get('maxSpeed')
     if max_speed:
-        max_speed_mph = float(max_speed) / 1.60934
+        rollup_filters = None
+        max_speed_mph = float(max_speed) / KM_PER_MILE
         filters.append('average_speed_mph <= %s')
         params.append(max_speed_mph)
     
     # Distance filters
-    min_distance = request.args.get('minDistance')
+    min_distance = args.get('minDistance')
     if min_distance:
-        min_distance_miles = float(min_distance) / 1.60934
+        rollup_filters = None
+        min_distance_miles = float(min_distance) / KM_PER_MILE
         filters.append('trip_distance_miles >= %s')
         params.append(min_distance_miles)
     
-    max_distance = request.args.get('maxDistance')
+    max_distance = args.get('maxDistance')
     if max_distance:
-        max_distance_miles = float(max_distance) / 1.60934
+        rollup_filters = None
+        max_distance_miles = float(max_distance) / KM_PER_MILE
         filters.append('trip_distance_miles <= %s')
         params.append(max_distance_miles)
     
     # Bounding box filter
-    bbox = request.args.get('bbox')
+    bbox = args.get('bbox')
     if bbox:
         try:
             west, south, east, north = map(float, bbox.split(','))
@@ -428,85 +627,229 @@ def get_trips():
                 AND pickup_latitude BETWEEN %s AND %s
             ''')
             params.extend([west, east, south, north])
+            rollup_filters = None
         except ValueError:
             pass  # Invalid bbox format, skip
     
-    # Build WHERE clause
-    where_clause = ''
-    if filters:
-        where_clause = 'WHERE ' + ' AND '.join(filters)
+    return filters, params, rollup_filters, rollup_params
+
+TRIP_COLUMNS = (
+    Column('id'),
+    Column('vendor_id'),
+    Column('pickup_datetime'),
+    Column('dropoff_datetime'),
+    Column('passenger_count'),
+    Column('pickup_longitude'),
+    Column('pickup_latitude'),
+    Column('trip_duration'),
+    Column('distance_km', 'trip_distance_miles', scale=KM_PER_MILE, digits=2, null=0),
+    Column('store_and_fwd_flag'),
+    Column('speed_kmh', 'average_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('distance_category'),
+    Column('duration_category'),
+    Column('time_period'),
+    Column('pickup_day_of_week'),
+    Column('pickup_hour'),
+    Column('is_weekend')
+)
+
+# The detail view also shows the trip's id in the source data
+TRIP_DETAIL_COLUMNS = TRIP_COLUMNS[:1] + (Column('source_id'),) + TRIP_COLUMNS[1:]
+
+# Listing rows also carry dropoff coordinates (the pickup point, no dropoff
+# location is stored)
+TRIP_PAGE_COLUMNS = TRIP_COLUMNS + (
+    Column('dropoff_longitude', 'pickup_longitude'),
+    Column('dropoff_latitude', 'pickup_latitude')
+)
+
+@app.route('/api/trips', methods=['GET'])
+@handle_errors
+def get_trips():
+    """Get paginated trips with filtering and sorting
+    
+    Two pagination modes are supported:
+    - offset: ?page=N&pageSize=M (LIMIT/OFFSET, kept for compatibility)
+    - keyset: ?cursor=<nextCursor>&pageSize=M seeks past the previous page
+      on (sortBy, id) instead of scanning and discarding OFFSET rows.
+      Pass an empty cursor (?cursor=) to start from the first page.
+    
+    ?count=exact|estimate|none controls how "total" is produced (see counting.py).
+    Accept: application/vnd.apache.arrow.stream (or the columnar JSON type,
+    see columnar.py) returns the page column-oriented instead of as objects.
+    """
+    # Pagination
+    page = request.args.get('page', 1, type=int)
+    page_size = request.args.get('pageSize', 20, type=int)
+    cursor_token = request.args.get('cursor')
+    keyset_mode = cursor_token is not None
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    # Total count strategy: exact (cached per filter set), estimate or none
+    try:
+        count_mode = parse_count_mode(request.args.get('count'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Get trips with conversions
-    query = f'''
-        SELECT 
-            id, 
-            vendor_id, 
-            pickup_date as pickup_datetime,
-            dropoff_datetime, 
-            passenger_count,
-            pickup_longitude, 
-            pickup_latitude, 
-            pickup_longitude as dropoff_longitude,
-            pickup_latitude as dropoff_latitude,
-            trip_duration, 
-            trip_distance_miles * 1.60934 as distance_km,
-            store_and_fwd_flag, 
-            average_speed_mph * 1.60934 as speed_kmh,
-            distance_category, 
-            duration_category,
-            time_period, 
-            pickup_day_of_week, 
-            pickup_hour,
-            is_weekend
-        FROM nyc_taxi_trips
-        {where_clause}
-        ORDER BY {sort_by} {sort_order}
-        LIMIT %s OFFSET %s
-    '''
+    # Limit page size
+    page_size = min(page_size, 1000)
+    offset = (page - 1) * page_size
     
-    params.extend([page_size, offset])
-    cursor.execute(query, tuple(params))
-    trips = cursor.fetchall()
+    # Sorting
+    sort_by = request.args.get('sortBy', 'pickup_date')
+    sort_order = request.args.get('sortOrder', 'desc').upper()
     
-    # Get total count with same filters
-    count_query = f'''
-        SELECT COUNT(*) as total 
-        FROM nyc_taxi_trips
-        {where_clause}
-    '''
-    cursor.execute(count_query, tuple(params[:-2]))  # Exclude LIMIT params
-    total = cursor.fetchone()['total']
+    # Validate sort order
+    if sort_order not in ['ASC', 'DESC']:
+        sort_order = 'DESC'
+    
+    # Validate sort field (prevent SQL injection)
+    valid_sort_fields = [
+        'pickup_date', 'dropoff_datetime', 'trip_distance_miles',
+        'trip_duration', 'average_speed_mph', 'passenger_count', 'id'
+    ]
+    if sort_by not in valid_sort_fields:
+        sort_by = 'pickup_date'
     
-    conn.close()
+    # Filters
+    try:
+        filters, params, rollup_filters, rollup_params = build_trip_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rollup_countable = rollup_filters is not None
     
-    # Format results
-    for trip in trips:
-        if trip.get('pickup_datetime'):
-            trip['pickup_datetime'] = str(trip['pickup_datetime'])
-        if trip.get('dropoff_datetime'):
-            trip['dropoff_datetime'] = str(trip['dropoff_datetime'])
-        trip['distance_km'] = round(trip['distance_km'], 2) if trip['distance_km'] else 0
-        trip['speed_kmh'] = round(trip['speed_kmh'], 2) if trip['speed_kmh'] else 0
+    # Build WHERE clause (count uses the filters only, not the seek predicate)
+    where_clause = ''
+    if filters:
+        where_clause = 'WHERE ' + ' AND '.join(filters)
+    count_params = list(params)
     
-    return jsonify({
-        "page": page,
+    # Keyset seek predicate
+    page_filters = list(filters)
+    if keyset_mode and cursor_token:
+        try:
+            sort_value, last_id = decode_cursor(cursor_token, sort_by, sort_order)
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        seek_sql, seek_params = keyset_predicate(sort_by, sort_order, sort_value, last_id)
+        page_filters.append(seek_sql)
+        params.extend(seek_params)
+    
+    page_where_clause = ''
+    if page_filters:
+        page_where_clause = 'WHERE ' + ' AND '.join(page_filters)
+    
+    # id is the tiebreaker so every row has a unique position in the order
+    order_clause = f'{sort_by} {sort_order}'
+    if sort_by != 'id':
+        order_clause += f', id {sort_order}'
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+    
+        # Get trips (stored units; converted by the shaping layer)
+        query = f'''
+            SELECT 
+                {sort_by} as sort_key,
+                id, 
+                vendor_id, 
+                pickup_date as pickup_datetime,
+                dropoff_datetime, 
+                passenger_count,
+                pickup_longitude, 
+                pickup_latitude, 
+                trip_duration, 
+                trip_distance_miles,
+                store_and_fwd_flag, 
+                average_speed_mph,
+                distance_category, 
+                duration_category,
+                time_period, 
+                pickup_day_of_week, 
+                pickup_hour,
+                is_weekend
+            FROM nyc_taxi_trips
+            {page_where_clause}
+            ORDER BY {order_clause}
+            LIMIT %s OFFSET %s
+        '''
+    
+        params.extend([page_size, 0 if keyset_mode else offset])
+        columns = query_columns(conn, query, params)
+    
+        # Get total count with same filters
+        if rollup_countable:
+            # Exact and cheap: sum the pre-aggregated cells matching the filters
+            rollup_where = ''
+            if rollup_filters:
+                rollup_where = 'WHERE ' + ' AND '.join(rollup_filters)
+            total, total_is_estimate = count_rows(
+                cursor, count_cache, count_mode,
+                f'''
+                    SELECT CAST(COALESCE(SUM(trip_count), 0) AS UNSIGNED) as total
+                    FROM trip_rollup
+                    {rollup_where}
+                ''',
+                None,
+                rollup_params
+            )
+        else:
+            count_query = f'''
+                SELECT COUNT(*) as total 
+                FROM nyc_taxi_trips
+                {where_clause}
+            '''
+            total, total_is_estimate = count_rows(
+                cursor, count_cache, count_mode,
+                count_query,
+                f'SELECT id FROM nyc_taxi_trips {where_clause}',
+                count_params
+            )
+    
+    
+    # Cursor for the page after this one (only when the page is full)
+    next_cursor = None
+    sort_keys = columns['sort_key']
+    if sort_keys and len(sort_keys) == page_size:
+        next_cursor = encode_cursor(sort_by, sort_order, sort_keys[-1], columns['id'][-1])
+    
+    return table_response(negotiate_format(request.accept_mimetypes), shape(columns, TRIP_PAGE_COLUMNS), meta={
+        "page": None if keyset_mode else page,
         "pageSize": page_size,
         "total": total,
-        "totalPages": (total + page_size - 1) // page_size,
-        "data": trips
+        "totalIsEstimate": total_is_estimate,
+        "totalPages": (total + page_size - 1) // page_size if total is not None else None,
+        "nextCursor": next_cursor
     })
 
-@app.route('/api/trips/<int:trip_id>', methods=['GET'])
+@app.route('/api/trips/export', methods=['GET'])
 @handle_errors
-def get_trip(trip_id):
-    """Get a single trip by ID"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def export_trips():
+    """Stream every trip matching the /api/trips filters as CSV or NDJSON
+    
+    ?format=csv|ndjson (default csv), ?gzip=true compresses the body.
+    Rows are read through an unbuffered server-side cursor and written out
+    batch by batch, so memory stays flat and the first rows are sent while
+    MySQL is still scanning. No ORDER BY is applied (a sort would have to
+    finish before the first row); rows come out in index order. Each batch
+    goes through the shaping layer with TRIP_COLUMNS, so units and rounding
+    match the JSON routes.
+    """
+    try:
+        fmt = parse_export_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
     
-    cursor.execute('''
+    try:
+        filters, params, _, _ = build_trip_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    where_clause = ''
+    if filters:
+        where_clause = 'WHERE ' + ' AND '.join(filters)
+    
+    # Stored units; converted per batch by the shaping layer
+    query = f'''
         SELECT 
             id, 
             vendor_id, 
@@ -516,67 +859,126 @@ def get_trip(trip_id):
             pickup_longitude, 
             pickup_latitude,
             trip_duration, 
-            trip_distance_miles * 1.60934 as distance_km,
+            trip_distance_miles,
             store_and_fwd_flag, 
-            average_speed_mph * 1.60934 as speed_kmh,
+            average_speed_mph,
             distance_category, 
             duration_category,
             time_period, 
             pickup_day_of_week, 
             pickup_hour,
             is_weekend
-        FROM nyc_taxi_trips 
-        WHERE id = %s
-    ''', (trip_id,))
-    
-    trip = cursor.fetchone()
-    conn.close()
-    
-    if trip:
-        # Format datetime fields
-        if trip.get('pickup_datetime'):
-            trip['pickup_datetime'] = str(trip['pickup_datetime'])
-        if trip.get('dropoff_datetime'):
-            trip['dropoff_datetime'] = str(trip['dropoff_datetime'])
-        trip['distance_km'] = round(trip['distance_km'], 2) if trip['distance_km'] else 0
-        trip['speed_kmh'] = round(trip['speed_kmh'], 2) if trip['speed_kmh'] else 0
-        return jsonify(trip)
+        FROM nyc_taxi_trips
+        {where_clause}
+    '''
+    
+    # The connection is held for the whole response and released from
+    # call_on_close, which also runs when the client disconnects midway
+    pooled = db_pool.acquire()
+    state = {"finished": False}
+    try:
+        conn = pooled.conn
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute('SET SESSION net_write_timeout = %s', (EXPORT_NET_WRITE_TIMEOUT,))
+        cursor.execute(query, tuple(params))
+        names = [column[0] for column in cursor.description]
+    except Exception:
+        db_pool.release(pooled, discard=True)
+        raise
+    
+    def batches():
+        for rows in fetch_batches(cursor, EXPORT_FETCH_SIZE):
+            yield shape_rows(names, rows, TRIP_COLUMNS)
+        state["finished"] = True
+    
+    def release():
+        # An abandoned unbuffered result would have to be drained before the
+        # connection could run another query; closing it is cheaper
+        db_pool.release(pooled, discard=not state["finished"])
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"trips.{extension}"
+    if compress:
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    columns = [column.name for column in TRIP_COLUMNS]
+    response = Response(encode_rows(columns, batches(), fmt, compress), mimetype=mimetype)
+    response.call_on_close(release)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/trips/<int:trip_id>', methods=['GET'])
+@handle_errors
+def get_trip(trip_id):
+    """Get a single trip by its integer ID"""
+    with get_db_connection() as conn:
+        trip = query_shaped(conn, '''
+            SELECT 
+                id, 
+                source_id,
+                vendor_id, 
+                pickup_date as pickup_datetime,
+                dropoff_datetime, 
+                passenger_count,
+                pickup_longitude, 
+                pickup_latitude,
+                trip_duration, 
+                trip_distance_miles,
+                store_and_fwd_flag, 
+                average_speed_mph,
+                distance_category, 
+                duration_category,
+                time_period, 
+                pickup_day_of_week, 
+                pickup_hour,
+                is_weekend
+            FROM nyc_taxi_trips 
+            WHERE id = %s
+            LIMIT 2
+        ''', (trip_id,), TRIP_DETAIL_COLUMNS)
+    
+    # The primary key is (id, pickup_date); ids are unique because they come
+    # from AUTO_INCREMENT, but rows inserted with explicit ids could repeat one
+    if trip.num_rows > 1:
+        return jsonify({"error": f"Trip id {trip_id} is ambiguous"}), 409
+    if trip.num_rows:
+        return jsonify(to_records(trip)[0])
     else:
         return jsonify({"error": "Trip not found"}), 404
 
 # VENDOR STATISTICS
 
+VENDOR_COLUMNS = (
+    Column('vendor_id'),
+    Column('total_trips'),
+    Column('avg_duration', digits=2, null=0),
+    Column('avg_distance_km', 'avg_distance_miles', scale=KM_PER_MILE, digits=2, null=0),
+    Column('avg_speed_kmh', 'avg_speed_mph', scale=KM_PER_MILE, digits=2, null=0),
+    Column('avg_passengers', digits=2, null=0)
+)
+
 @app.route('/api/vendors', methods=['GET'])
 @handle_errors
+@cached
 def get_vendor_stats():
     """Get statistics grouped by vendor"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT 
-            vendor_id, 
-            COUNT(*) as total_trips, 
-            AVG(trip_duration) as avg_duration,
-            AVG(trip_distance_miles * 1.60934) as avg_distance_km, 
-            AVG(average_speed_mph * 1.60934) as avg_speed_kmh,
-            AVG(passenger_count) as avg_passengers
-        FROM nyc_taxi_trips
-        GROUP BY vendor_id
-        ORDER BY total_trips DESC
-    ''')
-    
-    vendors = cursor.fetchall()
-    conn.close()
-    
-    # Format results
-    for vendor in vendors:
-        vendor['avg_duration'] = round(vendor['avg_duration'], 2) if vendor['avg_duration'] else 0
-        vendor['avg_distance_km'] = round(vendor['avg_distance_km'], 2) if vendor['avg_distance_km'] else 0
-        vendor['avg_speed_kmh'] = round(vendor['avg_speed_kmh'], 2) if vendor['avg_speed_kmh'] else 0
-        vendor['avg_passengers'] = round(vendor['avg_passengers'], 2) if vendor['avg_passengers'] else 0
-    
-    return jsonify({"vendors": vendors})
+    with get_db_connection() as conn:
+        vendors = query_shaped(conn, '''
+            SELECT 
+                vendor_id, 
+                CAST(SUM(trip_count) AS UNSIGNED) as total_trips, 
+                SUM(sum_duration) / NULLIF(SUM(trip_count), 0) as avg_duration,
+                SUM(sum_distance_miles) / NULLIF(SUM(trip_count), 0) as avg_distance_miles, 
+                SUM(sum_speed_mph) / NULLIF(SUM(speed_count), 0) as avg_speed_mph,
+                SUM(passenger_count * trip_count) / NULLIF(SUM(trip_count), 0) as avg_passengers
+            FROM trip_rollup
+            GROUP BY vendor_id
+            ORDER BY total_trips DESC
+        ''', (), VENDOR_COLUMNS)
+    
+    return jsonify({"vendors": to_records(vendors)})
 
 # ERROR HANDLERS
 
@@ -591,8 +993,11 @@ def not_found(error):
             "/status", 
             "/api",
             "/api/health",
+            "/api/pool",
+            "/api/cache",
             "/api/stats",
             "/api/trips",
+            "/api/trips/export",
             "/api/vendors"
         ]
     }), 404
@@ -605,10 +1010,12 @@ def internal_error(error):
     }), 500
 
 # RUN SERVER
+# Development only; production runs gunicorn -c gunicorn.conf.py app:app
 if __name__ == '__main__':
     print("=" * 50)
     print("NYC Taxi API Server Starting...")
     print(f"Database: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    print(f"Connection pool: {DB_POOL_SIZE} connections, {DB_POOL_TIMEOUT}s wait timeout")
     print(f"Server: http://0.0.0.0:5000")
     print("=" * 50)
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=os.getenv('FLASK_DEBUG', '0') == '1', host='0.0.0.0', port=5000)
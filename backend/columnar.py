@@ -0,0 +1,70 @@
+import json
+
+import pyarrow as pa
+from flask import current_app, jsonify
+
+JSON_MIMETYPE = 'application/json'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+COLUMNAR_JSON_MIMETYPE = 'application/vnd.nyctaxi.columnar+json'
+
+# Accept media type -> response format ("json" is the default row format)
+RESPONSE_FORMATS = {
+    JSON_MIMETYPE: 'json',
+    ARROW_MIMETYPE: 'arrow',
+    COLUMNAR_JSON_MIMETYPE: 'columns'
+}
+
+
+def negotiate_format(accept_mimetypes):
+    """Pick the response format from the Accept header (JSON unless asked otherwise)"""
+    best = accept_mimetypes.best_match(list(RESPONSE_FORMATS), default=JSON_MIMETYPE)
+    return RESPONSE_FORMATS.get(best, 'json')
+
+
+def _json_ready(table):
+    """Dates/timestamps as 'YYYY-MM-DD[ HH:MM:SS]' strings, like str() of the DB values"""
+    for index, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+    return table
+
+
+def to_records(table):
+    """Row objects (list of dicts) for the JSON format"""
+    return _json_ready(table).to_pylist()
+
+
+def to_columns(table):
+    """{column name: list of values} for the columnar JSON format"""
+    return _json_ready(table).to_pydict()
+
+
+def _arrow_body(table, meta):
+    if meta is not None:
+        table = table.replace_schema_metadata({'meta': json.dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def table_response(fmt, table, meta=None):
+    """Serialize a shaped table as row JSON, Arrow IPC stream or columnar JSON
+
+    meta carries the envelope fields (page, total, ...): the rows/columns go
+    under "data" next to them, and for Arrow meta is stored in the schema
+    metadata under "meta". Without meta the body is the bare rows/columns.
+    """
+    if fmt == 'arrow':
+        return current_app.response_class(_arrow_body(table, meta), mimetype=ARROW_MIMETYPE)
+
+    if fmt == 'columns':
+        data = to_columns(table)
+        body = dict(meta, data=data) if meta is not None else data
+        return current_app.response_class(
+            json.dumps(body, separators=(',', ':')),
+            mimetype=COLUMNAR_JSON_MIMETYPE
+        )
+
+    data = to_records(table)
+    return jsonify(dict(meta, data=data) if meta is not None else data)
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+class CountCache:
+    """Small thread-safe TTL cache of exact counts keyed by filter signature
+
+    version, if given, is called for every lookup and its result is part of
+    the key (e.g. DataVersion.current), so counts from before a reload are
+    never served; the old entries age out through the TTL / LRU bound.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1024, version=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, sql, params):
+        version = self.version() if self.version else None
+        return (version, ' '.join(sql.split()), tuple(params))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def parse_count_mode(value, default='exact'):
+    """Validate the ?count= query argument"""
+    if value is None or value == '':
+        return default
+    value = value.lower()
+    if value not in COUNT_MODES:
+        raise ValueError(f"Invalid count mode '{value}'. Use one of: {', '.join(COUNT_MODES)}")
+    return value
+
+
+def explain_row_estimate(cursor, select_sql, params, table='nyc_taxi_trips'):
+    """Estimate matching rows from the optimizer's EXPLAIN rows * filtered"""
+    cursor.execute('EXPLAIN ' + select_sql, tuple(params))
+    plan = cursor.fetchall()
+
+    for step in plan:
+        if step.get('table') == table and step.get('rows') is not None:
+            filtered = float(step.get('filtered') or 100.0)
+            return int(round(float(step['rows']) * filtered / 100.0))
+    return None
+
+
+def count_rows(cursor, cache, mode, count_sql, select_sql, params):
+    """Return (total, is_estimate) for a result set according to mode
+
+    - exact:    COUNT(*) via count_sql, cached per (data version, sql, params)
+                for cache.ttl
+    - estimate: a cached exact count if one exists, else EXPLAIN on select_sql
+                (pass select_sql=None when count_sql is already cheap, e.g. a
+                SUM over the trip_rollup cube, to always run it)
+    - none:     skip counting entirely
+    """
+    if mode == 'none':
+        return None, False
+
+    key = cache.key(count_sql, params)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, False
+
+    if mode == 'estimate' and select_sql is not None:
+        estimate = explain_row_estimate(cursor, select_sql, params)
+        if estimate is not None:
+            return estimate, True
+
+    cursor.execute(count_sql, tuple(params))
+    total = cursor.fetchone()['total']
+    cache.set(key, total)
+    return total, False
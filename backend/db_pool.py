@@ -0,0 +1,228 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the wait timeout"""
+
+
+class _PooledConnection:
+    """A raw connection plus the timestamps needed for eviction"""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymysql connections
+
+    - at most max_size connections exist at once (idle + in use)
+    - checkout blocks up to wait_timeout seconds, then raises PoolTimeout
+    - idle connections are pinged on checkout and replaced if dead
+    - connections idle longer than max_idle or older than max_lifetime
+      are closed instead of being reused
+    """
+
+    def __init__(self, connect_kwargs, max_size=10, wait_timeout=5.0,
+                 max_idle=300.0, max_lifetime=3600.0):
+        self.connect_kwargs = dict(connect_kwargs)
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._waiting = 0
+
+        # Metrics
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._failed_health_checks = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    # INTERNAL HELPERS
+
+    def _total(self):
+        return self._in_use + len(self._idle)
+
+    def _open(self):
+        conn = pymysql.connect(**self.connect_kwargs)
+        with self._cond:
+            self._created += 1
+        return _PooledConnection(conn)
+
+    def _close(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._closed += 1
+
+    def _is_expired(self, pooled, now):
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            return True
+        if self.max_idle and now - pooled.last_used > self.max_idle:
+            return True
+        return False
+
+    def _is_healthy(self, pooled):
+        try:
+            pooled.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._failed_health_checks += 1
+            return False
+
+    # CHECKOUT / CHECKIN
+
+    def acquire(self):
+        """Check out a healthy connection, opening a new one if allowed"""
+        started = time.monotonic()
+        deadline = started + self.wait_timeout
+
+        pooled = None
+        stale = []
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._idle and self._total() >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.wait_timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            now = time.monotonic()
+            while self._idle:
+                candidate = self._idle.pop()  # LIFO keeps hot connections warm
+                if self._is_expired(candidate, now):
+                    stale.append(candidate)
+                else:
+                    pooled = candidate
+                    break
+            if stale:
+                # Evicted connections free up slots for other waiters
+                self._cond.notify(len(stale))
+            # Reserve the slot before doing any network I/O outside the lock
+            self._in_use += 1
+
+        for expired in stale:
+            self._close(expired)
+
+        try:
+            if pooled is not None and not self._is_healthy(pooled):
+                self._close(pooled)
+                pooled = None
+            if pooled is None:
+                pooled = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_time_total += waited
+            self._checkout_time_max = max(self._checkout_time_max, waited)
+        return pooled
+
+    def release(self, pooled, discard=False):
+        """Return a connection to the pool (or close it if discard is set)"""
+        if not discard:
+            try:
+                # Never hand a connection with an open transaction to the next request
+                if pooled.conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    pooled.conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            discard = True
+
+        if discard:
+            self._close(pooled)
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            return
+
+        pooled.last_used = now
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that always returns the connection to the pool"""
+        pooled = self.acquire()
+        discard = False
+        try:
+            yield pooled.conn
+        except pymysql.err.OperationalError:
+            # Lost/broken connections should not be reused
+            discard = True
+            raise
+        finally:
+            self.release(pooled, discard=discard)
+
+    # MAINTENANCE & METRICS
+
+    def close_all(self):
+        """Close every idle connection (in-use ones are closed on release)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._close(pooled)
+
+    def reset(self):
+        """Drop all state inherited from a parent process (e.g. after fork)"""
+        with self._cond:
+            self._idle.clear()
+            self._in_use = 0
+            self._waiting = 0
+
+    def stats(self):
+        """Return a snapshot of pool metrics"""
+        with self._cond:
+            checkouts = self._checkouts
+            avg_ms = (self._checkout_time_total / checkouts * 1000) if checkouts else 0.0
+            return {
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "created": self._created,
+                "closed": self._closed,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "failed_health_checks": self._failed_health_checks,
+                "avg_checkout_ms": round(avg_ms, 3),
+                "max_checkout_ms": round(self._checkout_time_max * 1000, 3)
+            }
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson')
+}
+
+# Rows fetched from the server-side cursor per round trip; each batch is
+# encoded (and compressed) into one chunk of the response body
+DEFAULT_FETCH_SIZE = 5000
+
+
+def parse_export_format(value, default='csv'):
+    """Validate the ?format= query argument"""
+    if value is None or value == '':
+        return default
+    value = value.lower()
+    if value not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format '{value}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only (no rows at all)
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _encode_ndjson(columns, batches):
+    dumps = json.JSONEncoder(separators=(',', ':'), default=_json_default).encode
+    for rows in batches:
+        yield ''.join(dumps(dict(zip(columns, row))) + '\n' for row in rows).encode('utf-8')
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def fetch_batches(cursor, fetch_size=DEFAULT_FETCH_SIZE):
+    """Yield lists of rows from an executed (unbuffered) cursor until exhausted"""
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def encode_rows(columns, batches, fmt, compress=False):
+    """Turn batches of row tuples into body chunks (bytes) in the given format"""
+    chunks = _encode_csv(columns, batches) if fmt == 'csv' else _encode_ndjson(columns, batches)
+    if compress:
+        chunks = _gzip(chunks)
+    return chunks
@@ -0,0 +1,96 @@
+import math
+
+# Mean Earth radius used by the haversine/acos distance in the API (meters)
+EARTH_RADIUS_M = 6371000
+
+# Pickup grid: cells are GRID_SCALE-th of a degree (0.01 deg ~ 1.1 km of latitude).
+# cell id = lat_index * GRID_LON_CELLS + lon_index, where
+#   lat_index = floor((lat + 90) * GRID_SCALE), lon_index = floor((lon + 180) * GRID_SCALE)
+# The loader (scripts/load_data.py) and the SQL backfill use the same formula.
+GRID_SCALE = 100
+GRID_LON_CELLS = 360 * GRID_SCALE
+
+# Above this many cells the IN-list stops paying off; the bounding box alone is used
+MAX_GRID_CELLS = 256
+
+# Extra meters added to the radius when building the bounding box. The SQL acos
+# distance loses precision for nearby points (~0.1 m), so the box is padded to
+# never exclude a row the exact distance check would accept.
+BBOX_MARGIN_M = 1.0
+
+
+def grid_cell(lat, lon):
+    """Return the grid cell id containing a point"""
+    lat_index = int(math.floor((lat + 90) * GRID_SCALE))
+    lon_index = int(math.floor((lon + 180) * GRID_SCALE))
+    return lat_index * GRID_LON_CELLS + lon_index
+
+
+def bounding_box(lat, lon, radius_m):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a radius around a point
+
+    Every point within radius_m (great-circle) of (lat, lon) lies inside the box.
+    min_lon/max_lon are None when the circle reaches a pole or wraps the
+    antimeridian, in which case longitude cannot be bounded.
+    """
+    angular = (max(radius_m, 0) + BBOX_MARGIN_M) / EARTH_RADIUS_M
+    delta_lat = math.degrees(angular)
+
+    min_lat = max(-90.0, lat - delta_lat)
+    max_lat = min(90.0, lat + delta_lat)
+
+    cos_lat = math.cos(math.radians(lat))
+    ratio = math.sin(angular) / cos_lat if cos_lat > 0 else float('inf')
+    if min_lat <= -90.0 or max_lat >= 90.0 or ratio >= 1:
+        return min_lat, max_lat, None, None
+
+    delta_lon = math.degrees(math.asin(ratio))
+    min_lon = lon - delta_lon
+    max_lon = lon + delta_lon
+    if min_lon < -180.0 or max_lon > 180.0:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def cells_for_bbox(min_lat, max_lat, min_lon, max_lon, max_cells=MAX_GRID_CELLS):
+    """List the grid cells covering a bounding box, or None if there are too many"""
+    if min_lon is None or max_lon is None:
+        return None
+
+    lat_lo = int(math.floor((min_lat + 90) * GRID_SCALE))
+    lat_hi = int(math.floor((max_lat + 90) * GRID_SCALE))
+    lon_lo = int(math.floor((min_lon + 180) * GRID_SCALE))
+    lon_hi = int(math.floor((max_lon + 180) * GRID_SCALE))
+
+    if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > max_cells:
+        return None
+
+    return [
+        lat_index * GRID_LON_CELLS + lon_index
+        for lat_index in range(lat_lo, lat_hi + 1)
+        for lon_index in range(lon_lo, lon_hi + 1)
+    ]
+
+
+def nearby_prefilter(lat, lon, radius_m):
+    """Return (sql, params) narrowing nyc_taxi_trips to candidates near a point
+
+    The predicate only uses indexed columns (pickup_grid_cell, pickup_latitude,
+    pickup_longitude); the exact distance check still has to run on the result.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_m)
+
+    clauses = ['pickup_latitude BETWEEN %s AND %s']
+    params = [min_lat, max_lat]
+
+    if min_lon is not None:
+        clauses.append('pickup_longitude BETWEEN %s AND %s')
+        params.extend([min_lon, max_lon])
+
+    cells = cells_for_bbox(min_lat, max_lat, min_lon, max_lon)
+    if cells:
+        clauses.insert(0, 'pickup_grid_cell IN (' + ', '.join(['%s'] * len(cells)) + ')')
+        params[0:0] = cells
+
+    return ' AND '.join(clauses), params
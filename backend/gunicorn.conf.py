@@ -0,0 +1,79 @@
+# Gunicorn settings for the API (gunicorn -c gunicorn.conf.py app:app)
+#
+# Sizing: every worker process owns its own connection pool of DB_POOL_SIZE
+# connections, and every in-flight request holds at most one of them (a
+# streaming export holds it until the body is sent). So
+#
+# - threads per worker = DB_POOL_SIZE: more threads would only queue on the
+#   pool (and fail with 503 after DB_POOL_TIMEOUT), fewer leave it idle
+# - workers x DB_POOL_SIZE must stay below MySQL's max_connections minus the
+#   connections kept for the loader and admin sessions (DB_RESERVED_CONNECTIONS)
+# - within that budget, use about 2 x CPU cores + 1 workers
+#
+# All values can be overridden with the GUNICORN_* environment variables.
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 10)
+DB_MAX_CONNECTIONS = _env_int('DB_MAX_CONNECTIONS', 151)  # MySQL default max_connections
+DB_RESERVED_CONNECTIONS = _env_int('DB_RESERVED_CONNECTIONS', 10)
+
+_connection_budget = max(DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS, DB_POOL_SIZE)
+_default_workers = max(1, min(
+    multiprocessing.cpu_count() * 2 + 1,
+    _connection_budget // DB_POOL_SIZE
+))
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = _env_int('GUNICORN_WORKERS', _default_workers)
+threads = _env_int('GUNICORN_THREADS', DB_POOL_SIZE)
+
+# Import the app once in the master; workers fork from it (copy-on-write)
+preload_app = True
+
+# A worker silent for this long is killed and replaced; graceful_timeout is
+# how long in-flight requests get to finish on reload (HUP) or shutdown (TERM)
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers now and then (jitter keeps them from restarting together)
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    total = workers * DB_POOL_SIZE
+    server.log.info(
+        f"{workers} workers x {threads} threads, up to {total} MySQL connections "
+        f"(budget {_connection_budget})"
+    )
+    if total > _connection_budget:
+        server.log.warning(
+            f"workers x DB_POOL_SIZE = {total} exceeds DB_MAX_CONNECTIONS - "
+            f"DB_RESERVED_CONNECTIONS = {_connection_budget}; lower GUNICORN_WORKERS or DB_POOL_SIZE"
+        )
+
+
+def post_fork(server, worker):
+    # The pool object was created in the master (preload_app); never share
+    # its state or sockets across processes
+    from app import db_pool
+    db_pool.reset()
+
+
+def worker_exit(server, worker):
+    from app import db_pool
+    db_pool.close_all()
@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the query"""
+
+
+# Sort columns that may contain NULL need an explicit NULL branch in the seek
+# predicate (MySQL sorts NULLs first in ASC and last in DESC).
+NULLABLE_SORT_FIELDS = {'average_speed_mph'}
+
+# Sort columns stored as DECIMAL; their cursor values are restored as Decimal
+# so the seek comparison stays exact.
+DECIMAL_SORT_FIELDS = {'trip_distance_miles', 'average_speed_mph'}
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort_by, sort_order, sort_value, row_id):
+    """Build an opaque cursor pointing just after the given row"""
+    payload = {
+        "s": sort_by,
+        "o": sort_order,
+        "k": _encode_value(sort_value),
+        "id": _encode_value(row_id)
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by, sort_order):
+    """Decode a cursor and return (sort_value, row_id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        sort_value = payload['k']
+        row_id = payload['id']
+        cursor_sort = payload['s']
+        cursor_order = payload['o']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+
+    # Trip ids are integers (cursors issued for the old "TRIP_..." ids are rejected)
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise InvalidCursor("Malformed cursor: id must be an integer")
+
+    if cursor_sort != sort_by or cursor_order != sort_order:
+        raise InvalidCursor(
+            f"Cursor was issued for sortBy={cursor_sort}&sortOrder={cursor_order.lower()}"
+        )
+
+    if sort_value is not None and sort_by in DECIMAL_SORT_FIELDS:
+        sort_value = Decimal(str(sort_value))
+    return sort_value, row_id
+
+
+def keyset_predicate(sort_by, sort_order, sort_value, row_id):
+    """Return (sql, params) selecting rows strictly after the cursor position
+
+    Rows are ordered by (sort_by, id) in sort_order, so the seek is the row
+    comparison (sort_by, id) > / < (sort_value, row_id). This relies on id
+    being unique on its own: nyc_taxi_trips.id is AUTO_INCREMENT, even though
+    the partitioned table's primary key is (id, pickup_date).
+    """
+    op = '<' if sort_order == 'DESC' else '>'
+
+    if sort_by == 'id':
+        return f'id {op} %s', [row_id]
+
+    if sort_by not in NULLABLE_SORT_FIELDS:
+        return f'({sort_by}, id) {op} (%s, %s)', [sort_value, row_id]
+
+    # Nullable column: NULLs come first in ASC, last in DESC
+    if sort_value is None:
+        if sort_order == 'ASC':
+            return f'(({sort_by} IS NULL AND id > %s) OR {sort_by} IS NOT NULL)', [row_id]
+        return f'({sort_by} IS NULL AND id < %s)', [row_id]
+
+    seek = f'({sort_by}, id) {op} (%s, %s)'
+    if sort_order == 'DESC':
+        return f'({seek} OR {sort_by} IS NULL)', [sort_value, row_id]
+    return seek, [sort_value, row_id]
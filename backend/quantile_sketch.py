@@ -0,0 +1,219 @@
+import math
+import struct
+
+# Compression (delta) of the k1 scale function: at most ~delta/2 centroids,
+# ~1.6 KB per serialized digest, tail quantiles within a fraction of a percent
+DEFAULT_COMPRESSION = 200
+
+# Blob layout: header, then all centroid means (float64), then all weights (float64)
+_MAGIC = b'TD'
+_VERSION = 1
+_HEADER = struct.Struct('<2sBHIdd')  # magic, version, compression, centroids, min, max
+
+
+# Percentiles reported when the request does not ask for specific ones
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+
+class InvalidSketch(ValueError):
+    """Raised when a serialized sketch cannot be decoded"""
+
+
+def parse_percentiles(value):
+    """Validate the ?percentiles= query argument (comma-separated, 0-100)"""
+    if value is None or value.strip() == '':
+        return list(DEFAULT_PERCENTILES)
+    try:
+        percentiles = [float(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid percentiles '{value}'. Use e.g. 50,90,99")
+    if not percentiles or any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError("Percentiles must be between 0 and 100")
+    return percentiles
+
+
+def percentile_label(percentile):
+    """50 -> 'p50', 99.9 -> 'p99.9'"""
+    return f"p{percentile:g}"
+
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest, k1 scale function)
+
+    Values are summarized as centroids (mean, weight) that are small near the
+    tails and large near the median, so extreme quantiles stay accurate with
+    a fixed, small number of centroids. Digests built separately (per hour,
+    weekday, vendor, ...) can be merged and queried like one built from all
+    the values.
+    """
+
+    __slots__ = ('compression', 'means', 'weights', 'total', 'min', 'max')
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    # CONSTRUCTION
+
+    @classmethod
+    def from_values(cls, values, compression=DEFAULT_COMPRESSION):
+        """Build a digest from raw values"""
+        values = sorted(float(value) for value in values)
+        return cls._from_sorted_pairs([(value, 1.0) for value in values], compression)
+
+    @classmethod
+    def from_weighted(cls, values, weights, compression=DEFAULT_COMPRESSION):
+        """Build a digest from (value, count) pairs, e.g. the output of numpy.unique"""
+        pairs = sorted(
+            (float(value), float(weight))
+            for value, weight in zip(values, weights)
+            if weight > 0
+        )
+        return cls._from_sorted_pairs(pairs, compression)
+
+    @classmethod
+    def merge_all(cls, digests, compression=None):
+        """Merge any number of digests into a new one"""
+        digests = [digest for digest in digests if digest.total > 0]
+        if compression is None:
+            compression = max((d.compression for d in digests), default=DEFAULT_COMPRESSION)
+        if not digests:
+            return cls(compression)
+
+        pairs = []
+        for digest in digests:
+            pairs.extend(zip(digest.means, digest.weights))
+        pairs.sort()
+
+        merged = cls._from_sorted_pairs(pairs, compression, sum(d.total for d in digests))
+        # Exact extremes survive merging even though centroids do not
+        merged.min = min(d.min for d in digests)
+        merged.max = max(d.max for d in digests)
+        return merged
+
+    def merge(self, other):
+        """Return a new digest summarizing both digests"""
+        return TDigest.merge_all([self, other], max(self.compression, other.compression))
+
+    @classmethod
+    def _from_sorted_pairs(cls, pairs, compression, total=None):
+        digest = cls(compression)
+        if not pairs:
+            return digest
+
+        if total is None:
+            total = sum(weight for _, weight in pairs)
+        scale = compression / (2 * math.pi)
+
+        def weight_limit(weight_before):
+            # Cumulative weight at which the centroid starting at weight_before
+            # would span more than 1 unit of k(q) = scale * asin(2q - 1)
+            q = min(max(weight_before / total, 0.0), 1.0)
+            k_upper = scale * math.asin(2 * q - 1) + 1
+            if k_upper >= scale * math.pi / 2:
+                return total
+            return (math.sin(k_upper / scale) + 1) / 2 * total
+
+        # Greedy merge: a centroid may grow while it spans at most 1 unit of k
+        means = []
+        weights = []
+        current_mean, current_weight = pairs[0]
+        weight_before = 0.0
+        limit = weight_limit(weight_before)
+        for mean, weight in pairs[1:]:
+            if weight_before + current_weight + weight <= limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                means.append(current_mean)
+                weights.append(current_weight)
+                weight_before += current_weight
+                limit = weight_limit(weight_before)
+                current_mean, current_weight = mean, weight
+        means.append(current_mean)
+        weights.append(current_weight)
+
+        digest.means = means
+        digest.weights = weights
+        digest.total = total
+        digest.min = pairs[0][0]
+        digest.max = pairs[-1][0]
+        return digest
+
+    # QUERIES
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1); None for an empty digest"""
+        if not self.means:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        means = self.means
+        weights = self.weights
+        target = q * self.total
+
+        if len(means) == 1:
+            return self.min + (self.max - self.min) * q
+
+        # Tails: interpolate between the exact extreme and the outer centroid
+        first_half = weights[0] / 2
+        if target < first_half:
+            if weights[0] == 1:
+                return self.min
+            return self.min + (means[0] - self.min) * target / first_half
+        last_half = weights[-1] / 2
+        if target > self.total - last_half:
+            if weights[-1] == 1:
+                return self.max
+            return self.max - (self.max - means[-1]) * (self.total - target) / last_half
+
+        # Interior: interpolate between neighbouring centroid centers
+        center = first_half
+        for i in range(len(means) - 1):
+            step = (weights[i] + weights[i + 1]) / 2
+            if target <= center + step:
+                return means[i] + (means[i + 1] - means[i]) * (target - center) / step
+            center += step
+        return means[-1]
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+    # SERIALIZATION
+
+    def to_bytes(self):
+        """Compact binary form for storage in a BLOB column"""
+        n = len(self.means)
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, self.compression, n,
+            self.min if self.min is not None else 0.0,
+            self.max if self.max is not None else 0.0
+        )
+        return header + struct.pack(f'<{n}d', *self.means) + struct.pack(f'<{n}d', *self.weights)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        try:
+            magic, version, compression, n, minimum, maximum = _HEADER.unpack_from(blob, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise InvalidSketch(f"Unsupported sketch format {magic!r} v{version}")
+            means = struct.unpack_from(f'<{n}d', blob, _HEADER.size)
+            weights = struct.unpack_from(f'<{n}d', blob, _HEADER.size + 8 * n)
+        except struct.error as e:
+            raise InvalidSketch(f"Truncated sketch: {e}")
+
+        digest = cls(compression)
+        digest.means = list(means)
+        digest.weights = list(weights)
+        digest.total = sum(weights)
+        if n:
+            digest.min = minimum
+            digest.max = maximum
+        return digest
@@ -0,0 +1,223 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+
+class _CachedResponse:
+    """Serialized body and metadata of a successful (200) response"""
+
+    __slots__ = ('body', 'mimetype', 'etag', 'expires_at', 'size')
+
+    def __init__(self, body, mimetype, etag, expires_at):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.expires_at = expires_at
+        self.size = len(body)
+
+
+class DataVersion:
+    """Reads the data-version stamp bumped by scripts/load_data.py
+
+    The stamp is polled at most once per poll_interval seconds, so cache
+    lookups do not cost a query each.
+    """
+
+    def __init__(self, get_connection, poll_interval=5.0):
+        self.get_connection = get_connection
+        self.poll_interval = poll_interval
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.poll_interval:
+                return self._version
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT version FROM data_version WHERE id = 1')
+            row = cursor.fetchone()
+        version = row['version'] if row else 0
+
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+        return version
+
+
+class ResponseCache:
+    """In-process LRU cache of API responses
+
+    - entries expire after ttl seconds and are keyed by the data version,
+      so a reload by the loader invalidates everything at once
+    - total body size is capped at max_bytes (least recently used evicted)
+    - concurrent misses for the same key run the view only once
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=300.0, wait_timeout=30.0):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.expires_at:
+            self._remove_locked(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _put_locked(self, key, entry):
+        if entry.size > self.max_entry_bytes:
+            return
+        self._remove_locked(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove_locked(oldest)
+            self._evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return (entry, response, status)
+
+        status is 'HIT', 'COALESCED' or 'MISS'. On a miss compute() must
+        return (entry_or_None, response); only entries that are not None
+        are stored. Followers of an in-flight miss wait for the leader and
+        fall back to computing themselves if it produced nothing cacheable.
+        """
+        with self._lock:
+            entry = self._get_locked(key)
+            if entry is not None:
+                self._hits += 1
+                return entry, None, 'HIT'
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                self._inflight[key] = event
+            self._misses += 1
+
+        if not leader:
+            event.wait(self.wait_timeout)
+            with self._lock:
+                entry = self._get_locked(key)
+                if entry is not None:
+                    self._coalesced += 1
+                    return entry, None, 'COALESCED'
+            new_entry, response = compute()
+            if new_entry is not None:
+                with self._lock:
+                    self._put_locked(key, new_entry)
+            return new_entry, response, 'MISS'
+
+        try:
+            new_entry, response = compute()
+            if new_entry is not None:
+                with self._lock:
+                    self._put_locked(key, new_entry)
+            return new_entry, response, 'MISS'
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions
+            }
+
+
+def _cache_key(version, variant=None):
+    """Path + normalized query args + data version (+ negotiated variant)"""
+    args = tuple(sorted(
+        (name, value)
+        for name, values in request.args.lists()
+        for value in values
+        if value != ''
+    ))
+    return (request.path, args, version, variant)
+
+
+def cached_response(cache, data_version, vary=None):
+    """Decorator caching a route's 200 responses with ETag/If-None-Match support
+
+    vary, if given, is called per request and its result is part of the key
+    (e.g. the format negotiated from Accept); responses then carry Vary: Accept.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = data_version.current()
+            key = _cache_key(version, vary() if vary else None)
+
+            def compute():
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return None, response
+                body = response.get_data()
+                digest = hashlib.sha1(body).hexdigest()[:20]
+                entry = _CachedResponse(
+                    body,
+                    response.mimetype,
+                    f"{version}-{digest}",
+                    time.monotonic() + cache.ttl
+                )
+                return entry, response
+
+            entry, response, status = cache.get_or_compute(key, compute)
+
+            if entry is None:
+                # Not cacheable (error / non-200): return the view's response as-is
+                return response
+
+            if request.if_none_match.contains(entry.etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            # Browsers may keep the body but must revalidate (cheap 304s)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Cache'] = status
+            if vary:
+                response.vary.add('Accept')
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,82 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pymysql
+
+KM_PER_MILE = 1.60934
+
+
+class Column:
+    """One declared output column of a route
+
+    - source: column name in the query result (defaults to name)
+    - scale:  unit conversion factor, applied to the fetched (already
+              aggregated) values rather than per row in SQL
+    - digits: round to this many decimals
+    - null:   replacement for NULL (None keeps NULL)
+    """
+
+    __slots__ = ('name', 'source', 'scale', 'digits', 'null')
+
+    def __init__(self, name, source=None, scale=None, digits=None, null=None):
+        self.name = name
+        self.source = source or name
+        self.scale = scale
+        self.digits = digits
+        self.null = null
+
+
+def fetch_columns(cursor):
+    """Fetch an executed tuple cursor into {column name: list of values}"""
+    names = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+
+def query_columns(conn, sql, params=()):
+    """Run a query on a plain tuple cursor and return its columns"""
+    cursor = conn.cursor(pymysql.cursors.Cursor)
+    cursor.execute(sql, tuple(params))
+    return fetch_columns(cursor)
+
+
+def shape(columns, output):
+    """Build an Arrow table of the declared output columns
+
+    Each column is converted in one vectorized pass: DECIMAL and scaled or
+    rounded columns become float64, DATETIME becomes timestamp[s], then
+    scale, round and NULL replacement apply to the whole column at once.
+    """
+    arrays = {}
+    for column in output:
+        array = pa.array(columns[column.source])
+        numeric = column.scale is not None or column.digits is not None
+        if numeric or pa.types.is_decimal(array.type):
+            array = array.cast(pa.float64())
+        elif pa.types.is_timestamp(array.type):
+            array = array.cast(pa.timestamp('s'))
+        if column.scale is not None:
+            array = pc.multiply(array, column.scale)
+        if column.digits is not None:
+            array = pc.round(array, ndigits=column.digits)
+        if column.null is not None:
+            array = array.fill_null(column.null)
+        arrays[column.name] = array
+    return pa.table(arrays)
+
+
+def shape_rows(names, rows, output):
+    """shape() for one batch of row tuples (e.g. from a streaming cursor)
+
+    names are the result's column names; returns row tuples in output order.
+    """
+    if not rows:
+        return []
+    table = shape({name: list(values) for name, values in zip(names, zip(*rows))}, output)
+    return list(zip(*(table.column(column.name).to_pylist() for column in output)))
+
+
+def query_shaped(conn, sql, params, output):
+    """query_columns() + shape() in one call"""
+    return shape(query_columns(conn, sql, params), output)
@@ -0,0 +1,25 @@
+import sqlite3
+
+# Read profile for SQLite query connections (the analyzers, ad-hoc queries).
+# Only per-connection, read-side settings: query_only refuses writes, the
+# rest size the page cache, memory-mapped I/O and temp storage. The journal
+# mode (WAL) belongs to the database file and is set once by the loader
+# (scripts/create_nyc_database.py).
+READ_PRAGMAS = [
+    'PRAGMA query_only = ON',
+    'PRAGMA cache_size = -262144',
+    'PRAGMA mmap_size = 1073741824',
+    'PRAGMA temp_store = MEMORY'
+]
+
+
+def apply_read_profile(conn):
+    for pragma in READ_PRAGMAS:
+        conn.execute(pragma)
+
+
+def connect_for_read(db_path):
+    """Open a query connection with the read profile applied"""
+    conn = sqlite3.connect(db_path)
+    apply_read_profile(conn)
+    return conn
@@ -1,10 +1,14 @@
 # NYC Taxi Data Cleaning Script - Windows Compatible
 # Reads train/train.csv and outputs cleaned_data.csv
 
+import argparse
 import os
+import shutil
 import sys
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
 
 # Force UTF-8 encoding for Windows
@@ -15,6 +19,26 @@ if sys.platform == 'win32':
 INPUT_FILE = 'train/train.csv'
 OUTPUT_DIR = 'data/raw/processed'
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'cleaned_data.csv')
+PARQUET_OUTPUT = os.path.join(OUTPUT_DIR, 'cleaned_data.parquet')
+
+# Parquet dataset layout: <root>/pickup_month=YYYY-MM/part-NNNNN.parquet
+# Rows are sorted by pickup_datetime inside each file so row-group min/max
+# statistics let readers skip row groups outside a date filter.
+PARTITION_COLUMN = 'pickup_month'
+PARQUET_ROW_GROUP_SIZE = 128 * 1024
+PARQUET_SCHEMA = pa.schema([
+    ('source_id', pa.string()),
+    ('vendor_id', pa.int8()),
+    ('pickup_datetime', pa.timestamp('us')),
+    ('dropoff_datetime', pa.timestamp('us')),
+    ('passenger_count', pa.int8()),
+    ('pickup_longitude', pa.float64()),
+    ('pickup_latitude', pa.float64()),
+    ('rate_code_id', pa.int16()),
+    ('store_and_fwd_flag', pa.dictionary(pa.int8(), pa.string())),
+    ('trip_duration', pa.float64()),
+    ('trip_distance_miles', pa.float64())
+])
 
 def create_output_directory():
     """Create output directory if it doesn't exist"""
@@ -22,17 +46,17 @@ def create_output_directory():
         os.makedirs(OUTPUT_DIR)
         print(f"[+] Created directory: {OUTPUT_DIR}")
 
-def load_data():
+def load_data(input_file=INPUT_FILE):
     """Load the raw CSV data"""
-    print(f"\n[1] Loading data from {INPUT_FILE}...")
+    print(f"\n[1] Loading data from {input_file}...")
     
-    if not os.path.exists(INPUT_FILE):
-        print(f"[ERROR] File not found at {INPUT_FILE}")
+    if not os.path.exists(input_file):
+        print(f"[ERROR] File not found at {input_file}")
         print(f"        Please ensure train.csv exists in the train/ directory")
         sys.exit(1)
     
     try:
-        df = pd.read_csv(INPUT_FILE)
+        df = pd.read_csv(input_file)
         print(f"[+] Loaded {len(df):,} rows with {len(df.columns)} columns")
         return df
     except Exception as e:
@@ -50,14 +74,16 @@ def inspect_data(df):
     print(f"\n    Missing values:")
     print(df.isnull().sum())
 
-def clean_data(df):
-    """Clean and prepare the data"""
-    print("\n[3] Cleaning data...")
+def clean_rows(df, verbose=True):
+    """Row-local cleaning steps (column mapping, type fixes and filters)
     
-    initial_count = len(df)
+    Every step only looks at one row at a time, so this can run on any
+    chunk of the input independently.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
     
     # Step 1: Standardize column names
-    print("    -> Standardizing column names...")
+    log("    -> Standardizing column names...")
     df.columns = df.columns.str.lower().str.strip()
     
     # Map common NYC taxi column names to our schema
@@ -82,7 +108,7 @@ def clean_data(df):
     df = df.rename(columns=column_mapping)
     
     # Step 2: Handle datetime columns
-    print("    -> Processing datetime columns...")
+    log("    -> Processing datetime columns...")
     
     datetime_cols = ['pickup_datetime', 'dropoff_datetime']
     for col in datetime_cols:
@@ -93,10 +119,10 @@ def clean_data(df):
     before_drop = len(df)
     df = df.dropna(subset=['pickup_datetime', 'dropoff_datetime'])
     if len(df) < before_drop:
-        print(f"    [!] Dropped {before_drop - len(df):,} rows with invalid dates")
+        log(f"    [!] Dropped {before_drop - len(df):,} rows with invalid dates")
     
     # Step 3: Calculate trip_duration (in seconds)
-    print("    -> Calculating trip duration...")
+    log("    -> Calculating trip duration...")
     df['trip_duration'] = (df['dropoff_datetime'] - df['pickup_datetime']).dt.total_seconds()
     
     # Filter invalid durations
@@ -106,16 +132,16 @@ def clean_data(df):
         (df['trip_duration'] < 86400)  # Less than 24 hours
     ]
     if len(df) < before_filter:
-        print(f"    [!] Filtered {before_filter - len(df):,} rows with invalid duration")
+        log(f"    [!] Filtered {before_filter - len(df):,} rows with invalid duration")
     
     # Step 4: Handle trip_distance
-    print("    -> Processing trip distance...")
+    log("    -> Processing trip distance...")
     
     if 'trip_distance' in df.columns:
         df['trip_distance_miles'] = df['trip_distance']
     else:
         # If no distance column, we'll need to calculate from coordinates
-        print("    [!] No trip_distance column found")
+        log("    [!] No trip_distance column found")
         df['trip_distance_miles'] = 0.0
     
     # Filter invalid distances
@@ -125,14 +151,14 @@ def clean_data(df):
         (df['trip_distance_miles'] < 200)  # Less than 200 miles
     ]
     if len(df) < before_filter:
-        print(f"    [!] Filtered {before_filter - len(df):,} rows with invalid distance")
+        log(f"    [!] Filtered {before_filter - len(df):,} rows with invalid distance")
     
     # Step 5: Handle location data
-    print("    -> Processing location data...")
+    log("    -> Processing location data...")
     
     # If we have location IDs but no coordinates, create dummy coordinates
     if 'pickup_location_id' in df.columns and 'pickup_longitude' not in df.columns:
-        print("    [!] No coordinate columns found, creating default values...")
+        log("    [!] No coordinate columns found, creating default values...")
         # NYC approximate center
         df['pickup_longitude'] = -73.9712 + np.random.uniform(-0.1, 0.1, len(df))
         df['pickup_latitude'] = 40.7831 + np.random.uniform(-0.1, 0.1, len(df))
@@ -145,14 +171,14 @@ def clean_data(df):
             (df['pickup_latitude'].between(40.63, 40.85))
         ]
         if len(df) < before_filter:
-            print(f"    [!] Filtered {before_filter - len(df):,} rows outside NYC bounds")
+            log(f"    [!] Filtered {before_filter - len(df):,} rows outside NYC bounds")
     else:
         # Create default NYC coordinates if missing
         df['pickup_longitude'] = -73.9712
         df['pickup_latitude'] = 40.7831
     
     # Step 6: Handle vendor_id
-    print("    -> Processing vendor ID...")
+    log("    -> Processing vendor ID...")
     if 'vendor_id' not in df.columns:
         df['vendor_id'] = 1
     else:
@@ -160,7 +186,7 @@ def clean_data(df):
         df['vendor_id'] = df['vendor_id'].apply(lambda x: x if x in [1, 2] else 1)
     
     # Step 7: Handle passenger_count
-    print("    -> Processing passenger count...")
+    log("    -> Processing passenger count...")
     if 'passenger_count' not in df.columns:
         df['passenger_count'] = 1
     else:
@@ -179,36 +205,104 @@ def clean_data(df):
     else:
         df['rate_code_id'] = df['rate_code_id'].fillna(1).astype(int)
     
-    # Step 10: Generate unique IDs
-    print("    -> Generating unique IDs...")
-    df['id'] = [f"TRIP_{i:08d}" for i in range(len(df))]
+    return df
+
+def keep_source_ids(df):
+    """Keep the input's own trip id (e.g. "id2875421") as source_id
+    
+    Trip ids are allocated by the database on insert (scripts/load_data.py),
+    so cleaned files never carry positional ids that a later file or run
+    would repeat.
+    """
+    if 'id' in df.columns:
+        df = df.rename(columns={'id': 'source_id'})
+        df['source_id'] = df['source_id'].astype(str)
+    return df
+
+DEDUP_COLUMNS = ['pickup_datetime', 'dropoff_datetime', 'pickup_longitude', 'pickup_latitude']
+
+class SeenTripKeys:
+    """Sorted uint64 array of the dedup hashes of every kept trip
+    
+    8 bytes per trip (a Python set of ints costs ~70), looked up with
+    searchsorted and merged once per chunk. The 1.4M-trip dataset needs
+    about 11 MB.
+    """
+    
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+    
+    def unseen(self, keys):
+        """Mask of the keys not kept before"""
+        if not len(self.keys):
+            return np.ones(len(keys), dtype=bool)
+        positions = np.searchsorted(self.keys, keys)
+        found = self.keys[np.minimum(positions, len(self.keys) - 1)] == keys
+        return ~found
+    
+    def add(self, keys):
+        # Both runs are sorted, so the stable sort (timsort) merges them in linear time
+        merged = np.concatenate([self.keys, np.sort(keys)])
+        self.keys = np.sort(merged, kind='stable')
+
+def drop_duplicate_trips(df, seen_keys=None):
+    """Drop repeated trips (same pickup/dropoff times and pickup point)
+    
+    With seen_keys (a SeenTripKeys) duplicates of rows from earlier chunks
+    are dropped too, and the kept rows' hashes are added to it.
+    """
+    if seen_keys is None:
+        return df.drop_duplicates(subset=DEDUP_COLUMNS)
+    
+    keys = pd.util.hash_pandas_object(df[DEDUP_COLUMNS], index=False).to_numpy(dtype=np.uint64)
+    first_in_chunk = ~pd.Series(keys).duplicated().to_numpy()
+    keep = first_in_chunk & seen_keys.unseen(keys)
+    seen_keys.add(keys[keep])
+    return df[keep]
+
+def final_quality_check(df):
+    """Final row-level sanity filters"""
+    return df[
+        (df['trip_duration'] > 0) &
+        (df['trip_distance_miles'] >= 0) &
+        (df['passenger_count'] > 0)
+    ]
+
+def clean_data(df):
+    """Clean and prepare the data"""
+    print("\n[3] Cleaning data...")
+    
+    initial_count = len(df)
+    
+    # Steps 1-9: row-local cleaning
+    df = clean_rows(df)
+    
+    # Step 10: Keep the source trip ids
+    print("    -> Keeping source trip IDs...")
+    df = keep_source_ids(df)
     
     # Step 11: Remove duplicates
     before_dedup = len(df)
-    df = df.drop_duplicates(subset=['pickup_datetime', 'dropoff_datetime', 
-                                     'pickup_longitude', 'pickup_latitude'])
+    df = drop_duplicate_trips(df)
     if len(df) < before_dedup:
         print(f"    [!] Removed {before_dedup - len(df):,} duplicate rows")
     
     # Step 12: Final data quality check
     print("    -> Final quality check...")
-    df = df[
-        (df['trip_duration'] > 0) &
-        (df['trip_distance_miles'] >= 0) &
-        (df['passenger_count'] > 0)
-    ]
+    df = final_quality_check(df)
     
     print(f"\n[+] Cleaned data: {len(df):,} rows (from {initial_count:,})")
     print(f"    Removed: {initial_count - len(df):,} rows ({((initial_count - len(df)) / initial_count * 100):.1f}%)")
     
     return df
 
-def select_required_columns(df):
+def select_required_columns(df, verbose=True):
     """Select only the columns needed for the database"""
-    print("\n[4] Selecting required columns...")
+    if verbose:
+        print("\n[4] Selecting required columns...")
     
     required_columns = [
-        'id',
+        'source_id',
         'vendor_id',
         'pickup_datetime',
         'dropoff_datetime',
@@ -225,23 +319,78 @@ def select_required_columns(df):
     columns_to_keep = [col for col in required_columns if col in df.columns]
     df_clean = df[columns_to_keep].copy()
     
-    print(f"[+] Selected {len(columns_to_keep)} columns")
+    if verbose:
+        print(f"[+] Selected {len(columns_to_keep)} columns")
     
     return df_clean
 
-def save_cleaned_data(df):
+def save_cleaned_data(df, output_file=OUTPUT_FILE):
     """Save the cleaned data to CSV"""
-    print(f"\n[5] Saving cleaned data to {OUTPUT_FILE}...")
+    print(f"\n[5] Saving cleaned data to {output_file}...")
     
     try:
-        df.to_csv(OUTPUT_FILE, index=False)
-        file_size = os.path.getsize(OUTPUT_FILE) / (1024 * 1024)  # MB
-        print(f"[+] Saved {len(df):,} rows to {OUTPUT_FILE}")
+        df.to_csv(output_file, index=False)
+        file_size = os.path.getsize(output_file) / (1024 * 1024)  # MB
+        print(f"[+] Saved {len(df):,} rows to {output_file}")
         print(f"    File size: {file_size:.2f} MB")
     except Exception as e:
         print(f"[ERROR] Error saving file: {e}")
         sys.exit(1)
 
+def write_parquet_partitions(df, root, part=0):
+    """Write df into the month-partitioned Parquet dataset under root
+    
+    Each call adds one file per month (part-<part>.parquet), so chunks of a
+    streamed run can be appended with increasing part numbers.
+    """
+    months = df['pickup_datetime'].dt.strftime('%Y-%m')
+    columns = [field.name for field in PARQUET_SCHEMA if field.name in df.columns]
+    schema = pa.schema([PARQUET_SCHEMA.field(name) for name in columns])
+    
+    for month, month_df in df.groupby(months, sort=True):
+        month_dir = os.path.join(root, f"{PARTITION_COLUMN}={month}")
+        os.makedirs(month_dir, exist_ok=True)
+        month_df = month_df.sort_values('pickup_datetime', kind='stable')
+        table = pa.Table.from_pandas(month_df[columns], schema=schema, preserve_index=False)
+        pq.write_table(
+            table,
+            os.path.join(month_dir, f"part-{part:05d}.parquet"),
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+            compression='snappy',
+            write_statistics=True
+        )
+
+def save_cleaned_parquet(df, output_dir=PARQUET_OUTPUT):
+    """Save the cleaned data as a month-partitioned Parquet dataset"""
+    print(f"\n[5] Saving cleaned data to {output_dir}/ (Parquet, partitioned by month)...")
+    
+    tmp_dir = output_dir + '.partial'
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        write_parquet_partitions(df, tmp_dir)
+        replace_dataset(tmp_dir, output_dir)
+        size = dataset_size(output_dir) / (1024 * 1024)  # MB
+        print(f"[+] Saved {len(df):,} rows to {output_dir}/")
+        print(f"    Dataset size: {size:.2f} MB")
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"[ERROR] Error saving dataset: {e}")
+        sys.exit(1)
+
+def replace_dataset(tmp_dir, output_dir):
+    """Swap a freshly written dataset directory into place"""
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(tmp_dir, output_dir)
+
+def dataset_size(root):
+    """Total size in bytes of the files under root"""
+    return sum(
+        os.path.getsize(os.path.join(dirpath, name))
+        for dirpath, _, names in os.walk(root)
+        for name in names
+    )
+
 def generate_summary(df):
     """Generate a summary of the cleaned data"""
     print("\n[6] Data Summary:")
@@ -254,6 +403,138 @@ def generate_summary(df):
     print(f"\n    Passenger count distribution:")
     print(df['passenger_count'].value_counts().sort_index().to_string())
 
+class StreamingSummary:
+    """Accumulates the generate_summary() figures chunk by chunk"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.min_pickup = None
+        self.max_pickup = None
+        self.duration_total = 0.0
+        self.distance_total = 0.0
+        self.vendor_counts = pd.Series(dtype='int64')
+        self.passenger_counts = pd.Series(dtype='int64')
+    
+    def update(self, df):
+        if df.empty:
+            return
+        self.rows += len(df)
+        chunk_min = df['pickup_datetime'].min()
+        chunk_max = df['pickup_datetime'].max()
+        self.min_pickup = chunk_min if self.min_pickup is None else min(self.min_pickup, chunk_min)
+        self.max_pickup = chunk_max if self.max_pickup is None else max(self.max_pickup, chunk_max)
+        self.duration_total += float(df['trip_duration'].sum())
+        self.distance_total += float(df['trip_distance_miles'].sum())
+        self.vendor_counts = self.vendor_counts.add(df['vendor_id'].value_counts(), fill_value=0)
+        self.passenger_counts = self.passenger_counts.add(df['passenger_count'].value_counts(), fill_value=0)
+    
+    def report(self):
+        avg_duration = self.duration_total / self.rows if self.rows else 0.0
+        avg_distance = self.distance_total / self.rows if self.rows else 0.0
+        print("\n[6] Data Summary:")
+        print(f"    Total records: {self.rows:,}")
+        print(f"    Date range: {self.min_pickup} to {self.max_pickup}")
+        print(f"    Avg trip duration: {avg_duration:.2f} seconds ({avg_duration / 60:.2f} minutes)")
+        print(f"    Avg trip distance: {avg_distance:.2f} miles")
+        print(f"\n    Vendor distribution:")
+        print(self.vendor_counts.astype('int64').sort_values(ascending=False).to_string())
+        print(f"\n    Passenger count distribution:")
+        print(self.passenger_counts.astype('int64').sort_index().to_string())
+
+def clean_data_streaming(input_file=INPUT_FILE, output_file=OUTPUT_FILE, chunksize=250000,
+                         output_format='csv'):
+    """Clean the input in chunks, appending each chunk to the output
+    
+    Memory is chunksize rows plus 8 bytes per kept trip (the sorted hash
+    array for cross-chunk dedup, see SeenTripKeys). Both modes produce the
+    same output. With output_format='parquet' every chunk adds one file per
+    pickup month.
+    """
+    print(f"\n[1] Streaming {input_file} in chunks of {chunksize:,} rows...")
+    
+    if not os.path.exists(input_file):
+        print(f"[ERROR] File not found at {input_file}")
+        sys.exit(1)
+    
+    tmp_file = output_file + '.partial'
+    if output_format == 'parquet':
+        shutil.rmtree(tmp_file, ignore_errors=True)
+    summary = StreamingSummary()
+    seen_keys = SeenTripKeys()
+    rows_read = 0
+    started = datetime.now()
+    
+    try:
+        reader = pd.read_csv(input_file, chunksize=chunksize)
+        for chunk_number, chunk in enumerate(reader, start=1):
+            rows_read += len(chunk)
+            if chunk_number == 1:
+                inspect_data(chunk)
+                print("\n[3] Cleaning data...")
+            
+            df = clean_rows(chunk, verbose=False)
+            
+            df = keep_source_ids(df)
+            
+            df = drop_duplicate_trips(df, seen_keys)
+            df = final_quality_check(df)
+            df = select_required_columns(df, verbose=False)
+            
+            if output_format == 'parquet':
+                write_parquet_partitions(df, tmp_file, part=chunk_number)
+            else:
+                df.to_csv(tmp_file, mode='w' if chunk_number == 1 else 'a',
+                          header=chunk_number == 1, index=False)
+            summary.update(df)
+            
+            elapsed = (datetime.now() - started).total_seconds()
+            rate = rows_read / elapsed if elapsed > 0 else 0
+            print(f"    Chunk {chunk_number}: read {rows_read:,} rows, kept {summary.rows:,} ({rate:,.0f} rows/sec)")
+    except Exception:
+        if os.path.isdir(tmp_file):
+            shutil.rmtree(tmp_file)
+        elif os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    
+    if rows_read == 0:
+        print("[ERROR] Input file is empty")
+        sys.exit(1)
+    
+    if output_format == 'parquet':
+        replace_dataset(tmp_file, output_file)
+    else:
+        os.replace(tmp_file, output_file)
+    
+    print(f"\n[+] Cleaned data: {summary.rows:,} rows (from {rows_read:,})")
+    print(f"    Removed: {rows_read - summary.rows:,} rows ({((rows_read - summary.rows) / rows_read * 100):.1f}%)")
+    
+    summary.report()
+    
+    if output_format == 'parquet':
+        file_size = dataset_size(output_file) / (1024 * 1024)  # MB
+    else:
+        file_size = os.path.getsize(output_file) / (1024 * 1024)  # MB
+    print(f"\n[+] Saved {summary.rows:,} rows to {output_file}")
+    print(f"    File size: {file_size:.2f} MB")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Clean the raw NYC taxi CSV')
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help=f'Raw CSV file (default: {INPUT_FILE})')
+    parser.add_argument('--output', default=None,
+                        help=f'Cleaned output (default: {OUTPUT_FILE}, or {PARQUET_OUTPUT}/ with --format parquet)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='csv: single file; parquet: dataset partitioned by pickup month')
+    parser.add_argument('--stream', action='store_true',
+                        help='Process the input in chunks instead of loading it all into memory')
+    parser.add_argument('--chunksize', type=int, default=250000,
+                        help='Rows per chunk in --stream mode (default: 250000)')
+    args = parser.parse_args()
+    if args.output is None:
+        args.output = PARQUET_OUTPUT if args.format == 'parquet' else OUTPUT_FILE
+    return args
+
 # MAIN EXECUTION
 
 if __name__ == "__main__":
@@ -261,28 +542,37 @@ if __name__ == "__main__":
     print("NYC TAXI DATA CLEANING SCRIPT")
     print("=" * 60)
     
+    args = parse_args()
+    
     try:
         # Step 1: Create output directory
         create_output_directory()
         
-        # Step 2: Load raw data
-        df = load_data()
-        
-        # Step 3: Inspect data (optional - comment out for large files)
-        if len(df) < 1000000:  # Only inspect if less than 1M rows
-            inspect_data(df)
-        
-        # Step 4: Clean data
-        df_cleaned = clean_data(df)
-        
-        # Step 5: Select required columns
-        df_final = select_required_columns(df_cleaned)
-        
-        # Step 6: Generate summary
-        generate_summary(df_final)
-        
-        # Step 7: Save cleaned data
-        save_cleaned_data(df_final)
+        if args.stream:
+            # Chunked pipeline: bounded memory, same output as the in-memory path
+            clean_data_streaming(args.input, args.output, args.chunksize, args.format)
+        else:
+            # Step 2: Load raw data
+            df = load_data(args.input)
+            
+            # Step 3: Inspect data (optional - comment out for large files)
+            if len(df) < 1000000:  # Only inspect if less than 1M rows
+                inspect_data(df)
+            
+            # Step 4: Clean data
+            df_cleaned = clean_data(df)
+            
+            # Step 5: Select required columns
+            df_final = select_required_columns(df_cleaned)
+            
+            # Step 6: Generate summary
+            generate_summary(df_final)
+            
+            # Step 7: Save cleaned data
+            if args.format == 'parquet':
+                save_cleaned_parquet(df_final, args.output)
+            else:
+                save_cleaned_data(df_final, args.output)
         
         print("\n" + "=" * 60)
         print("DATA CLEANING COMPLETE!")
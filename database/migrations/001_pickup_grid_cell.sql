@@ -0,0 +1,15 @@
+-- Migration 001: spatial grid cell for /api/insights/near
+-- Adds the precomputed pickup grid cell used to prefilter nearby-trip
+-- queries and backfills it for rows loaded before the column existed.
+-- New loads fill the column in scripts/load_data.py.
+
+ALTER TABLE nyc_taxi_trips
+    ADD COLUMN pickup_grid_cell INT AFTER pickup_latitude,
+    ADD INDEX idx_grid_cell (pickup_grid_cell, pickup_latitude, pickup_longitude);
+
+UPDATE nyc_taxi_trips
+SET pickup_grid_cell = FLOOR((pickup_latitude + 90) * 100) * 36000
+                     + FLOOR((pickup_longitude + 180) * 100)
+WHERE pickup_grid_cell IS NULL;
+
+ANALYZE TABLE nyc_taxi_trips;
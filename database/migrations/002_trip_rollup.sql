@@ -0,0 +1,91 @@
+-- Migration 002: pre-aggregated rollup cube for the insights endpoints
+-- Creates trip_rollup and refresh_trip_rollup(), then builds the cube for
+-- every day already present in nyc_taxi_trips. Later loads refresh only
+-- the days they touch (scripts/load_data.py).
+
+DROP TABLE IF EXISTS trip_rollup;
+DROP PROCEDURE IF EXISTS refresh_trip_rollup;
+
+-- TRIP ROLLUP TABLE (Pre-aggregated cube for the insights endpoints)
+-- One row per (day, hour, vendor, passenger count, distance category).
+-- Only additive measures are stored (sums and counts, plus min/max), so any
+-- coarser grouping and its averages can be derived with SUM()/SUM().
+-- Maintained per day range by refresh_trip_rollup(), called from load_data.py.
+CREATE TABLE trip_rollup (
+    pickup_day DATE NOT NULL,
+    pickup_hour TINYINT NOT NULL,
+    pickup_day_of_week TINYINT NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    passenger_count INT NOT NULL,
+    distance_category VARCHAR(20) NOT NULL DEFAULT '',
+    
+    -- All trips in the cell
+    trip_count INT NOT NULL DEFAULT 0,
+    sum_duration BIGINT NOT NULL DEFAULT 0,
+    sum_distance_miles DECIMAL(20, 3) NOT NULL DEFAULT 0,
+    min_distance_miles DECIMAL(10, 3),
+    max_distance_miles DECIMAL(10, 3),
+    speed_count INT NOT NULL DEFAULT 0,
+    sum_speed_mph DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    
+    -- Trips with trip_distance_miles > 0 (used for seconds-per-km)
+    moving_trip_count INT NOT NULL DEFAULT 0,
+    moving_speed_count INT NOT NULL DEFAULT 0,
+    sum_moving_speed_mph DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    sum_moving_sec_per_mile DOUBLE NOT NULL DEFAULT 0,
+    
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (pickup_day, pickup_hour, vendor_id, passenger_count, distance_category),
+    INDEX idx_rollup_hour (pickup_hour),
+    INDEX idx_rollup_day_of_week (pickup_day_of_week),
+    INDEX idx_rollup_vendor (vendor_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Procedure: Refresh the rollup cube for a range of pickup days (inclusive)
+DELIMITER $$
+CREATE PROCEDURE refresh_trip_rollup(IN p_first_day DATE, IN p_last_day DATE)
+BEGIN
+    DELETE FROM trip_rollup
+    WHERE pickup_day BETWEEN p_first_day AND p_last_day;
+    
+    INSERT INTO trip_rollup (
+        pickup_day, pickup_hour, pickup_day_of_week, vendor_id,
+        passenger_count, distance_category,
+        trip_count, sum_duration, sum_distance_miles,
+        min_distance_miles, max_distance_miles,
+        speed_count, sum_speed_mph,
+        moving_trip_count, moving_speed_count,
+        sum_moving_speed_mph, sum_moving_sec_per_mile
+    )
+    SELECT 
+        DATE(pickup_date),
+        HOUR(pickup_date),
+        WEEKDAY(pickup_date),
+        vendor_id,
+        passenger_count,
+        COALESCE(distance_category, ''),
+        COUNT(*),
+        SUM(trip_duration),
+        SUM(trip_distance_miles),
+        MIN(trip_distance_miles),
+        MAX(trip_distance_miles),
+        COUNT(average_speed_mph),
+        COALESCE(SUM(average_speed_mph), 0),
+        SUM(trip_distance_miles > 0),
+        COUNT(CASE WHEN trip_distance_miles > 0 THEN average_speed_mph END),
+        COALESCE(SUM(CASE WHEN trip_distance_miles > 0 THEN average_speed_mph END), 0),
+        COALESCE(SUM(CASE WHEN trip_distance_miles > 0 THEN trip_duration / trip_distance_miles END), 0)
+    FROM nyc_taxi_trips
+    WHERE pickup_date >= p_first_day
+        AND pickup_date < p_last_day + INTERVAL 1 DAY
+    GROUP BY 
+        DATE(pickup_date), HOUR(pickup_date), WEEKDAY(pickup_date),
+        vendor_id, passenger_count, COALESCE(distance_category, '');
+END$$
+DELIMITER ;
+
+-- Initial backfill
+SET @first_day = (SELECT DATE(MIN(pickup_date)) FROM nyc_taxi_trips);
+SET @last_day = (SELECT DATE(MAX(pickup_date)) FROM nyc_taxi_trips);
+CALL refresh_trip_rollup(@first_day, @last_day);
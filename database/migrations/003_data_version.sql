@@ -0,0 +1,13 @@
+-- Migration 003: data-version stamp for API response caching
+
+-- DATA VERSION TABLE (Cache invalidation stamp)
+-- Single row bumped by scripts/load_data.py after every load; the API
+-- includes it in response-cache keys and ETags.
+CREATE TABLE IF NOT EXISTS data_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO data_version (id, version) VALUES (1, 0);
+
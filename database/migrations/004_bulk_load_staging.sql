@@ -0,0 +1,48 @@
+-- Migration 004: staging table and skippable vendor trigger for bulk loads
+
+DROP TABLE IF EXISTS nyc_taxi_trips_staging;
+
+-- STAGING TABLE (Bulk loads)
+-- Unindexed landing table for scripts/load_data.py --mode bulk. Batches are
+-- loaded here with LOAD DATA LOCAL INFILE and merged into nyc_taxi_trips
+-- with one INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+CREATE TABLE nyc_taxi_trips_staging (
+    id VARCHAR(50) NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    pickup_date DATETIME NOT NULL,
+    dropoff_datetime DATETIME NOT NULL,
+    passenger_count INT NOT NULL,
+    pickup_longitude DECIMAL(10, 7) NOT NULL,
+    pickup_latitude DECIMAL(10, 7) NOT NULL,
+    pickup_grid_cell INT,
+    rate_code_id INT,
+    store_and_fwd_flag VARCHAR(5),
+    trip_duration INT NOT NULL,
+    trip_distance_miles DECIMAL(10, 3) NOT NULL,
+    pickup_hour INT,
+    pickup_day_of_week INT,
+    is_weekend BOOLEAN,
+    time_period VARCHAR(20),
+    average_speed_mph DECIMAL(10, 2),
+    distance_category VARCHAR(20),
+    duration_category VARCHAR(20)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TRIGGER IF EXISTS after_trip_insert;
+
+-- Trigger: Update vendor count after insert
+-- Bulk loads set @skip_vendor_trigger = 1 and call update_vendor_counts()
+-- once at the end instead of paying one UPDATE per inserted row.
+DELIMITER $$
+CREATE TRIGGER after_trip_insert
+AFTER INSERT ON nyc_taxi_trips
+FOR EACH ROW
+BEGIN
+    IF @skip_vendor_trigger IS NULL OR @skip_vendor_trigger = 0 THEN
+        UPDATE vendors 
+        SET total_trips = total_trips + 1,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE vendor_id = NEW.vendor_id;
+    END IF;
+END$$
+DELIMITER ;
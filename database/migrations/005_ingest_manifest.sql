@@ -0,0 +1,101 @@
+-- Migration 005: ingest manifest and incremental statistics refresh
+-- Creates ingest_manifest (files already loaded by scripts/load_data.py) and
+-- refresh_statistics_slice(), which rebuilds only the statistics rows a load
+-- touched, from trip_rollup (see migration 002).
+
+DROP PROCEDURE IF EXISTS refresh_statistics_slice;
+
+-- INGEST MANIFEST TABLE (Incremental loads)
+-- One row per source file loaded by scripts/load_data.py. Reruns skip files
+-- whose checksum is already recorded; size/mtime let unchanged files skip
+-- re-hashing.
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    manifest_id INT AUTO_INCREMENT PRIMARY KEY,
+    source_path VARCHAR(512) NOT NULL,
+    source_size BIGINT NOT NULL,
+    source_mtime_ns BIGINT NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    first_pickup_day DATE,
+    last_pickup_day DATE,
+    load_seconds DECIMAL(10, 2),
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    UNIQUE KEY unique_source_path (source_path),
+    INDEX idx_manifest_checksum (checksum)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Procedure: Refresh the statistics slices touched by a load
+-- Recomputes hourly_statistics for the pickup hours, and trip_statistics and
+-- vendors.total_trips for the vendors, that occur in trip_rollup between the
+-- given days. Everything is derived from trip_rollup (refresh it first), so
+-- the cost depends on the size of the cube, not of nyc_taxi_trips.
+DELIMITER $$
+CREATE PROCEDURE refresh_statistics_slice(IN p_first_day DATE, IN p_last_day DATE)
+BEGIN
+    DROP TEMPORARY TABLE IF EXISTS affected_hours;
+    DROP TEMPORARY TABLE IF EXISTS affected_vendors;
+    
+    CREATE TEMPORARY TABLE affected_hours (pickup_hour TINYINT PRIMARY KEY)
+    SELECT DISTINCT pickup_hour FROM trip_rollup
+    WHERE pickup_day BETWEEN p_first_day AND p_last_day;
+    
+    CREATE TEMPORARY TABLE affected_vendors (vendor_id VARCHAR(15) PRIMARY KEY)
+    SELECT DISTINCT vendor_id FROM trip_rollup
+    WHERE pickup_day BETWEEN p_first_day AND p_last_day;
+    
+    INSERT INTO hourly_statistics (pickup_hour, total_trips, average_duration, average_distance, average_speed)
+    SELECT 
+        r.pickup_hour,
+        SUM(r.trip_count),
+        SUM(r.sum_duration) / SUM(r.trip_count),
+        SUM(r.sum_distance_miles) / SUM(r.trip_count),
+        SUM(r.sum_speed_mph) / NULLIF(SUM(r.speed_count), 0)
+    FROM trip_rollup r
+    JOIN affected_hours h ON h.pickup_hour = r.pickup_hour
+    GROUP BY r.pickup_hour
+    ON DUPLICATE KEY UPDATE
+        total_trips = VALUES(total_trips),
+        average_duration = VALUES(average_duration),
+        average_distance = VALUES(average_distance),
+        average_speed = VALUES(average_speed);
+    
+    DELETE s FROM trip_statistics s
+    JOIN affected_vendors v ON v.vendor_id = s.vendor_id;
+    
+    INSERT INTO trip_statistics (
+        vendor_id, total_trips, average_trip_distance,
+        average_trip_duration, average_speed_mph,
+        most_common_pickup_hour, most_common_day_of_week,
+        calculation_date
+    )
+    SELECT 
+        r.vendor_id,
+        SUM(r.trip_count),
+        SUM(r.sum_distance_miles) / SUM(r.trip_count),
+        SUM(r.sum_duration) / SUM(r.trip_count),
+        SUM(r.sum_speed_mph) / NULLIF(SUM(r.speed_count), 0),
+        (SELECT h.pickup_hour FROM trip_rollup h
+         WHERE h.vendor_id = r.vendor_id
+         GROUP BY h.pickup_hour ORDER BY SUM(h.trip_count) DESC, h.pickup_hour LIMIT 1),
+        (SELECT d.pickup_day_of_week FROM trip_rollup d
+         WHERE d.vendor_id = r.vendor_id
+         GROUP BY d.pickup_day_of_week ORDER BY SUM(d.trip_count) DESC, d.pickup_day_of_week LIMIT 1),
+        CURDATE()
+    FROM trip_rollup r
+    JOIN affected_vendors v ON v.vendor_id = r.vendor_id
+    GROUP BY r.vendor_id;
+    
+    UPDATE vendors t
+    JOIN (
+        SELECT r.vendor_id, SUM(r.trip_count) AS total
+        FROM trip_rollup r
+        JOIN affected_vendors v ON v.vendor_id = r.vendor_id
+        GROUP BY r.vendor_id
+    ) totals ON totals.vendor_id = t.vendor_id
+    SET t.total_trips = totals.total;
+    
+    DROP TEMPORARY TABLE affected_hours;
+    DROP TEMPORARY TABLE affected_vendors;
+END$$
+DELIMITER ;
@@ -0,0 +1,37 @@
+-- Migration 006: quantile sketches for /api/insights/percentiles
+-- Creates the per-day and per-(hour, weekday, vendor) t-digest tables. They
+-- are filled by scripts/load_data.py for the days it loads; run the loader
+-- with --rebuild-sketches once to cover data loaded before this migration.
+
+-- TRIP QUANTILE SKETCHES (Mergeable t-digests, see backend/quantile_sketch.py)
+-- trip_day_quantile_sketches keeps one sketch per (day, hour, vendor, metric)
+-- and is rebuilt for the day ranges a load touches. trip_quantile_sketches
+-- merges those into one sketch per (hour, weekday, vendor, metric); the API
+-- merges any subset of its rows to answer percentile queries.
+-- metric: 'duration' (trip_duration, seconds) or 'speed' (average_speed_mph)
+CREATE TABLE IF NOT EXISTS trip_day_quantile_sketches (
+    pickup_day DATE NOT NULL,
+    pickup_hour TINYINT NOT NULL,
+    pickup_day_of_week TINYINT NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    trip_count INT NOT NULL DEFAULT 0,
+    sketch BLOB NOT NULL,
+    
+    PRIMARY KEY (pickup_day, pickup_hour, vendor_id, metric),
+    INDEX idx_day_sketch_cell (pickup_hour, pickup_day_of_week, vendor_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS trip_quantile_sketches (
+    pickup_hour TINYINT NOT NULL,
+    pickup_day_of_week TINYINT NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    trip_count INT NOT NULL DEFAULT 0,
+    sketch BLOB NOT NULL,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (pickup_hour, pickup_day_of_week, vendor_id, metric),
+    INDEX idx_sketch_vendor (vendor_id),
+    INDEX idx_sketch_day_of_week (pickup_day_of_week)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
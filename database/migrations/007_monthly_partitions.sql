@@ -0,0 +1,55 @@
+-- Migration 007: monthly RANGE partitioning of nyc_taxi_trips and trip_rollup
+-- Partitions hold one pickup month each (p<YYYYMM>), plus a pmax catch-all.
+-- Date-bounded queries only read the partitions of their months, and
+-- old months can be dropped instantly instead of DELETEd row by row.
+--
+-- MySQL requires every unique key of a partitioned table to contain the
+-- partitioning column and does not support foreign keys on partitioned
+-- tables, so nyc_taxi_trips gets PRIMARY KEY (id, pickup_date) and loses
+-- fk_vendor_trip (scripts/load_data.py only inserts known vendors).
+-- The key no longer enforces a unique id on its own; ids stay unique
+-- because they are allocated by AUTO_INCREMENT (migration 008), which the
+-- API's trip lookup and keyset pagination rely on.
+--
+-- The initial partitions cover the 2016 dataset. Earlier pickups land in
+-- the first partition, later ones in pmax until scripts/load_data.py splits
+-- new months out of pmax (and drops expired ones, --retention-months).
+
+ALTER TABLE nyc_taxi_trips DROP FOREIGN KEY fk_vendor_trip;
+
+ALTER TABLE nyc_taxi_trips
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, pickup_date)
+PARTITION BY RANGE COLUMNS (pickup_date) (
+    PARTITION p201601 VALUES LESS THAN ('2016-02-01'),
+    PARTITION p201602 VALUES LESS THAN ('2016-03-01'),
+    PARTITION p201603 VALUES LESS THAN ('2016-04-01'),
+    PARTITION p201604 VALUES LESS THAN ('2016-05-01'),
+    PARTITION p201605 VALUES LESS THAN ('2016-06-01'),
+    PARTITION p201606 VALUES LESS THAN ('2016-07-01'),
+    PARTITION p201607 VALUES LESS THAN ('2016-08-01'),
+    PARTITION p201608 VALUES LESS THAN ('2016-09-01'),
+    PARTITION p201609 VALUES LESS THAN ('2016-10-01'),
+    PARTITION p201610 VALUES LESS THAN ('2016-11-01'),
+    PARTITION p201611 VALUES LESS THAN ('2016-12-01'),
+    PARTITION p201612 VALUES LESS THAN ('2017-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- The rollup's primary key already starts with pickup_day
+ALTER TABLE trip_rollup
+PARTITION BY RANGE COLUMNS (pickup_day) (
+    PARTITION p201601 VALUES LESS THAN ('2016-02-01'),
+    PARTITION p201602 VALUES LESS THAN ('2016-03-01'),
+    PARTITION p201603 VALUES LESS THAN ('2016-04-01'),
+    PARTITION p201604 VALUES LESS THAN ('2016-05-01'),
+    PARTITION p201605 VALUES LESS THAN ('2016-06-01'),
+    PARTITION p201606 VALUES LESS THAN ('2016-07-01'),
+    PARTITION p201607 VALUES LESS THAN ('2016-08-01'),
+    PARTITION p201608 VALUES LESS THAN ('2016-09-01'),
+    PARTITION p201609 VALUES LESS THAN ('2016-10-01'),
+    PARTITION p201610 VALUES LESS THAN ('2016-11-01'),
+    PARTITION p201611 VALUES LESS THAN ('2016-12-01'),
+    PARTITION p201612 VALUES LESS THAN ('2017-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
@@ -0,0 +1,48 @@
+-- Migration 008: BIGINT trip ids instead of "TRIP_%08d" VARCHAR ids
+-- InnoDB stores the primary key in every secondary index entry, so a
+-- 8-byte integer instead of a ~13 character string shrinks all of the
+-- nyc_taxi_trips indexes.
+--
+-- One rule for every row, the same one scripts/load_data.py follows:
+-- the trip's identity is source_id, and id is just the row's number.
+-- - source_id is the old id string ("TRIP_00001234", "id2875421"). The
+--   loader reads the same string from the id column of an old cleaned
+--   file, so a reload finds the row through uk_source_trip and keeps its id.
+-- - id keeps the number of "TRIP_%08d" ids (1234), so existing API links
+--   still work; other rows are numbered after the highest one. From then
+--   on AUTO_INCREMENT allocates ids, continuing after the highest.
+-- Trips the old loader numbered itself because the file had no id column
+-- cannot be matched again: the new loader identifies those by a hash of
+-- their times and pickup point, and the old per-file numbers were not
+-- unique across files anyway.
+
+ALTER TABLE nyc_taxi_trips
+    ADD COLUMN new_id BIGINT UNSIGNED NULL AFTER id,
+    ADD COLUMN source_id VARCHAR(50) NULL AFTER new_id;
+
+UPDATE nyc_taxi_trips
+SET source_id = id,
+    new_id = IF(id REGEXP '^TRIP_[0-9]+$', CAST(SUBSTRING(id, 6) AS UNSIGNED), NULL);
+
+SET @next_id = (SELECT COALESCE(MAX(new_id), 0) FROM nyc_taxi_trips);
+UPDATE nyc_taxi_trips
+SET new_id = (@next_id := @next_id + 1)
+WHERE new_id IS NULL
+ORDER BY pickup_date, id;
+
+ALTER TABLE nyc_taxi_trips
+    DROP PRIMARY KEY,
+    DROP COLUMN id,
+    CHANGE COLUMN new_id id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT FIRST,
+    MODIFY COLUMN source_id VARCHAR(50) NOT NULL,
+    ADD PRIMARY KEY (id, pickup_date),
+    ADD UNIQUE KEY uk_source_trip (source_id, pickup_date);
+
+-- The staging table is emptied after every bulk load; ids are allocated
+-- when the merge inserts into nyc_taxi_trips
+TRUNCATE TABLE nyc_taxi_trips_staging;
+ALTER TABLE nyc_taxi_trips_staging
+    DROP COLUMN id,
+    ADD COLUMN source_id VARCHAR(50) NOT NULL FIRST;
+
+ANALYZE TABLE nyc_taxi_trips;
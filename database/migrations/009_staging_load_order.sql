@@ -0,0 +1,12 @@
+-- Migration 009: input position on staged rows
+-- Parallel loads stage their splits concurrently, so staging order is not
+-- input order. Each staged row now carries (load_split, load_row), and
+-- scripts/load_data.py merges ORDER BY load_split, load_row: AUTO_INCREMENT
+-- then allocates ids in input order, the same ids a serial run gets.
+
+-- The staging table is emptied after every load
+TRUNCATE TABLE nyc_taxi_trips_staging;
+ALTER TABLE nyc_taxi_trips_staging
+    ADD COLUMN load_split INT UNSIGNED NOT NULL FIRST,
+    ADD COLUMN load_row INT UNSIGNED NOT NULL AFTER load_split,
+    ADD PRIMARY KEY (load_split, load_row);
@@ -7,6 +7,12 @@
 -- 3. Run this file: SOURCE /path/to/schema.sql;
 
 -- Drop existing tables if they exist (in correct order due to foreign keys)
+DROP TABLE IF EXISTS trip_quantile_sketches;
+DROP TABLE IF EXISTS trip_day_quantile_sketches;
+DROP TABLE IF EXISTS ingest_manifest;
+DROP TABLE IF EXISTS data_version;
+DROP TABLE IF EXISTS nyc_taxi_trips_staging;
+DROP TABLE IF EXISTS trip_rollup;
 DROP TABLE IF EXISTS hourly_statistics;
 DROP TABLE IF EXISTS trip_statistics;
 DROP TABLE IF EXISTS nyc_taxi_trips;
@@ -37,10 +43,18 @@ INSERT INTO vendors (vendor_id, vendor_name) VALUES
 
 -- NYC TAXI TRIPS TABLE (Main Data Table)
 CREATE TABLE nyc_taxi_trips (
-    -- Primary Key
-    id VARCHAR(50) PRIMARY KEY,
+    -- Primary Key (with pickup_date: every unique key of a partitioned table
+    -- must contain the partitioning column). A compact integer, since InnoDB
+    -- repeats the primary key in every secondary index entry; allocated by
+    -- AUTO_INCREMENT, so ids are unique across files and loads
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    -- Identity of the trip in the source data (e.g. "id2875421", or a hash
+    -- of its times and pickup point, see scripts/load_data.py); the loader
+    -- upserts on it, so a reloaded trip keeps its id
+    source_id VARCHAR(50) NOT NULL,
     
-    -- Foreign Key to Vendors
+    -- Vendor (no foreign key: partitioned tables cannot have one; the
+    -- loader only inserts known vendors)
     vendor_id VARCHAR(15) NOT NULL,
     
     -- Trip Details
@@ -51,6 +65,9 @@ CREATE TABLE nyc_taxi_trips (
     -- Location Data
     pickup_longitude DECIMAL(10, 7) NOT NULL,
     pickup_latitude DECIMAL(10, 7) NOT NULL,
+    -- 0.01 degree grid cell of the pickup point (see backend/geo.py):
+    -- FLOOR((lat + 90) * 100) * 36000 + FLOOR((lon + 180) * 100)
+    pickup_grid_cell INT,
     
     -- Trip Metadata
     rate_code_id INT DEFAULT 1,
@@ -88,14 +105,62 @@ CREATE TABLE nyc_taxi_trips (
     INDEX idx_distance_cat (distance_category),
     INDEX idx_duration_cat (duration_category),
     INDEX idx_location (pickup_latitude, pickup_longitude),
+    INDEX idx_grid_cell (pickup_grid_cell, pickup_latitude, pickup_longitude),
     INDEX idx_date_vendor (pickup_date, vendor_id),
     INDEX idx_composite_analysis (pickup_hour, pickup_day_of_week, is_weekend),
     
-    -- Foreign Key Constraint
-    CONSTRAINT fk_vendor_trip 
-        FOREIGN KEY (vendor_id) REFERENCES vendors(vendor_id)
-        ON DELETE RESTRICT
-        ON UPDATE CASCADE
+    PRIMARY KEY (id, pickup_date),
+    UNIQUE KEY uk_source_trip (source_id, pickup_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+-- One partition per pickup month; scripts/load_data.py splits new months out
+-- of pmax and drops expired ones (--retention-months)
+PARTITION BY RANGE COLUMNS (pickup_date) (
+    PARTITION p201601 VALUES LESS THAN ('2016-02-01'),
+    PARTITION p201602 VALUES LESS THAN ('2016-03-01'),
+    PARTITION p201603 VALUES LESS THAN ('2016-04-01'),
+    PARTITION p201604 VALUES LESS THAN ('2016-05-01'),
+    PARTITION p201605 VALUES LESS THAN ('2016-06-01'),
+    PARTITION p201606 VALUES LESS THAN ('2016-07-01'),
+    PARTITION p201607 VALUES LESS THAN ('2016-08-01'),
+    PARTITION p201608 VALUES LESS THAN ('2016-09-01'),
+    PARTITION p201609 VALUES LESS THAN ('2016-10-01'),
+    PARTITION p201610 VALUES LESS THAN ('2016-11-01'),
+    PARTITION p201611 VALUES LESS THAN ('2016-12-01'),
+    PARTITION p201612 VALUES LESS THAN ('2017-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- STAGING TABLE (Bulk and parallel loads)
+-- Landing table for scripts/load_data.py --mode bulk and --workers. Batches
+-- are loaded here (LOAD DATA LOCAL INFILE, or executemany from parallel
+-- batch-mode workers) and merged into nyc_taxi_trips with one
+-- INSERT ... SELECT ... ORDER BY load_split, load_row ... ON DUPLICATE KEY
+-- UPDATE, so ids are allocated in input order. The only index is the
+-- clustered key on the input position, which the merge reads in order.
+CREATE TABLE nyc_taxi_trips_staging (
+    load_split INT UNSIGNED NOT NULL,
+    load_row INT UNSIGNED NOT NULL,
+    source_id VARCHAR(50) NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    pickup_date DATETIME NOT NULL,
+    dropoff_datetime DATETIME NOT NULL,
+    passenger_count INT NOT NULL,
+    pickup_longitude DECIMAL(10, 7) NOT NULL,
+    pickup_latitude DECIMAL(10, 7) NOT NULL,
+    pickup_grid_cell INT,
+    rate_code_id INT,
+    store_and_fwd_flag VARCHAR(5),
+    trip_duration INT NOT NULL,
+    trip_distance_miles DECIMAL(10, 3) NOT NULL,
+    pickup_hour INT,
+    pickup_day_of_week INT,
+    is_weekend BOOLEAN,
+    time_period VARCHAR(20),
+    average_speed_mph DECIMAL(10, 2),
+    distance_category VARCHAR(20),
+    duration_category VARCHAR(20),
+    
+    PRIMARY KEY (load_split, load_row)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- TRIP STATISTICS TABLE (Aggregated Stats)
@@ -134,6 +199,122 @@ CREATE TABLE hourly_statistics (
     INDEX idx_hour (pickup_hour)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- TRIP ROLLUP TABLE (Pre-aggregated cube for the insights endpoints)
+-- One row per (day, hour, vendor, passenger count, distance category).
+-- Only additive measures are stored (sums and counts, plus min/max), so any
+-- coarser grouping and its averages can be derived with SUM()/SUM().
+-- Maintained per day range by refresh_trip_rollup(), called from load_data.py.
+CREATE TABLE trip_rollup (
+    pickup_day DATE NOT NULL,
+    pickup_hour TINYINT NOT NULL,
+    pickup_day_of_week TINYINT NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    passenger_count INT NOT NULL,
+    distance_category VARCHAR(20) NOT NULL DEFAULT '',
+    
+    -- All trips in the cell
+    trip_count INT NOT NULL DEFAULT 0,
+    sum_duration BIGINT NOT NULL DEFAULT 0,
+    sum_distance_miles DECIMAL(20, 3) NOT NULL DEFAULT 0,
+    min_distance_miles DECIMAL(10, 3),
+    max_distance_miles DECIMAL(10, 3),
+    speed_count INT NOT NULL DEFAULT 0,
+    sum_speed_mph DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    
+    -- Trips with trip_distance_miles > 0 (used for seconds-per-km)
+    moving_trip_count INT NOT NULL DEFAULT 0,
+    moving_speed_count INT NOT NULL DEFAULT 0,
+    sum_moving_speed_mph DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    sum_moving_sec_per_mile DOUBLE NOT NULL DEFAULT 0,
+    
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (pickup_day, pickup_hour, vendor_id, passenger_count, distance_category),
+    INDEX idx_rollup_hour (pickup_hour),
+    INDEX idx_rollup_day_of_week (pickup_day_of_week),
+    INDEX idx_rollup_vendor (vendor_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+-- Same monthly partitions as nyc_taxi_trips (managed together by the loader)
+PARTITION BY RANGE COLUMNS (pickup_day) (
+    PARTITION p201601 VALUES LESS THAN ('2016-02-01'),
+    PARTITION p201602 VALUES LESS THAN ('2016-03-01'),
+    PARTITION p201603 VALUES LESS THAN ('2016-04-01'),
+    PARTITION p201604 VALUES LESS THAN ('2016-05-01'),
+    PARTITION p201605 VALUES LESS THAN ('2016-06-01'),
+    PARTITION p201606 VALUES LESS THAN ('2016-07-01'),
+    PARTITION p201607 VALUES LESS THAN ('2016-08-01'),
+    PARTITION p201608 VALUES LESS THAN ('2016-09-01'),
+    PARTITION p201609 VALUES LESS THAN ('2016-10-01'),
+    PARTITION p201610 VALUES LESS THAN ('2016-11-01'),
+    PARTITION p201611 VALUES LESS THAN ('2016-12-01'),
+    PARTITION p201612 VALUES LESS THAN ('2017-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- DATA VERSION TABLE (Cache invalidation stamp)
+-- Single row bumped by scripts/load_data.py after every load; the API
+-- includes it in response-cache keys and ETags.
+CREATE TABLE data_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO data_version (id, version) VALUES (1, 0);
+
+-- TRIP QUANTILE SKETCHES (Mergeable t-digests, see backend/quantile_sketch.py)
+-- trip_day_quantile_sketches keeps one sketch per (day, hour, vendor, metric)
+-- and is rebuilt for the day ranges a load touches. trip_quantile_sketches
+-- merges those into one sketch per (hour, weekday, vendor, metric); the API
+-- merges any subset of its rows to answer percentile queries.
+-- metric: 'duration' (trip_duration, seconds) or 'speed' (average_speed_mph)
+CREATE TABLE trip_day_quantile_sketches (
+    pickup_day DATE NOT NULL,
+    pickup_hour TINYINT NOT NULL,
+    pickup_day_of_week TINYINT NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    trip_count INT NOT NULL DEFAULT 0,
+    sketch BLOB NOT NULL,
+    
+    PRIMARY KEY (pickup_day, pickup_hour, vendor_id, metric),
+    INDEX idx_day_sketch_cell (pickup_hour, pickup_day_of_week, vendor_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE trip_quantile_sketches (
+    pickup_hour TINYINT NOT NULL,
+    pickup_day_of_week TINYINT NOT NULL,
+    vendor_id VARCHAR(15) NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    trip_count INT NOT NULL DEFAULT 0,
+    sketch BLOB NOT NULL,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (pickup_hour, pickup_day_of_week, vendor_id, metric),
+    INDEX idx_sketch_vendor (vendor_id),
+    INDEX idx_sketch_day_of_week (pickup_day_of_week)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- INGEST MANIFEST TABLE (Incremental loads)
+-- One row per source file loaded by scripts/load_data.py. Reruns skip files
+-- whose checksum is already recorded; size/mtime let unchanged files skip
+-- re-hashing.
+CREATE TABLE ingest_manifest (
+    manifest_id INT AUTO_INCREMENT PRIMARY KEY,
+    source_path VARCHAR(512) NOT NULL,
+    source_size BIGINT NOT NULL,
+    source_mtime_ns BIGINT NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    first_pickup_day DATE,
+    last_pickup_day DATE,
+    load_seconds DECIMAL(10, 2),
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    UNIQUE KEY unique_source_path (source_path),
+    INDEX idx_manifest_checksum (checksum)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- VIEWS FOR COMMON QUERIES
 
 -- View: Trips by Hour
@@ -276,18 +457,140 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- Procedure: Refresh the rollup cube for a range of pickup days (inclusive)
+DELIMITER $$
+CREATE PROCEDURE refresh_trip_rollup(IN p_first_day DATE, IN p_last_day DATE)
+BEGIN
+    DELETE FROM trip_rollup
+    WHERE pickup_day BETWEEN p_first_day AND p_last_day;
+    
+    INSERT INTO trip_rollup (
+        pickup_day, pickup_hour, pickup_day_of_week, vendor_id,
+        passenger_count, distance_category,
+        trip_count, sum_duration, sum_distance_miles,
+        min_distance_miles, max_distance_miles,
+        speed_count, sum_speed_mph,
+        moving_trip_count, moving_speed_count,
+        sum_moving_speed_mph, sum_moving_sec_per_mile
+    )
+    SELECT 
+        DATE(pickup_date),
+        HOUR(pickup_date),
+        WEEKDAY(pickup_date),
+        vendor_id,
+        passenger_count,
+        COALESCE(distance_category, ''),
+        COUNT(*),
+        SUM(trip_duration),
+        SUM(trip_distance_miles),
+        MIN(trip_distance_miles),
+        MAX(trip_distance_miles),
+        COUNT(average_speed_mph),
+        COALESCE(SUM(average_speed_mph), 0),
+        SUM(trip_distance_miles > 0),
+        COUNT(CASE WHEN trip_distance_miles > 0 THEN average_speed_mph END),
+        COALESCE(SUM(CASE WHEN trip_distance_miles > 0 THEN average_speed_mph END), 0),
+        COALESCE(SUM(CASE WHEN trip_distance_miles > 0 THEN trip_duration / trip_distance_miles END), 0)
+    FROM nyc_taxi_trips
+    WHERE pickup_date >= p_first_day
+        AND pickup_date < p_last_day + INTERVAL 1 DAY
+    GROUP BY 
+        DATE(pickup_date), HOUR(pickup_date), WEEKDAY(pickup_date),
+        vendor_id, passenger_count, COALESCE(distance_category, '');
+END$$
+DELIMITER ;
+
+-- Procedure: Refresh the statistics slices touched by a load
+-- Recomputes hourly_statistics for the pickup hours, and trip_statistics and
+-- vendors.total_trips for the vendors, that occur in trip_rollup between the
+-- given days. Everything is derived from trip_rollup (refresh it first), so
+-- the cost depends on the size of the cube, not of nyc_taxi_trips.
+DELIMITER $$
+CREATE PROCEDURE refresh_statistics_slice(IN p_first_day DATE, IN p_last_day DATE)
+BEGIN
+    DROP TEMPORARY TABLE IF EXISTS affected_hours;
+    DROP TEMPORARY TABLE IF EXISTS affected_vendors;
+    
+    CREATE TEMPORARY TABLE affected_hours (pickup_hour TINYINT PRIMARY KEY)
+    SELECT DISTINCT pickup_hour FROM trip_rollup
+    WHERE pickup_day BETWEEN p_first_day AND p_last_day;
+    
+    CREATE TEMPORARY TABLE affected_vendors (vendor_id VARCHAR(15) PRIMARY KEY)
+    SELECT DISTINCT vendor_id FROM trip_rollup
+    WHERE pickup_day BETWEEN p_first_day AND p_last_day;
+    
+    INSERT INTO hourly_statistics (pickup_hour, total_trips, average_duration, average_distance, average_speed)
+    SELECT 
+        r.pickup_hour,
+        SUM(r.trip_count),
+        SUM(r.sum_duration) / SUM(r.trip_count),
+        SUM(r.sum_distance_miles) / SUM(r.trip_count),
+        SUM(r.sum_speed_mph) / NULLIF(SUM(r.speed_count), 0)
+    FROM trip_rollup r
+    JOIN affected_hours h ON h.pickup_hour = r.pickup_hour
+    GROUP BY r.pickup_hour
+    ON DUPLICATE KEY UPDATE
+        total_trips = VALUES(total_trips),
+        average_duration = VALUES(average_duration),
+        average_distance = VALUES(average_distance),
+        average_speed = VALUES(average_speed);
+    
+    DELETE s FROM trip_statistics s
+    JOIN affected_vendors v ON v.vendor_id = s.vendor_id;
+    
+    INSERT INTO trip_statistics (
+        vendor_id, total_trips, average_trip_distance,
+        average_trip_duration, average_speed_mph,
+        most_common_pickup_hour, most_common_day_of_week,
+        calculation_date
+    )
+    SELECT 
+        r.vendor_id,
+        SUM(r.trip_count),
+        SUM(r.sum_distance_miles) / SUM(r.trip_count),
+        SUM(r.sum_duration) / SUM(r.trip_count),
+        SUM(r.sum_speed_mph) / NULLIF(SUM(r.speed_count), 0),
+        (SELECT h.pickup_hour FROM trip_rollup h
+         WHERE h.vendor_id = r.vendor_id
+         GROUP BY h.pickup_hour ORDER BY SUM(h.trip_count) DESC, h.pickup_hour LIMIT 1),
+        (SELECT d.pickup_day_of_week FROM trip_rollup d
+         WHERE d.vendor_id = r.vendor_id
+         GROUP BY d.pickup_day_of_week ORDER BY SUM(d.trip_count) DESC, d.pickup_day_of_week LIMIT 1),
+        CURDATE()
+    FROM trip_rollup r
+    JOIN affected_vendors v ON v.vendor_id = r.vendor_id
+    GROUP BY r.vendor_id;
+    
+    UPDATE vendors t
+    JOIN (
+        SELECT r.vendor_id, SUM(r.trip_count) AS total
+        FROM trip_rollup r
+        JOIN affected_vendors v ON v.vendor_id = r.vendor_id
+        GROUP BY r.vendor_id
+    ) totals ON totals.vendor_id = t.vendor_id
+    SET t.total_trips = totals.total;
+    
+    DROP TEMPORARY TABLE affected_hours;
+    DROP TEMPORARY TABLE affected_vendors;
+END$$
+DELIMITER ;
+
 -- TRIGGERS
 
 -- Trigger: Update vendor count after insert
+-- Bulk loads set @skip_vendor_trigger = 1 and call update_vendor_counts()
+-- once at the end instead of paying one UPDATE per inserted row.
 DELIMITER $$
 CREATE TRIGGER after_trip_insert
 AFTER INSERT ON nyc_taxi_trips
 FOR EACH ROW
 BEGIN
-    UPDATE vendors 
-    SET total_trips = total_trips + 1,
-        last_updated = CURRENT_TIMESTAMP
-    WHERE vendor_id = NEW.vendor_id;
+    IF @skip_vendor_trigger IS NULL OR @skip_vendor_trigger = 0 THEN
+        UPDATE vendors 
+        SET total_trips = total_trips + 1,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE vendor_id = NEW.vendor_id;
+    END IF;
 END$$
 DELIMITER ;
 
@@ -309,7 +612,7 @@ DELIMITER ;
 -- Insert sample trip (uncomment to use)
 /*
 INSERT INTO nyc_taxi_trips (
-    id, vendor_id, pickup_date, dropoff_datetime, passenger_count,
+    source_id, vendor_id, pickup_date, dropoff_datetime, passenger_count,
     pickup_longitude, pickup_latitude, rate_code_id, store_and_fwd_flag,
     trip_duration, trip_distance_miles, pickup_hour, pickup_day_of_week,
     is_weekend, time_period, average_speed_mph, distance_category, duration_category
@@ -341,13 +644,12 @@ INSERT INTO nyc_taxi_trips (
 /*
 For large datasets (millions of rows), consider:
 
-1. Partitioning by date:
-   ALTER TABLE nyc_taxi_trips 
-   PARTITION BY RANGE (YEAR(pickup_date)) (
-       PARTITION p2023 VALUES LESS THAN (2024),
-       PARTITION p2024 VALUES LESS THAN (2025),
-       PARTITION p2025 VALUES LESS THAN (2026)
-   );
+1. Partitioning by date: nyc_taxi_trips and trip_rollup are partitioned by
+   pickup month (see migration 007). List the partitions with
+   SELECT PARTITION_NAME, TABLE_ROWS FROM information_schema.PARTITIONS
+   WHERE TABLE_NAME = 'nyc_taxi_trips';
+   and check pruning with EXPLAIN (partitions column) or
+   python scripts/check_query_plans.py
 
 2. Add full-text search if needed:
    ALTER TABLE nyc_taxi_trips ADD FULLTEXT(distance_category, duration_category);
@@ -359,7 +661,7 @@ For large datasets (millions of rows), consider:
 
 -- SUCCESS MESSAGE
 SELECT 'Database schema created successfully!' AS Status;
-SELECT 'Tables created: vendors, nyc_taxi_trips, trip_statistics, hourly_statistics' AS Info;
+SELECT 'Tables created: vendors, nyc_taxi_trips, nyc_taxi_trips_staging, trip_statistics, hourly_statistics, trip_rollup, data_version, ingest_manifest, trip_day_quantile_sketches, trip_quantile_sketches' AS Info;
 SELECT 'Views created: 6 analytical views' AS Views;
-SELECT 'Procedures created: update_hourly_statistics, update_vendor_counts' AS Procedures;
+SELECT 'Procedures created: update_hourly_statistics, update_vendor_counts, refresh_trip_rollup, refresh_statistics_slice' AS Procedures;
 SELECT 'Triggers created: after_trip_insert, after_trip_delete' AS Triggers;
\ No newline at end of file
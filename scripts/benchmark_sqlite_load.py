@@ -0,0 +1,96 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from create_nyc_database import apply_read_profile, create_nyc_database
+from process_nyc_data import DEFAULT_CHUNK_SIZE, process_nyc_taxi_data
+
+# Typical analyzer / ad-hoc queries timed against both databases
+READ_QUERIES = {
+    'trip by id': ("SELECT * FROM trips WHERE id = ?", 'sample_id'),
+    'one day of pickups': (
+        "SELECT COUNT(*) FROM trips WHERE pickup_datetime >= ? AND pickup_datetime < date(?, '+1 day')",
+        'sample_day'
+    ),
+    'long trips': ("SELECT COUNT(*) FROM trips WHERE trip_duration > 7200", None),
+    'speed by weekday': ("SELECT day_of_week, AVG(trip_speed) FROM trips GROUP BY day_of_week", None),
+    'weekend rush hour': (
+        "SELECT COUNT(*) FROM trips WHERE is_weekend = 1 AND time_period = 'evening_rush'",
+        None
+    )
+}
+
+
+def time_queries(db_path, repeats, read_profile):
+    conn = sqlite3.connect(db_path)
+    if read_profile:
+        apply_read_profile(conn)
+
+    sample_id, sample_time = conn.execute(
+        "SELECT id, pickup_datetime FROM trips WHERE trip_key = (SELECT MAX(trip_key) / 2 FROM trips)"
+    ).fetchone()
+    samples = {'sample_id': (sample_id,), 'sample_day': (sample_time[:10], sample_time[:10])}
+
+    timings = {}
+    for name, (sql, sample) in READ_QUERIES.items():
+        params = samples[sample] if sample else ()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            conn.execute(sql, params).fetchall()
+        timings[name] = (time.perf_counter() - started) / repeats * 1000
+    conn.close()
+    return timings
+
+
+def run_profile(name, db_path, input_file, chunksize, limit, tuned):
+    print(f"\n--- {name} ---")
+    started = time.perf_counter()
+    create_nyc_database(db_path, indexes_first=not tuned)
+    rows = process_nyc_taxi_data(input_file, db_path, chunksize, limit, tuned=tuned)
+    seconds = time.perf_counter() - started
+    return rows, seconds, os.path.getsize(db_path)
+
+
+def benchmark(input_file, chunksize, limit, repeats):
+    """Load the same input with the old and the new SQLite profile and compare"""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        profiles = [
+            ('before: indexes first, default pragmas', False),
+            ('after: load profile, indexes after load, ANALYZE', True)
+        ]
+        for name, tuned in profiles:
+            db_path = os.path.join(workdir, 'tuned.db' if tuned else 'baseline.db')
+            rows, seconds, size = run_profile(name, db_path, input_file, chunksize, limit, tuned)
+            queries = time_queries(db_path, repeats, read_profile=tuned)
+            results[name] = (rows, seconds, size, queries)
+
+    print("\nSQLITE LOAD BENCHMARK")
+    for name, (rows, seconds, size, queries) in results.items():
+        print(f"\n{name}")
+        print(f"  rows loaded:   {rows:,}")
+        print(f"  total time:    {seconds:.2f}s ({rows / seconds:,.0f} rows/s)")
+        print(f"  database size: {size / 1024 / 1024:.1f} MB")
+        for query, ms in queries.items():
+            print(f"  {query:<20} {ms:9.2f} ms")
+
+    (_, before, _, before_queries), (_, after, _, after_queries) = results.values()
+    print(f"\nLoad speedup: {before / after:.2f}x")
+    for query in READ_QUERIES:
+        print(f"  {query:<20} {before_queries[query] / max(after_queries[query], 1e-6):6.2f}x")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare SQLite load/read profiles')
+    parser.add_argument('--input', default='data/raw/train.csv', help='Input CSV file')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--limit', type=int, default=None, help='Rows to load (default: all)')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per read query')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    benchmark(args.input, args.chunksize, args.limit, args.repeats)
@@ -0,0 +1,173 @@
+import argparse
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', 3306)),
+    'database': os.getenv('DB_NAME', 'nyc_taxi_db'),
+    'user': os.getenv('DB_USER', 'frank'),
+    'password': os.getenv('DB_PASSWORD', '')
+}
+
+TABLE = 'nyc_taxi_trips'
+
+# Scratch copies of a sample of nyc_taxi_trips (same indexes and partitions),
+# one per id type; the VARCHAR one gets the old "TRIP_%08d" ids
+LAYOUTS = {
+    'VARCHAR(50) "TRIP_%08d"': ('nyc_taxi_trips_ids_varchar', "CONCAT('TRIP_', LPAD(id, 8, '0'))"),
+    'BIGINT UNSIGNED': ('nyc_taxi_trips_ids_bigint', 'id')
+}
+
+
+def time_id_generation(count):
+    """Seconds to build count ids the old way (Python strings) and the new way (NumPy)"""
+    started = time.perf_counter()
+    strings = [f"TRIP_{i:08d}" for i in range(count)]
+    string_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    integers = np.arange(0, count, dtype=np.int64)
+    integer_seconds = time.perf_counter() - started
+
+    del strings, integers
+    return string_seconds, integer_seconds
+
+
+def table_columns(cursor):
+    cursor.execute('''
+        SELECT COLUMN_NAME as name FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    ''', (TABLE,))
+    return [row['name'] for row in cursor.fetchall()]
+
+
+def build_layout(conn, cursor, table, id_expression, columns, sample_rows):
+    """Copy a sample into a scratch table with the given id column; returns load seconds"""
+    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    cursor.execute(f'CREATE TABLE {table} LIKE {TABLE}')
+    if id_expression != 'id':
+        cursor.execute(f'ALTER TABLE {table} MODIFY COLUMN id VARCHAR(50) NOT NULL')
+
+    select_list = ', '.join(id_expression if column == 'id' else column for column in columns)
+    started = time.perf_counter()
+    cursor.execute(f'''
+        INSERT INTO {table} ({', '.join(columns)})
+        SELECT {select_list} FROM {TABLE} ORDER BY id LIMIT %s
+    ''', (sample_rows,))
+    conn.commit()
+    seconds = time.perf_counter() - started
+
+    # Exact sizes need the persistent statistics refreshed
+    cursor.execute(f'ANALYZE TABLE {table}')
+    cursor.fetchall()
+    return seconds
+
+
+def table_size(cursor, table):
+    """(data bytes, index bytes) of a table, summed over its partitions"""
+    cursor.execute('''
+        SELECT SUM(DATA_LENGTH) as data_bytes, SUM(INDEX_LENGTH) as index_bytes
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (table,))
+    row = cursor.fetchone()
+    return int(row['data_bytes'] or 0), int(row['index_bytes'] or 0)
+
+
+def time_lookups(cursor, table, ids, repeats):
+    """Median milliseconds of a primary key point lookup"""
+    timings = []
+    for _ in range(repeats):
+        for trip_id in ids:
+            started = time.perf_counter()
+            cursor.execute(f'SELECT * FROM {table} WHERE id = %s', (trip_id,))
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def time_full_count(cursor, table, repeats):
+    """Median milliseconds of a full COUNT(*), which InnoDB answers from the
+    smallest secondary index (so it scales with the index size)"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark(sample_rows, lookups, repeats, id_count):
+    print("TRIP ID BENCHMARK - VARCHAR vs BIGINT PRIMARY KEY")
+
+    string_seconds, integer_seconds = time_id_generation(id_count)
+    print(f"\n[1] Generating {id_count:,} ids in Python:")
+    print(f"  f-strings:  {string_seconds:.3f}s")
+    print(f"  np.arange:  {integer_seconds:.3f}s ({string_seconds / max(integer_seconds, 1e-9):,.0f}x faster)")
+
+    conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+    cursor = conn.cursor()
+    columns = table_columns(cursor)
+
+    results = {}
+    try:
+        print(f"\n[2] Copying {sample_rows:,} rows into one scratch table per layout...")
+        for name, (table, id_expression) in LAYOUTS.items():
+            load_seconds = build_layout(conn, cursor, table, id_expression, columns, sample_rows)
+            cursor.execute(f'SELECT id FROM {table}')
+            ids = [row['id'] for row in cursor.fetchall()]
+            sample_ids = random.sample(ids, min(lookups, len(ids)))
+            data_bytes, index_bytes = table_size(cursor, table)
+            results[name] = {
+                'load': load_seconds,
+                'data': data_bytes,
+                'index': index_bytes,
+                'lookup': time_lookups(cursor, table, sample_ids, repeats),
+                'full_count': time_full_count(cursor, table, repeats)
+            }
+    finally:
+        for table, _ in LAYOUTS.values():
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        cursor.close()
+        conn.close()
+
+    print("\n[3] Results:")
+    for name, result in results.items():
+        print(f"\n  {name}")
+        print(f"    load:              {result['load']:.2f}s")
+        print(f"    data size:         {result['data'] / 1024 / 1024:.1f} MB")
+        print(f"    index size:        {result['index'] / 1024 / 1024:.1f} MB")
+        print(f"    id lookup:         {result['lookup']:.3f} ms (median)")
+        print(f"    full count:        {result['full_count']:.1f} ms (median)")
+
+    old, new = results.values()
+    print("\n  BIGINT vs VARCHAR:")
+    print(f"    index size:  {new['index'] / max(old['index'], 1):.2f}x")
+    print(f"    data size:   {new['data'] / max(old['data'], 1):.2f}x")
+    print(f"    id lookup:   {old['lookup'] / max(new['lookup'], 1e-9):.2f}x faster")
+    print(f"    full count:  {old['full_count'] / max(new['full_count'], 1e-9):.2f}x faster")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Measure the storage and lookup cost of VARCHAR vs BIGINT trip ids')
+    parser.add_argument('--sample-rows', type=int, default=500000, help='Rows copied into each scratch table')
+    parser.add_argument('--lookups', type=int, default=200, help='Random ids looked up per run')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per measurement')
+    parser.add_argument('--id-count', type=int, default=1000000, help='Ids generated for the Python timing')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    benchmark(args.sample_rows, args.lookups, args.repeats, args.id_count)
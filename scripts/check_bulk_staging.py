@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+
+import pymysql
+
+# The loader's own TSV writer and LOAD DATA statement, pointed at a scratch database
+import load_data
+from load_data import DB_CONFIG, STAGING_COLUMNS, STAGING_TABLE, stage_tsv_file, write_tsv_batch
+
+SCRATCH_DATABASE = DB_CONFIG['database'] + '_staging_check'
+
+# Columns that may be NULL in the staging table
+NULLABLE_COLUMNS = [
+    'pickup_grid_cell', 'rate_code_id', 'store_and_fwd_flag', 'pickup_hour',
+    'pickup_day_of_week', 'is_weekend', 'time_period', 'average_speed_mph',
+    'distance_category', 'duration_category'
+]
+
+# Text that looks like the TSV escapes and the NULL marker must load verbatim
+TRICKY_TEXT = 'a\tb\\N\\'
+
+BASE_ROW = {
+    'load_split': 0, 'source_id': 'null_check', 'vendor_id': '1',
+    'pickup_date': '2016-01-01 08:00:00', 'dropoff_datetime': '2016-01-01 08:15:00',
+    'passenger_count': 1, 'pickup_longitude': -73.9851, 'pickup_latitude': 40.758,
+    'pickup_grid_cell': 1234567, 'rate_code_id': 1, 'store_and_fwd_flag': 'N',
+    'trip_duration': 900, 'trip_distance_miles': 2.5, 'pickup_hour': 8,
+    'pickup_day_of_week': 4, 'is_weekend': 0, 'time_period': 'Morning',
+    'average_speed_mph': 10.0, 'distance_category': 'Short', 'duration_category': 'Medium'
+}
+
+
+def staged_rows():
+    """Row 0: every nullable column None; row 1: tricky text in the string columns"""
+    nulls = dict(BASE_ROW, load_row=0, **{column: None for column in NULLABLE_COLUMNS})
+    text = dict(BASE_ROW, load_row=1, source_id=TRICKY_TEXT, time_period=TRICKY_TEXT)
+    return [nulls, text]
+
+
+def check_bulk_staging():
+    """Write rows with the loader's TSV writer, LOAD DATA them and read them back"""
+    conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor,
+                           autocommit=True, local_infile=True)
+    cursor = conn.cursor()
+    results = []
+
+    print("BULK STAGING CHECK - TSV ROUND TRIP")
+    try:
+        cursor.execute(f'DROP DATABASE IF EXISTS {SCRATCH_DATABASE}')
+        cursor.execute(f'CREATE DATABASE {SCRATCH_DATABASE}')
+        cursor.execute(f'CREATE TABLE {SCRATCH_DATABASE}.{STAGING_TABLE} LIKE {DB_CONFIG["database"]}.{STAGING_TABLE}')
+        load_data.DB_CONFIG = dict(DB_CONFIG, database=SCRATCH_DATABASE)
+        cursor.execute(f'USE {SCRATCH_DATABASE}')
+
+        rows = staged_rows()
+        with tempfile.TemporaryDirectory(prefix='nyc_taxi_tsv_') as tmp_dir:
+            path = os.path.join(tmp_dir, 'batch.tsv')
+            write_tsv_batch([[row[column] for row in rows] for column in STAGING_COLUMNS], path)
+            stage_tsv_file(cursor, path)
+
+        cursor.execute(f'SELECT * FROM {STAGING_TABLE} ORDER BY load_row')
+        loaded = cursor.fetchall()
+
+        print("\n[Test 1] None loads as NULL:")
+        not_null = [column for column in NULLABLE_COLUMNS if loaded[0][column] is not None]
+        ok = len(loaded) == 2 and not not_null
+        print(f"  [{'OK' if ok else 'FAIL'}] {len(NULLABLE_COLUMNS) - len(not_null)}/{len(NULLABLE_COLUMNS)} "
+              f"nullable columns NULL{' (not: ' + ', '.join(not_null) + ')' if not_null else ''}")
+        results.append(ok)
+
+        print("\n[Test 2] Tabs, backslashes and a literal \\N load verbatim:")
+        ok = len(loaded) == 2 and loaded[1]['source_id'] == loaded[1]['time_period'] == TRICKY_TEXT
+        print(f"  [{'OK' if ok else 'FAIL'}] source_id {loaded[1]['source_id']!r}" if len(loaded) == 2
+              else "  [FAIL] rows missing")
+        results.append(ok)
+    except pymysql.MySQLError as e:
+        print(f"\nDatabase Error: {e}")
+        results.append(False)
+    finally:
+        cursor.execute(f'DROP DATABASE IF EXISTS {SCRATCH_DATABASE}')
+        cursor.close()
+        conn.close()
+
+    if all(results):
+        print("\nSTAGED ROWS ROUND-TRIP THROUGH LOAD DATA UNCHANGED")
+        return True
+    print(f"\n{results.count(False)} STAGING CHECK(S) FAILED")
+    return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_bulk_staging() else 1)
@@ -0,0 +1,175 @@
+import os
+import sys
+from datetime import date
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The checked SQL is built by the API's own code, so a regression there shows up here
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from app import SUMMARY_SQL, build_trip_filters
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', '3306')),
+    'database': os.getenv('DB_NAME', 'nyc_taxi_db'),
+    'user': os.getenv('DB_USER', 'frank'),
+    'password': os.getenv('DB_PASSWORD', '')
+}
+
+# A table access of one of these types is a full scan
+FULL_SCAN_TYPES = ('ALL', 'index')
+
+
+def first_loaded_day(cursor):
+    cursor.execute("SELECT MIN(pickup_day) as day FROM trip_rollup")
+    row = cursor.fetchone()
+    return row['day'] or date(2016, 1, 1)
+
+
+def explain(cursor, sql, params, table):
+    """Return the EXPLAIN row for table"""
+    cursor.execute('EXPLAIN ' + sql, tuple(params))
+    for step in cursor.fetchall():
+        if step.get('table') == table:
+            return step
+    return None
+
+
+def check_plan(cursor, label, sql, params, table, expected_keys):
+    """Print the plan and return True if it is an index range on an expected key"""
+    step = explain(cursor, sql, params, table)
+    if step is None:
+        print(f"  [FAIL] {label}: no plan row for {table}")
+        return False
+
+    ok = step['type'] not in FULL_SCAN_TYPES and step['key'] in expected_keys
+    status = 'OK' if ok else 'FAIL'
+    print(
+        f"  [{status}] {label}: type={step['type']} key={step['key']} "
+        f"rows={step['rows']} (expected key in {', '.join(expected_keys)})"
+    )
+    return ok
+
+
+def month_partitions(first_day, last_day):
+    """Names of the monthly partitions (p<YYYYMM>) covering a day range"""
+    names = []
+    month = date(first_day.year, first_day.month, 1)
+    while month <= last_day:
+        names.append(f"p{month:%Y%m}")
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return names
+
+
+def check_pruning(cursor, label, sql, params, table, expected_partitions):
+    """Print the partitions read and return True if they are only the expected ones"""
+    step = explain(cursor, sql, params, table)
+    if step is None:
+        print(f"  [FAIL] {label}: no plan row for {table}")
+        return False
+
+    read = step.get('partitions')
+    if not read:
+        print(f"  [FAIL] {label}: {table} is not partitioned (apply migration 007)")
+        return False
+
+    ok = set(read.split(',')) <= set(expected_partitions)
+    status = 'OK' if ok else 'FAIL'
+    print(f"  [{status}] {label}: partitions={read} (expected within {', '.join(expected_partitions)})")
+    return ok
+
+
+def trips_where(args):
+    filters, params, _, _ = build_trip_filters(args)
+    return 'WHERE ' + ' AND '.join(filters), params
+
+
+def check_query_plans():
+    """EXPLAIN the date-filtered API queries and fail on full scans or unpruned partitions"""
+    try:
+        conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+        cursor = conn.cursor()
+
+        print("QUERY PLAN CHECK - DATE RANGE FILTERS")
+
+        day = first_loaded_day(cursor)
+        week_end = date.fromordinal(day.toordinal() + 6)
+        results = []
+
+        # Test 1: /api/trips date range (page query and its COUNT)
+        print("\n[Test 1] /api/trips?start&end:")
+        where, params = trips_where({'start': day.isoformat(), 'end': week_end.isoformat()})
+        results.append(check_plan(
+            cursor, 'page', f'SELECT id FROM nyc_taxi_trips {where} ORDER BY pickup_date DESC LIMIT 20',
+            params, 'nyc_taxi_trips', ('idx_pickup_date', 'idx_date_vendor')
+        ))
+        results.append(check_plan(
+            cursor, 'count', f'SELECT COUNT(*) FROM nyc_taxi_trips {where}',
+            params, 'nyc_taxi_trips', ('idx_pickup_date', 'idx_date_vendor')
+        ))
+
+        # Test 2: date range + vendor
+        print("\n[Test 2] /api/trips?start&end&vendorId:")
+        cursor.execute("SELECT vendor_id FROM vendors LIMIT 1")
+        vendor = cursor.fetchone()
+        where, params = trips_where({
+            'start': day.isoformat(),
+            'end': day.isoformat(),
+            'vendorId': vendor['vendor_id'] if vendor else '1'
+        })
+        results.append(check_plan(
+            cursor, 'count', f'SELECT COUNT(*) FROM nyc_taxi_trips {where}',
+            params, 'nyc_taxi_trips', ('idx_date_vendor', 'idx_pickup_date', 'idx_vendor')
+        ))
+
+        # Test 3: /api/summary range on the rollup
+        print("\n[Test 3] /api/summary?start&end:")
+        results.append(check_plan(
+            cursor, 'summary', SUMMARY_SQL,
+            (day, date.fromordinal(week_end.toordinal() + 1)), 'trip_rollup', ('PRIMARY',)
+        ))
+
+        # Test 4: the same date-bounded queries only read their month partitions
+        print("\n[Test 4] Partition pruning:")
+        expected = month_partitions(day, week_end)
+        where, params = trips_where({'start': day.isoformat(), 'end': week_end.isoformat()})
+        results.append(check_pruning(
+            cursor, '/api/trips page', f'SELECT id FROM nyc_taxi_trips {where} ORDER BY pickup_date DESC LIMIT 20',
+            params, 'nyc_taxi_trips', expected
+        ))
+        results.append(check_pruning(
+            cursor, '/api/trips count', f'SELECT COUNT(*) FROM nyc_taxi_trips {where}',
+            params, 'nyc_taxi_trips', expected
+        ))
+        results.append(check_pruning(
+            cursor, '/api/summary', SUMMARY_SQL,
+            (day, date.fromordinal(week_end.toordinal() + 1)), 'trip_rollup', expected
+        ))
+
+        # Reference: the old non-sargable form, for comparison only
+        print("\n[Reference] DATE(pickup_date) BETWEEN ... (not checked):")
+        step = explain(
+            cursor, 'SELECT COUNT(*) FROM nyc_taxi_trips WHERE DATE(pickup_date) BETWEEN %s AND %s',
+            (day, week_end), 'nyc_taxi_trips'
+        )
+        if step:
+            print(f"  type={step['type']} key={step['key']} rows={step['rows']} partitions={step.get('partitions')}")
+
+        cursor.close()
+        conn.close()
+
+        if all(results):
+            print("\nALL QUERY PLANS USE INDEX RANGES AND PRUNE PARTITIONS")
+            return True
+        print(f"\n{results.count(False)} QUERY PLAN CHECK(S) FAILED")
+        return False
+
+    except pymysql.MySQLError as e:
+        print(f"\nDatabase Error: {e}")
+        return False
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
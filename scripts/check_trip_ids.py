@@ -0,0 +1,154 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+# The loader's own functions are used, pointed at a scratch database
+import load_data
+from load_data import DB_CONFIG, load_parallel, load_serial
+
+SCRATCH_DATABASE = DB_CONFIG['database'] + '_id_check'
+ROWS_PER_FILE = 500
+PARALLEL_WORKERS = 3
+
+# Staged loads call update_vendor_counts() after the merge (database/schema.sql)
+VENDOR_COUNTS_PROCEDURE = '''
+    CREATE PROCEDURE update_vendor_counts()
+    BEGIN
+        UPDATE vendors v
+        SET total_trips = (
+            SELECT COUNT(*)
+            FROM nyc_taxi_trips t
+            WHERE t.vendor_id = v.vendor_id
+        );
+    END
+'''
+
+
+def write_month(path, month, seed, with_ids):
+    """Write a cleaned-format CSV of ROWS_PER_FILE synthetic trips in one month"""
+    rng = np.random.default_rng(seed)
+    pickups = pd.Timestamp(f'{month}-01') + pd.to_timedelta(rng.integers(0, 27 * 86400, ROWS_PER_FILE), unit='s')
+    durations = rng.integers(120, 3600, ROWS_PER_FILE)
+    df = pd.DataFrame({
+        'vendor_id': rng.integers(1, 3, ROWS_PER_FILE),
+        'pickup_datetime': pickups.strftime('%Y-%m-%d %H:%M:%S'),
+        'dropoff_datetime': (pickups + pd.to_timedelta(durations, unit='s')).strftime('%Y-%m-%d %H:%M:%S'),
+        'passenger_count': rng.integers(1, 5, ROWS_PER_FILE),
+        'pickup_longitude': rng.uniform(-74.02, -73.93, ROWS_PER_FILE).round(6),
+        'pickup_latitude': rng.uniform(40.70, 40.80, ROWS_PER_FILE).round(6),
+        'rate_code_id': 1,
+        'store_and_fwd_flag': 'N',
+        'trip_duration': durations,
+        'trip_distance_miles': rng.uniform(0.5, 10, ROWS_PER_FILE).round(3)
+    })
+    if with_ids:
+        df.insert(0, 'id', [f"id{seed}{i:07d}" for i in range(ROWS_PER_FILE)])
+    df.to_csv(path, index=False)
+
+
+def month_ids(cursor, month):
+    cursor.execute('''
+        SELECT id FROM nyc_taxi_trips
+        WHERE pickup_date >= %s AND pickup_date < %s + INTERVAL 1 MONTH
+        ORDER BY id
+    ''', (f'{month}-01', f'{month}-01'))
+    return [row['id'] for row in cursor.fetchall()]
+
+
+def trip_ids(cursor):
+    cursor.execute('SELECT source_id, id FROM nyc_taxi_trips ORDER BY id')
+    return [(row['source_id'], row['id']) for row in cursor.fetchall()]
+
+
+def check_trip_ids():
+    """Load two monthly files as separate runs and reload them, then compare a
+    parallel load of both with a serial one; check the ids each time"""
+    conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor, autocommit=True)
+    cursor = conn.cursor()
+    results = []
+
+    print("TRIP ID CHECK - TWO MONTHLY FILES")
+    try:
+        # Same table definitions (AUTO_INCREMENT id, unique source key,
+        # partitions, staging key) without the triggers that would touch vendors
+        cursor.execute(f'DROP DATABASE IF EXISTS {SCRATCH_DATABASE}')
+        cursor.execute(f'CREATE DATABASE {SCRATCH_DATABASE}')
+        for table in ('nyc_taxi_trips', 'nyc_taxi_trips_staging', 'vendors'):
+            cursor.execute(f'CREATE TABLE {SCRATCH_DATABASE}.{table} LIKE {DB_CONFIG["database"]}.{table}')
+        cursor.execute(f'INSERT INTO {SCRATCH_DATABASE}.vendors SELECT * FROM {DB_CONFIG["database"]}.vendors')
+        # Forked workers inherit the module setting, spawned ones read the environment
+        load_data.DB_CONFIG = dict(DB_CONFIG, database=SCRATCH_DATABASE)
+        os.environ['DB_NAME'] = SCRATCH_DATABASE
+        cursor.execute(f'USE {SCRATCH_DATABASE}')
+        cursor.execute(VENDOR_COUNTS_PROCEDURE)
+
+        with tempfile.TemporaryDirectory(prefix='nyc_taxi_ids_') as tmp_dir:
+            january = os.path.join(tmp_dir, '2016-01.csv')
+            february = os.path.join(tmp_dir, '2016-02.csv')
+            # One file without ids (hashed source ids), one with source ids
+            write_month(january, '2016-01', seed=1, with_ids=False)
+            write_month(february, '2016-02', seed=2, with_ids=True)
+
+            load_serial([january])
+            january_ids = month_ids(cursor, '2016-01')
+            load_serial([february])
+            february_ids = month_ids(cursor, '2016-02')
+
+            print("\n[Test 1] Second file gets new ids:")
+            overlap = set(january_ids) & set(february_ids)
+            ok = not overlap and len(january_ids) == len(february_ids) == ROWS_PER_FILE
+            print(f"  [{'OK' if ok else 'FAIL'}] {len(january_ids)} + {len(february_ids)} trips, "
+                  f"{len(overlap)} shared ids")
+            results.append(ok)
+
+            # Reloading a file upserts the same trips under their existing ids
+            load_serial([january])
+            load_serial([february])
+
+            print("\n[Test 2] Reloading both files keeps every trip and id:")
+            cursor.execute('SELECT COUNT(*) as trips, COUNT(DISTINCT id) as ids FROM nyc_taxi_trips')
+            counts = cursor.fetchone()
+            ok = (
+                counts['trips'] == counts['ids'] == 2 * ROWS_PER_FILE
+                and month_ids(cursor, '2016-01') == january_ids
+                and month_ids(cursor, '2016-02') == february_ids
+            )
+            print(f"  [{'OK' if ok else 'FAIL'}] {counts['trips']} trips, {counts['ids']} distinct ids")
+            results.append(ok)
+
+            # TRUNCATE also resets AUTO_INCREMENT, so every load starts at id 1
+            for mode in ('batch', 'bulk'):
+                print(f"\n[Test {3 if mode == 'batch' else 4}] Parallel {mode} load assigns the serial ids:")
+                cursor.execute('TRUNCATE TABLE nyc_taxi_trips')
+                load_serial([january, february], mode=mode)
+                serial = trip_ids(cursor)
+                cursor.execute('TRUNCATE TABLE nyc_taxi_trips')
+                load_parallel([january, february], PARALLEL_WORKERS, mode=mode)
+                parallel = trip_ids(cursor)
+
+                differing = sum(1 for a, b in zip(serial, parallel) if a != b) + abs(len(serial) - len(parallel))
+                ok = len(serial) == 2 * ROWS_PER_FILE and differing == 0
+                print(f"  [{'OK' if ok else 'FAIL'}] {len(serial)} serial / {len(parallel)} parallel trips, "
+                      f"{differing} with a different id ({PARALLEL_WORKERS} workers)")
+                results.append(ok)
+    except pymysql.MySQLError as e:
+        print(f"\nDatabase Error: {e}")
+        results.append(False)
+    finally:
+        cursor.execute(f'DROP DATABASE IF EXISTS {SCRATCH_DATABASE}')
+        cursor.close()
+        conn.close()
+
+    if all(results):
+        print("\nTRIP IDS ARE UNIQUE ACROSS FILES, STABLE ACROSS RELOADS AND THE SAME IN PARALLEL LOADS")
+        return True
+    print(f"\n{results.count(False)} TRIP ID CHECK(S) FAILED")
+    return False
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_trip_ids() else 1)
@@ -0,0 +1,586 @@
+import argparse
+import hashlib
+import os
+import re
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The routes are replayed through the API itself, so the advisor sees
+# exactly the SQL backend/app.py generates for each filter combination
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import app as api
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', 3306)),
+    'database': os.getenv('DB_NAME', 'nyc_taxi_db'),
+    'user': os.getenv('DB_USER', 'frank'),
+    'password': os.getenv('DB_PASSWORD', '')
+}
+
+TABLE = 'nyc_taxi_trips'
+SCRATCH_TABLE = 'nyc_taxi_trips_advisor'
+TABLE_PATTERN = re.compile(rf'\b{TABLE}\b')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'migrations')
+
+# Query shapes run outside the API that must keep an access path, with the
+# names of their arguments (see maintenance_queries). scripts/load_data.py
+# rebuilds the sketches, calls refresh_trip_rollup per day range and
+# update_vendor_counts after bulk loads; the SELECTs are those of the
+# procedures in database/schema.sql. refresh_statistics_slice only reads
+# trip_rollup, so it needs no nyc_taxi_trips index.
+MAINTENANCE_QUERIES = [
+    ('loader: day sketches', f'''
+        SELECT DATE(pickup_date), HOUR(pickup_date), vendor_id, trip_duration, average_speed_mph
+        FROM {TABLE}
+        WHERE pickup_date >= %s AND pickup_date < %s + INTERVAL 1 DAY AND vendor_id IS NOT NULL
+    ''', ('first_day', 'first_day')),
+    ('procedure: refresh_trip_rollup', f'''
+        SELECT DATE(pickup_date), HOUR(pickup_date), WEEKDAY(pickup_date),
+            vendor_id, passenger_count, COALESCE(distance_category, ''),
+            COUNT(*), SUM(trip_duration), SUM(trip_distance_miles),
+            MIN(trip_distance_miles), MAX(trip_distance_miles),
+            COUNT(average_speed_mph), COALESCE(SUM(average_speed_mph), 0),
+            SUM(trip_distance_miles > 0),
+            COUNT(CASE WHEN trip_distance_miles > 0 THEN average_speed_mph END),
+            COALESCE(SUM(CASE WHEN trip_distance_miles > 0 THEN average_speed_mph END), 0),
+            COALESCE(SUM(CASE WHEN trip_distance_miles > 0 THEN trip_duration / trip_distance_miles END), 0)
+        FROM {TABLE}
+        WHERE pickup_date >= %s AND pickup_date < %s + INTERVAL 1 DAY
+        GROUP BY DATE(pickup_date), HOUR(pickup_date), WEEKDAY(pickup_date),
+            vendor_id, passenger_count, COALESCE(distance_category, '')
+    ''', ('first_day', 'first_day')),
+    ('procedure: update_vendor_counts', f'''
+        SELECT COUNT(*) FROM {TABLE} t WHERE t.vendor_id = %s
+    ''', ('vendor_id',)),
+]
+
+# Below this share of distinct values an index rarely beats a scan
+LOW_SELECTIVITY = 0.01
+
+
+class CapturedQuery:
+    __slots__ = ('route', 'sql', 'args')
+
+    def __init__(self, route, sql, args):
+        self.route = route
+        self.sql = sql
+        self.args = tuple(args) if args is not None else ()
+
+    def key(self):
+        return (' '.join(self.sql.split()), repr(self.args))
+
+
+# CAPTURE
+
+@contextmanager
+def recording(queries, route):
+    """Record every SELECT on nyc_taxi_trips executed through pymysql while active"""
+    original = pymysql.cursors.Cursor.execute
+
+    def execute(cursor, query, args=None):
+        if TABLE_PATTERN.search(query) and query.lstrip().upper().startswith('SELECT'):
+            queries.append(CapturedQuery(route, query, args))
+        return original(cursor, query, args)
+
+    pymysql.cursors.Cursor.execute = execute
+    try:
+        yield
+    finally:
+        pymysql.cursors.Cursor.execute = original
+
+
+def build_scenarios(cursor):
+    """API requests covering the routes and the get_trips filter combinations"""
+    cursor.execute('SELECT MIN(pickup_day) as first_day FROM trip_rollup')
+    first_day = cursor.fetchone()['first_day'] or date(2016, 1, 1)
+    week = {'start': first_day.isoformat(), 'end': (first_day + timedelta(days=6)).isoformat()}
+
+    cursor.execute(f'SELECT vendor_id FROM {TABLE} LIMIT 1')
+    row = cursor.fetchone()
+    vendor = {'vendorId': row['vendor_id'] if row else '1'}
+    day = {'start': first_day.isoformat(), 'end': first_day.isoformat()}
+
+    cursor.execute(f'SELECT MIN(id) as trip_id FROM {TABLE}')
+    trip_id = cursor.fetchone()['trip_id'] or 1
+
+    trips = [
+        {},
+        week,
+        dict(week, **vendor),
+        vendor,
+        {'passengerCount': 2},
+        {'minSpeed': 40},
+        {'minSpeed': 5, 'maxSpeed': 15},
+        {'minDistance': 10},
+        {'minDistance': 1, 'maxDistance': 3},
+        {'bbox': '-74.0,40.70,-73.97,40.75'},
+        dict(week, minSpeed=30),
+        {'sortBy': 'average_speed_mph'},
+        {'sortBy': 'trip_distance_miles', 'sortOrder': 'asc'},
+        {'sortBy': 'trip_duration'},
+        dict(week, sortBy='trip_duration'),
+        dict(vendor, sortBy='average_speed_mph'),
+        dict(week, count='estimate', minDistance=5),
+    ]
+
+    scenarios = [('/api/trips', args) for args in trips]
+    scenarios += [
+        ('/api/trips', {'cursor': '', 'pageSize': 50}),
+        ('/api/trips', dict(week, cursor='', pageSize=50)),
+        ('/api/insights/near', {'lat': 40.758, 'lon': -73.9855, 'radius': 500}),
+        ('/api/insights/near', {'lat': 40.758, 'lon': -73.9855, 'radius': 2000}),
+        (f'/api/trips/{trip_id}', {}),
+        # Exports stream every matching row, so keep them to small filters
+        ('/api/trips/export', day),
+        ('/api/trips/export', dict(day, **vendor)),
+        ('/api/trips/export', {'bbox': '-73.99,40.75,-73.98,40.76'}),
+    ]
+    return scenarios
+
+
+def capture_route_queries(scenarios):
+    """Replay the scenarios through the Flask app and return the captured SQL"""
+    queries = []
+    client = api.app.test_client()
+
+    for path, args in scenarios:
+        route = path + ('?' + urlencode(args) if args else '')
+        # Caches would hide the SQL of repeated shapes
+        api.response_cache.clear()
+        api.count_cache.clear()
+        with recording(queries, route):
+            response = client.get(route)
+            body = response.get_json(silent=True) or {}
+            # Runs call_on_close: an export releases its connection without
+            # streaming the rest of its rows
+            response.close()
+            # Keyset mode: also replay the second page (seek predicate)
+            if 'cursor' in args and body.get('nextCursor'):
+                next_route = path + '?' + urlencode(dict(args, cursor=body['nextCursor']))
+                with recording(queries, next_route):
+                    client.get(next_route)
+        if response.status_code != 200:
+            print(f"  [WARN] {route} returned {response.status_code}")
+
+    unique = {}
+    for query in queries:
+        unique.setdefault(query.key(), query)
+    return list(unique.values())
+
+
+def maintenance_queries(cursor):
+    cursor.execute('SELECT MIN(pickup_day) as first_day FROM trip_rollup')
+    values = {'first_day': cursor.fetchone()['first_day'] or date(2016, 1, 1)}
+    cursor.execute(f'SELECT vendor_id FROM {TABLE} LIMIT 1')
+    row = cursor.fetchone()
+    values['vendor_id'] = row['vendor_id'] if row else '1'
+    return [
+        CapturedQuery(route, sql, [values[name] for name in arg_names])
+        for route, sql, arg_names in MAINTENANCE_QUERIES
+    ]
+
+
+# QUERY SHAPES
+
+class QueryShape:
+    """Columns a query filters by equality / range, orders by, and whether it only counts"""
+
+    def __init__(self, eq, ranges, order, count):
+        self.eq = eq
+        self.ranges = ranges
+        self.order = order
+        self.count = count
+
+
+def _clause(sql, start, stops):
+    match = re.search(start, sql, re.IGNORECASE)
+    if not match:
+        return ''
+    rest = sql[match.end():]
+    end = len(rest)
+    for stop in stops:
+        found = re.search(stop, rest, re.IGNORECASE)
+        if found:
+            end = min(end, found.start())
+    return rest[:end]
+
+
+def query_shape(sql, columns):
+    where = _clause(sql, r'\bWHERE\b', [r'\bGROUP BY\b', r'\bHAVING\b', r'\bORDER BY\b', r'\bLIMIT\b'])
+    order_by = _clause(sql, r'\bORDER BY\b', [r'\bLIMIT\b'])
+    select = _clause(sql, r'\bSELECT\b', [r'\bFROM\b'])
+
+    eq, ranges = [], []
+    # Keyset seek: (sort_column, id) < (%s, %s)
+    for column in re.findall(r'\((\w+),\s*id\)\s*[<>]', where):
+        ranges.append(column)
+    for column, op in re.findall(r'\b(\w+)\s*(>=|<=|<>|!=|=|<|>|\bIN\b|\bBETWEEN\b)', where, re.IGNORECASE):
+        if column not in columns:
+            continue
+        if op == '=' or op.upper() == 'IN':
+            eq.append(column)
+        elif op not in ('<>', '!='):
+            ranges.append(column)
+
+    order = [
+        part.split()[0] for part in order_by.split(',')
+        if part.strip() and part.split()[0] in columns
+    ]
+    count = 'COUNT(' in select.upper()
+
+    unique = lambda values: list(dict.fromkeys(values))
+    eq = unique(eq)
+    return QueryShape(eq, [c for c in unique(ranges) if c not in eq], order, count)
+
+
+# PROPOSALS
+
+class Candidate:
+    """Proposed index columns; exact means the index must end right there
+    (its implicit primary-key suffix provides the id tiebreak of an ORDER BY)"""
+
+    __slots__ = ('columns', 'exact', 'reasons')
+
+    def __init__(self, columns, exact, reason):
+        self.columns = tuple(columns)
+        self.exact = exact
+        self.reasons = [reason]
+
+
+def candidate_for(shape, cardinality, reason):
+    # Equality columns first (most selective first), they never break ordering
+    # id is the clustered primary key: InnoDB appends it to every secondary index
+    eq = sorted((c for c in shape.eq if c != 'id'), key=lambda column: -cardinality.get(column, 0))
+    order = [column for column in shape.order if column != 'id' and column not in eq]
+    ranges = [column for column in shape.ranges if column != 'id']
+
+    if order and not shape.count and (not ranges or ranges[0] == order[0]):
+        # Index delivers the ORDER BY (and the range on the sort column): no filesort
+        return Candidate(eq + order, True, reason)
+
+    if shape.count:
+        # Covering: every filtered column in the index, no row lookups
+        columns = eq + ranges
+    else:
+        columns = eq + ranges[:1]
+    return Candidate(columns, False, reason) if columns else None
+
+
+def merge_candidates(candidates):
+    """Smallest set serving every candidate: non-exact ones are served by any
+    index they are a prefix of; exact ones need an index with the same columns"""
+    merged = {}
+    for candidate in candidates:
+        existing = merged.get(candidate.columns)
+        if existing:
+            existing.exact = existing.exact or candidate.exact
+            existing.reasons.extend(candidate.reasons)
+        else:
+            merged[candidate.columns] = candidate
+
+    kept = []
+    for candidate in sorted(merged.values(), key=lambda c: -len(c.columns)):
+        if not candidate.exact:
+            covering = next((k for k in kept if k.columns[:len(candidate.columns)] == candidate.columns), None)
+            if covering:
+                covering.reasons.extend(candidate.reasons)
+                continue
+        kept.append(candidate)
+    return kept
+
+
+def index_name(columns):
+    name = 'idx_' + '_'.join(columns)
+    if len(name) > 64:
+        name = name[:55] + '_' + hashlib.sha1(name.encode()).hexdigest()[:8]
+    return name
+
+
+def serving_index(existing, candidate):
+    """Name of an existing index that already serves the candidate, if any"""
+    for name, columns in existing.items():
+        if columns == candidate.columns:
+            return name
+    if candidate.exact:
+        return None
+    # A filter-only candidate is also served by an index it prefixes
+    for name, columns in existing.items():
+        if columns[:len(candidate.columns)] == candidate.columns:
+            return name
+    return None
+
+
+def plan_index_changes(existing, proposal, usage):
+    """Return (keep, drop, add): existing names to keep/drop, (name, columns) to add
+
+    Only indexes no replayed query used (usage, from EXPLAIN ANALYZE) are
+    dropped: an index outside the proposal may still serve a query shape
+    the advisor does not replay.
+    """
+    keep, add = [], []
+    for candidate in proposal:
+        name = serving_index(existing, candidate)
+        if name:
+            keep.append(name)
+        else:
+            add.append((index_name(candidate.columns), candidate.columns))
+    drop = [name for name in existing if name not in keep and not usage.get(name)]
+    return keep, drop, add
+
+
+# DATABASE INTROSPECTION
+
+def table_columns(cursor):
+    cursor.execute('''
+        SELECT COLUMN_NAME as name FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (TABLE,))
+    return {row['name'] for row in cursor.fetchall()}
+
+
+def table_indexes(cursor, table=TABLE):
+    """{index name: (columns...)} of non-unique secondary indexes, plus {column: cardinality}
+
+    Unique keys (uk_source_trip: the loader's upsert key) are constraints,
+    not access paths the advisor may drop.
+    """
+    cursor.execute('''
+        SELECT INDEX_NAME as index_name, COLUMN_NAME as column_name, CARDINALITY as cardinality,
+            NON_UNIQUE as non_unique
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    ''', (table,))
+    indexes, cardinality = {}, {}
+    for row in cursor.fetchall():
+        if row['non_unique']:
+            indexes.setdefault(row['index_name'], []).append(row['column_name'])
+        # Leading-column cardinality is the column's distinct count estimate
+        if row['cardinality'] is not None:
+            cardinality[row['column_name']] = max(cardinality.get(row['column_name'], 0), row['cardinality'])
+    return {name: tuple(columns) for name, columns in indexes.items()}, cardinality
+
+
+def foreign_key_columns(cursor):
+    cursor.execute('''
+        SELECT COLUMN_NAME as column_name FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+    ''', (TABLE,))
+    return [row['column_name'] for row in cursor.fetchall()]
+
+
+def table_rows(cursor):
+    cursor.execute('''
+        SELECT TABLE_ROWS as table_rows FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (TABLE,))
+    row = cursor.fetchone()
+    return int(row['table_rows'] or 0) if row else 0
+
+
+# EXPLAIN ANALYZE
+
+def explain_analyze(cursor, query, table=TABLE):
+    """Return (indexes used, covering, actual ms) from EXPLAIN ANALYZE's tree"""
+    sql = query.sql if table == TABLE else TABLE_PATTERN.sub(table, query.sql)
+    cursor.execute('EXPLAIN ANALYZE ' + sql, query.args)
+    plan = '\n'.join(row['EXPLAIN'] for row in cursor.fetchall())
+
+    used = sorted(set(re.findall(rf'on {table} using (\w+)', plan)))
+    covering = 'Covering index' in plan
+    if re.search(rf'Table scan on {table}', plan):
+        used.append('(table scan)')
+    timing = re.search(r'actual time=[\d.]+\.\.([\d.]+)', plan)
+    return used, covering, float(timing.group(1)) if timing else None
+
+
+def time_query(cursor, query, table, repeats):
+    sql = TABLE_PATTERN.sub(table, query.sql)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cursor.execute(sql, query.args)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+# MEASUREMENT (scratch copy of a sample)
+
+def load_sample(conn, cursor, sample_rows):
+    """(Re)fill the scratch table from nyc_taxi_trips; returns rows per second"""
+    cursor.execute(f'TRUNCATE TABLE {SCRATCH_TABLE}')
+    started = time.perf_counter()
+    cursor.execute(f'INSERT INTO {SCRATCH_TABLE} SELECT * FROM {TABLE} LIMIT %s', (sample_rows,))
+    loaded = cursor.rowcount
+    conn.commit()
+    seconds = time.perf_counter() - started
+    cursor.execute(f'ANALYZE TABLE {SCRATCH_TABLE}')
+    cursor.fetchall()
+    return loaded / seconds if seconds > 0 else 0.0
+
+
+def apply_to_scratch(cursor, drop, add):
+    clauses = [f'DROP INDEX {name}' for name in drop]
+    clauses += [f'ADD INDEX {name} ({", ".join(columns)})' for name, columns in add]
+    if clauses:
+        cursor.execute(f'ALTER TABLE {SCRATCH_TABLE} ' + ', '.join(clauses))
+
+
+def measure(conn, cursor, queries, drop, add, sample_rows, repeats):
+    """Load throughput and query latency with the current vs proposed indexes"""
+    cursor.execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
+    # LIKE copies columns and indexes (not triggers / foreign keys)
+    cursor.execute(f'CREATE TABLE {SCRATCH_TABLE} LIKE {TABLE}')
+    try:
+        before_load = load_sample(conn, cursor, sample_rows)
+        before = {query.key(): time_query(cursor, query, SCRATCH_TABLE, repeats) for query in queries}
+
+        apply_to_scratch(cursor, drop, add)
+        after_load = load_sample(conn, cursor, sample_rows)
+        after = {query.key(): time_query(cursor, query, SCRATCH_TABLE, repeats) for query in queries}
+    finally:
+        cursor.execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
+    return before_load, after_load, before, after
+
+
+# MIGRATION
+
+def next_migration_path():
+    numbers = [
+        int(name[:3]) for name in os.listdir(MIGRATIONS_DIR)
+        if name[:3].isdigit() and name.endswith('.sql')
+    ]
+    return os.path.join(MIGRATIONS_DIR, f'{max(numbers, default=0) + 1:03d}_trip_indexes.sql')
+
+
+def write_migration(path, drop, add, existing, query_count, rows):
+    number = os.path.basename(path)[:3]
+    lines = [
+        f'-- Migration {number}: nyc_taxi_trips indexes proposed by scripts/index_advisor.py',
+        f'-- Generated {date.today().isoformat()} from {query_count} replayed API/loader queries',
+        f'-- against ~{rows:,} rows. Drops indexes no replayed query used and adds the',
+        '-- composite / covering indexes the route filters and sort orders use.',
+        '-- Mirror the change in database/schema.sql.',
+        ''
+    ]
+    clauses = [f'    DROP INDEX {name}' for name in drop]
+    clauses += [f'    ADD INDEX {name} ({", ".join(columns)})' for name, columns in add]
+    if clauses:
+        lines.append(f'ALTER TABLE {TABLE}')
+        lines.append(',\n'.join(clauses) + ';')
+        lines.append('')
+    lines.append(f'ANALYZE TABLE {TABLE};')
+    lines.append('')
+    lines.append('-- Previous secondary indexes:')
+    for name, columns in sorted(existing.items()):
+        lines.append(f'--   {name} ({", ".join(columns)})')
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+# REPORT
+
+def short_sql(sql, width=70):
+    flat = ' '.join(sql.split())
+    return flat if len(flat) <= width else flat[:width - 3] + '...'
+
+
+def advise(sample_rows, repeats, migration_path, skip_measure):
+    conn = pymysql.connect(**DB_CONFIG, cursorclass=pymysql.cursors.DictCursor, autocommit=False)
+    cursor = conn.cursor()
+
+    print("INDEX ADVISOR - NYC_TAXI_TRIPS")
+
+    columns = table_columns(cursor)
+    existing, cardinality = table_indexes(cursor)
+    rows = table_rows(cursor)
+
+    print("\n[1] Replaying API routes...")
+    queries = capture_route_queries(build_scenarios(cursor)) + maintenance_queries(cursor)
+    print(f"  {len(queries)} distinct queries on {TABLE}")
+
+    print("\n[2] EXPLAIN ANALYZE (current indexes):")
+    usage = {name: 0 for name in existing}
+    for query in queries:
+        used, covering, actual_ms = explain_analyze(cursor, query)
+        for name in used:
+            if name in usage:
+                usage[name] += 1
+        timing = f"{actual_ms:9.2f} ms" if actual_ms is not None else '        ?   '
+        print(f"  {timing}  {', '.join(used) or '-':<32} {'covering' if covering else '':<8} {query.route}")
+        print(f"               {short_sql(query.sql)}")
+
+    print("\n[3] Current secondary indexes:")
+    for name, index_columns in sorted(existing.items()):
+        distinct = cardinality.get(index_columns[0], 0)
+        selectivity = distinct / rows if rows else 0
+        flag = ' LOW SELECTIVITY' if rows and selectivity < LOW_SELECTIVITY else ''
+        print(f"  {name:<28} ({', '.join(index_columns)}) used by {usage[name]} queries{flag}")
+
+    candidates = []
+    for query in queries:
+        candidate = candidate_for(query_shape(query.sql, columns), cardinality, query.route)
+        if candidate:
+            candidates.append(candidate)
+    # A foreign key needs an index whose leftmost column is the FK column
+    for column in foreign_key_columns(cursor):
+        candidates.append(Candidate([column], False, f'foreign key on {column}'))
+    proposal = merge_candidates(candidates)
+    keep, drop, add = plan_index_changes(existing, proposal, usage)
+
+    print(f"\n[4] Proposed index set ({len(proposal)} indexes, was {len(existing)}):")
+    for candidate in proposal:
+        name = serving_index(existing, candidate) or index_name(candidate.columns)
+        kind = 'order' if candidate.exact else 'filter'
+        print(f"  {name:<40} ({', '.join(candidate.columns)}) [{kind}] serves {len(candidate.reasons)} queries")
+    print(f"  drop: {', '.join(drop) or '-'}")
+    still_used = [name for name in existing if name not in keep and name not in drop]
+    if still_used:
+        print(f"  kept (used, not proposed): {', '.join(still_used)}")
+    print(f"  add:  {', '.join(name for name, _ in add) or '-'}")
+
+    if not skip_measure:
+        print(f"\n[5] Measuring on a {sample_rows:,}-row scratch copy ({repeats} runs per query)...")
+        before_load, after_load, before, after = measure(conn, cursor, queries, drop, add, sample_rows, repeats)
+        print(f"  load throughput: {before_load:,.0f} -> {after_load:,.0f} rows/s "
+              f"({after_load / before_load:.2f}x)" if before_load else "  load throughput: n/a")
+        for query in queries:
+            was, now = before[query.key()], after[query.key()]
+            print(f"  {was:9.2f} -> {now:9.2f} ms ({was / max(now, 1e-6):5.2f}x)  {query.route}")
+        total_before, total_after = sum(before.values()), sum(after.values())
+        print(f"  total: {total_before:.1f} -> {total_after:.1f} ms")
+
+    write_migration(migration_path, drop, add, existing, len(queries), rows)
+    print(f"\nMigration written to {os.path.relpath(migration_path)}")
+
+    cursor.close()
+    conn.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Propose nyc_taxi_trips indexes from the API query shapes')
+    parser.add_argument('--sample-rows', type=int, default=200000,
+                        help='Rows copied to the scratch table for the before/after measurement')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per query')
+    parser.add_argument('--migration', default=None,
+                        help='Migration file to write (default: next number in database/migrations)')
+    parser.add_argument('--skip-measure', action='store_true',
+                        help='Only report and write the migration')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    advise(args.sample_rows, args.repeats, args.migration or next_migration_path(), args.skip_measure)
@@ -1,13 +1,29 @@
 # NYC Taxi Data Load Script
 
+import argparse
+import hashlib
+import io
+import multiprocessing
 import os
 import sys
-from datetime import datetime
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import groupby
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import pymysql
 from dotenv import load_dotenv
 
+# Quantile sketches are shared with the API (backend/quantile_sketch.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from quantile_sketch import TDigest
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +36,127 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', '')
 }
 
+# Pickup grid (must match backend/geo.py): 0.01 degree cells,
+# cell = FLOOR((lat + 90) * 100) * 36000 + FLOOR((lon + 180) * 100)
+GRID_SCALE = 100
+GRID_LON_CELLS = 360 * GRID_SCALE
+
+# INPUT
+
+# Columns prepare_data() uses; a Parquet input is read with only these
+SOURCE_COLUMNS = [
+    'id', 'source_id', 'vendor_id', 'pickup_datetime', 'dropoff_datetime', 'passenger_count',
+    'pickup_longitude', 'pickup_latitude', 'rate_code_id', 'store_and_fwd_flag',
+    'trip_duration', 'trip_distance_miles'
+]
+
+# Hive-style partition key written by data/raw/processed/cleandata.py --format parquet
+PARTITION_COLUMN = 'pickup_month'
+
+def is_parquet_input(path):
+    """A single .parquet file or a directory holding a Parquet dataset"""
+    if os.path.isdir(path):
+        return any(
+            name.endswith('.parquet')
+            for _, _, names in os.walk(path)
+            for name in names
+        )
+    return path.endswith('.parquet')
+
+def discover_sources(path, months=None, start=None, end=None):
+    """List the source files behind --input, in load order
+    
+    - a file is its own single source
+    - a Parquet dataset directory yields its part files (partitions outside
+      --months/--start/--end are left out)
+    - any other directory yields its CSV files, e.g. one file per month
+    """
+    if not os.path.isdir(path):
+        return [path]
+    
+    if is_parquet_input(path):
+        dataset = open_parquet_dataset(path)
+        predicate = parquet_predicate(months, start, end)
+        return [fragment.path for fragment in dataset.get_fragments(filter=predicate)]
+    
+    return sorted(
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(path)
+        for name in names
+        if name.endswith('.csv')
+    )
+
+def open_parquet_dataset(path):
+    """Open a cleaned Parquet dataset with its pickup_month partitioning"""
+    return ds.dataset(
+        path,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+    )
+
+def parquet_predicate(months=None, start=None, end=None, partitioned=True):
+    """Dataset filter expression for the month/date options (None if unfiltered)
+    
+    With partitioned=False (a single part file) only the pickup_datetime
+    range is used; months have to be filtered on the rows.
+    """
+    predicate = None
+    def add(condition):
+        nonlocal predicate
+        predicate = condition if predicate is None else predicate & condition
+    
+    if months and partitioned:
+        add(ds.field(PARTITION_COLUMN).isin(list(months)))
+    # 'YYYY-MM' keys sort like dates, so the range also prunes whole partitions
+    if start is not None:
+        if partitioned:
+            add(ds.field(PARTITION_COLUMN) >= start.strftime('%Y-%m'))
+        add(ds.field('pickup_datetime') >= pa.scalar(start, type=pa.timestamp('us')))
+    if end is not None:
+        if partitioned:
+            add(ds.field(PARTITION_COLUMN) <= end.strftime('%Y-%m'))
+        add(ds.field('pickup_datetime') < pa.scalar(end, type=pa.timestamp('us')))
+    return predicate
+
+def read_parquet_input(path, months=None, start=None, end=None):
+    """Read a cleaned Parquet dataset, touching only what is needed
+    
+    - months: pickup_month partitions to read (others are never opened)
+    - start/end: pickup_datetime range [start, end), pushed down to the
+      row-group statistics so non-matching row groups are skipped
+    - only SOURCE_COLUMNS are decoded
+    """
+    partitioned = os.path.isdir(path)
+    dataset = open_parquet_dataset(path)
+    columns = [name for name in SOURCE_COLUMNS if name in dataset.schema.names]
+    predicate = parquet_predicate(months, start, end, partitioned)
+    df = dataset.to_table(columns=columns, filter=predicate).to_pandas()
+    return df if partitioned else filter_rows(df, months)
+
+def filter_rows(df, months=None, start=None, end=None):
+    """Apply the month/date options to an already parsed DataFrame"""
+    if not months and start is None and end is None:
+        return df
+    pickups = pd.to_datetime(df['pickup_datetime'], errors='coerce')
+    mask = pd.Series(True, index=df.index)
+    if months:
+        mask &= pickups.dt.strftime('%Y-%m').isin(list(months))
+    if start is not None:
+        mask &= pickups >= start
+    if end is not None:
+        mask &= pickups < end
+    return df[mask]
+
+def read_input(path, months=None, start=None, end=None):
+    """Load the cleaned data from a CSV file or a Parquet dataset
+    
+    The same month/date filters apply to both formats; for CSV they run
+    after parsing, for Parquet they are pushed down into the scan.
+    """
+    if is_parquet_input(path):
+        return read_parquet_input(path, months, start, end)
+    return filter_rows(pd.read_csv(path), months, start, end)
+
 # FEATURE ENGINEERING FUNCTIONS
 
 def get_time_period(hour):
@@ -59,6 +196,20 @@ def get_duration_category(duration):
     else:
         return 'Extended'
 
+def compute_grid_cells(latitudes, longitudes):
+    """Vectorized pickup grid cell ids for arrays of coordinates
+    
+    Coordinates are rounded to the 7 decimals stored in DECIMAL(10, 7) and the
+    cell is computed with integer arithmetic, so it matches the SQL backfill
+    FLOOR((pickup_latitude + 90) * 100) exactly, even on cell boundaries.
+    """
+    lat_e7 = np.rint(np.asarray(latitudes, dtype=np.float64) * 1e7).astype(np.int64)
+    lon_e7 = np.rint(np.asarray(longitudes, dtype=np.float64) * 1e7).astype(np.int64)
+    step = 10_000_000 // GRID_SCALE
+    lat_index = (lat_e7 + 90 * 10_000_000) // step
+    lon_index = (lon_e7 + 180 * 10_000_000) // step
+    return lat_index * GRID_LON_CELLS + lon_index
+
 def calculate_speed(distance_miles, duration_seconds):
     """Calculate average speed (mph)"""
     if pd.isna(distance_miles) or pd.isna(duration_seconds) or duration_seconds == 0:
@@ -68,15 +219,100 @@ def calculate_speed(distance_miles, duration_seconds):
     return min(speed, 120.0)
 
 
+# VECTORIZED FEATURE ENGINEERING
+# Array versions of the functions above. They must produce exactly the same
+# values (None/NaN where the scalar versions return None); see
+# check_feature_parity(). Categories are returned as pandas Categoricals.
+
+TIME_PERIODS = ['Morning', 'Afternoon', 'Evening', 'Night']
+DISTANCE_CATEGORIES = ['Short', 'Medium', 'Long']
+DURATION_CATEGORIES = ['Quick', 'Average', 'Extended']
+VALID_VENDORS = ['1', '2']
+
+def vectorized_time_period(hours):
+    """Array version of get_time_period()"""
+    h = np.asarray(hours, dtype=np.float64)
+    codes = np.select(
+        [np.isnan(h), (h >= 6) & (h < 12), (h >= 12) & (h < 17), (h >= 17) & (h < 21)],
+        [-1, 0, 1, 2],
+        default=3
+    )
+    return pd.Categorical.from_codes(codes, categories=TIME_PERIODS)
+
+def vectorized_distance_category(distances):
+    """Array version of get_distance_category()"""
+    d = np.asarray(distances, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        codes = np.select(
+            [np.isnan(d) | (d < 0), d < 1, d < 5],
+            [-1, 0, 1],
+            default=2
+        )
+    return pd.Categorical.from_codes(codes, categories=DISTANCE_CATEGORIES)
+
+def vectorized_duration_category(durations):
+    """Array version of get_duration_category()"""
+    d = np.asarray(durations, dtype=np.float64)
+    minutes = d / 60
+    with np.errstate(invalid='ignore'):
+        codes = np.select(
+            [np.isnan(d) | (d <= 0), minutes < 10, minutes < 30],
+            [-1, 0, 1],
+            default=2
+        )
+    return pd.Categorical.from_codes(codes, categories=DURATION_CATEGORIES)
+
+def vectorized_speed(distances_miles, durations_seconds):
+    """Array version of calculate_speed()"""
+    dist = np.asarray(distances_miles, dtype=np.float64)
+    dur = np.asarray(durations_seconds, dtype=np.float64)
+    invalid = np.isnan(dist) | np.isnan(dur) | (dur == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.minimum(dist / (dur / 3600), 120.0)
+    return np.where(invalid, 0.0, speed)
+
+def _same_values(expected, actual):
+    """Element-wise equality where None and NaN count as the same missing value"""
+    expected = pd.Series(expected, dtype=object).reset_index(drop=True)
+    actual = pd.Series(actual, dtype=object).reset_index(drop=True)
+    both_missing = expected.isna() & actual.isna()
+    return bool((both_missing | (expected == actual)).all())
+
+def check_feature_parity(df, sample_size=10000):
+    """Compare vectorized features against the scalar functions on a sample"""
+    sample = df.head(sample_size)
+    checks = {
+        'time_period': _same_values(
+            sample['pickup_hour'].apply(get_time_period),
+            sample['time_period']),
+        'average_speed_mph': _same_values(
+            [calculate_speed(d, t) for d, t in zip(sample['trip_distance_miles'], sample['trip_duration'])],
+            sample['average_speed_mph']),
+        'distance_category': _same_values(
+            sample['trip_distance_miles'].apply(get_distance_category),
+            sample['distance_category']),
+        'duration_category': _same_values(
+            sample['trip_duration'].apply(get_duration_category),
+            sample['duration_category'])
+    }
+    for name, ok in checks.items():
+        print(f" Parity {name}: {'OK' if ok else 'MISMATCH'}")
+    return all(checks.values())
+
+@contextmanager
+def stage_timer(timings, stage):
+    """Record the wall time of a preparation stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - started
+
 # DATA PREPARATION
 
 
-def prepare_data(df):
-    """Prepare dataframe with derived features"""
-    print("\n Preparing derived features...")
-    
-    initial_count = len(df)
-    
+def parse_trip_dates(df, log=print):
+    """Add pickup_date/dropoff_datetime and drop rows where either is invalid"""
     # Schema expects: pickup_date (DATETIME) 
     # Handle different possible column names
     if 'tpep_dropoff_datetime' in df.columns:
@@ -100,77 +336,135 @@ def prepare_data(df):
     before_drop = len(df)
     df = df.dropna(subset=['pickup_date', 'dropoff_datetime'])
     if len(df) < before_drop:
-        print(f"Dropped {before_drop - len(df)} rows with invalid dates")
+        log(f"Dropped {before_drop - len(df)} rows with invalid dates")
+    return df
+
+# Columns identifying a trip when the input has no id of its own (the same
+# ones data/raw/processed/cleandata.py drops duplicate trips by)
+TRIP_KEY_COLUMNS = ['pickup_date', 'dropoff_datetime', 'pickup_longitude', 'pickup_latitude']
+
+def assign_source_ids(df):
+    """Set source_id, the stable identity of a trip, and drop any input id
     
-    # Temporal features
-    df['pickup_hour'] = df['pickup_date'].dt.hour
-    df['pickup_day_of_week'] = df['pickup_date'].dt.dayofweek
-    df['is_weekend'] = df['pickup_day_of_week'].isin([5, 6]).astype(int)
-    df['time_period'] = df['pickup_hour'].apply(get_time_period)
-    
-    # Handle vendor_id (might be VendorID or vendor_id)
-    if 'VendorID' in df.columns:
-        df['vendor_id'] = df['VendorID'].astype(str)
-    elif 'vendor_id' not in df.columns:
-        df['vendor_id'] = '1'  # Default vendor
+    nyc_taxi_trips.id is allocated by MySQL (AUTO_INCREMENT) when a trip is
+    first inserted, so ids never restart per file or per run. Reloads find
+    the trip again by UNIQUE (source_id, pickup_date) and keep its id.
+    source_id is
+    - the source_id column (cleandata.py output), else
+    - the input's id column (the raw dataset's "id2875421", or "TRIP_%08d"
+      in files cleaned by older versions), else
+    - "h" + a 64-bit hash of TRIP_KEY_COLUMNS for trips without either
+    """
+    if 'source_id' in df.columns:
+        source = df['source_id']
+    elif 'id' in df.columns:
+        source = df['id']
     else:
-        df['vendor_id'] = df['vendor_id'].astype(str)
-    
-    # Ensure vendor_id is valid (only 1 or 2)
-    df['vendor_id'] = df['vendor_id'].apply(lambda x: x if x in ['1', '2'] else '1')
-    
-    # Handle passenger_count
-    if 'passenger_count' not in df.columns:
-        df['passenger_count'] = 1
-    df['passenger_count'] = pd.to_numeric(df['passenger_count'], errors='coerce').fillna(1).astype(int)
-    df['passenger_count'] = df['passenger_count'].clip(1, 6)  # Valid range
-    
-    # Handle store_and_fwd_flag
-    if 'store_and_fwd_flag' not in df.columns:
-        df['store_and_fwd_flag'] = 'N'
-    df['store_and_fwd_flag'] = df['store_and_fwd_flag'].fillna('N').astype(str)
-    
-    # Handle rate_code_id
-    if 'rate_code_id' not in df.columns and 'RatecodeID' in df.columns:
-        df['rate_code_id'] = df['RatecodeID']
-    elif 'rate_code_id' not in df.columns:
-        df['rate_code_id'] = 1
-    df['rate_code_id'] = pd.to_numeric(df['rate_code_id'], errors='coerce').fillna(1).astype(int)
-    
-    # Average speed
-    df['average_speed_mph'] = df.apply(
-        lambda row: calculate_speed(row['trip_distance_miles'], row['trip_duration']),
-        axis=1
-    )
+        source = pd.Series(None, index=df.index, dtype=object)
     
-    # Categories
-    df['distance_category'] = df['trip_distance_miles'].apply(get_distance_category)
-    df['duration_category'] = df['trip_duration'].apply(get_duration_category)
+    missing = source.isna()
+    source = source.astype(str)
+    if missing.any():
+        keys = pd.util.hash_pandas_object(df.loc[missing, TRIP_KEY_COLUMNS], index=False)
+        source[missing] = 'h' + keys.astype(str)
+    df['source_id'] = source
+    return df.drop(columns=['id'], errors='ignore')
+
+def prepare_data(df, verbose=True, timings=None):
+    """Prepare dataframe with derived features
+    
+    Stage timings are added to timings when a dict is passed.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    log("\n Preparing derived features...")
+    
+    initial_count = len(df)
+    timings = {} if timings is None else timings
+    
+    with stage_timer(timings, 'parse_dates'):
+        df = parse_trip_dates(df, log)
     
-    # Generate unique IDs if not present
-    if 'id' not in df.columns:
-        df['id'] = [f"TRIP_{i:08d}" for i in range(len(df))]
+    # Temporal features
+    with stage_timer(timings, 'temporal'):
+        df = df.copy()
+        df['pickup_hour'] = df['pickup_date'].dt.hour
+        df['pickup_day_of_week'] = df['pickup_date'].dt.dayofweek
+        df['is_weekend'] = df['pickup_day_of_week'].isin([5, 6]).astype(int)
+        df['time_period'] = vectorized_time_period(df['pickup_hour'].to_numpy())
+    
+    with stage_timer(timings, 'normalize'):
+        # Handle vendor_id (might be VendorID or vendor_id)
+        if 'VendorID' in df.columns:
+            df['vendor_id'] = df['VendorID'].astype(str)
+        elif 'vendor_id' not in df.columns:
+            df['vendor_id'] = '1'  # Default vendor
+        else:
+            df['vendor_id'] = df['vendor_id'].astype(str)
+        
+        # Ensure vendor_id is valid (only 1 or 2)
+        vendors = df['vendor_id'].to_numpy(dtype=object)
+        df['vendor_id'] = pd.Categorical(
+            np.where(np.isin(vendors, VALID_VENDORS), vendors, '1'),
+            categories=VALID_VENDORS
+        )
+        
+        # Handle passenger_count
+        if 'passenger_count' not in df.columns:
+            df['passenger_count'] = 1
+        df['passenger_count'] = pd.to_numeric(df['passenger_count'], errors='coerce').fillna(1).astype(int)
+        df['passenger_count'] = df['passenger_count'].clip(1, 6)  # Valid range
+        
+        # Handle store_and_fwd_flag
+        if 'store_and_fwd_flag' not in df.columns:
+            df['store_and_fwd_flag'] = 'N'
+        df['store_and_fwd_flag'] = df['store_and_fwd_flag'].fillna('N').astype(str)
+        
+        # Handle rate_code_id
+        if 'rate_code_id' not in df.columns and 'RatecodeID' in df.columns:
+            df['rate_code_id'] = df['RatecodeID']
+        elif 'rate_code_id' not in df.columns:
+            df['rate_code_id'] = 1
+        df['rate_code_id'] = pd.to_numeric(df['rate_code_id'], errors='coerce').fillna(1).astype(int)
+    
+    # Average speed and categories (NumPy arrays, no per-row Python calls)
+    with stage_timer(timings, 'speed_and_categories'):
+        distances = df['trip_distance_miles'].to_numpy(dtype=np.float64)
+        durations = df['trip_duration'].to_numpy(dtype=np.float64)
+        df['average_speed_mph'] = vectorized_speed(distances, durations)
+        df['distance_category'] = vectorized_distance_category(distances)
+        df['duration_category'] = vectorized_duration_category(durations)
+    
+    # Trip identity for the upsert (ids are allocated by the database)
+    with stage_timer(timings, 'ids'):
+        df = assign_source_ids(df)
     
     # Data quality filters
-    before_filter = len(df)
-    df = df[
-        (df['trip_duration'] > 0) &
-        (df['trip_duration'] < 86400) &  # Less than 24 hours
-        (df['trip_distance_miles'] >= 0) &
-        (df['trip_distance_miles'] < 200) &  # Less than 200 miles
-        (df['pickup_longitude'].between(-180, 180)) &
-        (df['pickup_latitude'].between(-90, 90))
-    ]
+    with stage_timer(timings, 'filter'):
+        before_filter = len(df)
+        df = df[
+            (df['trip_duration'] > 0) &
+            (df['trip_duration'] < 86400) &  # Less than 24 hours
+            (df['trip_distance_miles'] >= 0) &
+            (df['trip_distance_miles'] < 200) &  # Less than 200 miles
+            (df['pickup_longitude'].between(-180, 180)) &
+            (df['pickup_latitude'].between(-90, 90))
+        ]
     
     if len(df) < before_filter:
-        print(f" Filtered out {before_filter - len(df)} rows with invalid data")
+        log(f" Filtered out {before_filter - len(df)} rows with invalid data")
     
-    print(f"Prepared {len(df):,} records (from {initial_count:,} original)")
+    # Spatial grid cell for the nearby-trips prefilter
+    with stage_timer(timings, 'grid_cells'):
+        df = df.copy()
+        df['pickup_grid_cell'] = compute_grid_cells(df['pickup_latitude'], df['pickup_longitude'])
+    
+    log(f"Prepared {len(df):,} records (from {initial_count:,} original)")
+    log(" Stage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
     return df
 
 # DATABASE OPERATIONS
 
-def get_db_connection():
+def get_db_connection(local_infile=False):
     """Create database connection using PyMySQL"""
     return pymysql.connect(
         host=DB_CONFIG['host'],
@@ -178,85 +472,897 @@ def get_db_connection():
         user=DB_CONFIG['user'],
         password=DB_CONFIG['password'],
         database=DB_CONFIG['database'],
-        cursorclass=pymysql.cursors.DictCursor
+        cursorclass=pymysql.cursors.DictCursor,
+        local_infile=local_infile
     )
 
+# Column order of the parameter tuples produced by encode_batches()
+# (no id: nyc_taxi_trips.id is AUTO_INCREMENT)
+TRIP_COLUMNS = [
+    'source_id', 'vendor_id', 'pickup_date', 'dropoff_datetime', 'passenger_count',
+    'pickup_longitude', 'pickup_latitude', 'pickup_grid_cell', 'rate_code_id',
+    'store_and_fwd_flag', 'trip_duration', 'trip_distance_miles',
+    'pickup_hour', 'pickup_day_of_week',
+    'is_weekend', 'time_period', 'average_speed_mph',
+    'distance_category', 'duration_category'
+]
+
+# Columns that must be present for a row to be loadable (NOT NULL in the schema)
+REQUIRED_COLUMNS = [
+    'pickup_date', 'dropoff_datetime', 'passenger_count',
+    'pickup_longitude', 'pickup_latitude', 'pickup_grid_cell', 'rate_code_id',
+    'trip_duration', 'trip_distance_miles', 'is_weekend', 'average_speed_mph'
+]
+
+# A reloaded trip (same source_id and pickup_date: uk_source_trip) keeps its
+# id and gets every other column from the new load, so the derived columns
+# (speed, categories, grid cell, ...) always match the current prepare_data()
+UPSERT_KEY_COLUMNS = ['source_id', 'pickup_date']
+UPSERT_UPDATES = ',\n    '.join(
+    f'{column} = VALUES({column})' for column in TRIP_COLUMNS if column not in UPSERT_KEY_COLUMNS
+)
+
+INSERT_QUERY = f"""
+INSERT INTO nyc_taxi_trips (
+    {', '.join(TRIP_COLUMNS)}
+) VALUES ({', '.join(['%s'] * len(TRIP_COLUMNS))})
+ON DUPLICATE KEY UPDATE
+    {UPSERT_UPDATES}
+"""
+
+def _format_datetimes(series):
+    """'YYYY-MM-DD HH:MM:SS' strings for a datetime column, without per-row strftime"""
+    values = series.to_numpy(dtype='datetime64[s]')
+    return np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ').tolist()
+
+def _int_list(series):
+    return series.to_numpy().astype(np.int64).tolist()
+
+def _float_list(series):
+    return series.to_numpy(dtype=np.float64).tolist()
+
+def _nullable_int_list(series):
+    values = series.to_numpy(dtype=np.float64)
+    missing = np.isnan(values)
+    ints = np.where(missing, 0, values).astype(np.int64).tolist()
+    if not missing.any():
+        return ints
+    return [None if m else v for v, m in zip(ints, missing.tolist())]
+
+def _nullable_str_list(series):
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def encode_columns(chunk):
+    """Convert a DataFrame slice into Python value lists in TRIP_COLUMNS order
+    
+    Returns (columns, skipped) where skipped counts rows missing a required value.
+    """
+    valid = chunk[REQUIRED_COLUMNS].notna().all(axis=1).to_numpy()
+    skipped = int((~valid).sum())
+    if skipped:
+        chunk = chunk[valid]
+    
+    columns = [
+        chunk['source_id'].tolist(),
+        chunk['vendor_id'].astype(str).tolist(),
+        _format_datetimes(chunk['pickup_date']),
+        _format_datetimes(chunk['dropoff_datetime']),
+        _int_list(chunk['passenger_count']),
+        _float_list(chunk['pickup_longitude']),
+        _float_list(chunk['pickup_latitude']),
+        _int_list(chunk['pickup_grid_cell']),
+        _int_list(chunk['rate_code_id']),
+        chunk['store_and_fwd_flag'].astype(str).str[:5].tolist(),
+        _int_list(chunk['trip_duration']),
+        _float_list(chunk['trip_distance_miles']),
+        _nullable_int_list(chunk['pickup_hour']),
+        _nullable_int_list(chunk['pickup_day_of_week']),
+        _int_list(chunk['is_weekend']),
+        _nullable_str_list(chunk['time_period']),
+        _float_list(chunk['average_speed_mph']),
+        _nullable_str_list(chunk['distance_category']),
+        _nullable_str_list(chunk['duration_category'])
+    ]
+    return columns, skipped
+
+def encode_batch(chunk):
+    """Convert a DataFrame slice into INSERT parameter tuples, column by column"""
+    columns, skipped = encode_columns(chunk)
+    return list(zip(*columns)), skipped
+
+def encode_batches(df, batch_size):
+    """Yield (rows, skipped) for consecutive batch_size slices of df"""
+    for start in range(0, len(df), batch_size):
+        yield encode_batch(df.iloc[start:start + batch_size])
+
 def load_data_to_db(df, batch_size=5000):
-    """Load data into MySQL database in batches"""
+    """Load data into MySQL database in batches
+    
+    Batches are encoded and sent one at a time, so only one batch of
+    parameter tuples exists in memory at once.
+    """
     print(f"\n Loading {len(df):,} records to database...")
     
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        insert_query = """
-        INSERT INTO nyc_taxi_trips (
-            id, vendor_id, pickup_date, dropoff_datetime, passenger_count,
-            pickup_longitude, pickup_latitude, rate_code_id,
-            store_and_fwd_flag, trip_duration, trip_distance_miles,
-            pickup_hour, pickup_day_of_week,
-            is_weekend, time_period, average_speed_mph,
-            distance_category, duration_category
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            trip_duration = VALUES(trip_duration),
-            trip_distance_miles = VALUES(trip_distance_miles)
-        """
+        total_records = len(df)
+        inserted = 0
+        skipped = 0
+        processed = 0
+        
+        for batch, batch_skipped in encode_batches(df, batch_size):
+            if batch:
+                cursor.executemany(INSERT_QUERY, batch)
+                conn.commit()
+            
+            inserted += len(batch)
+            skipped += batch_skipped
+            processed += len(batch) + batch_skipped
+            percentage = (processed / total_records) * 100
+            print(f" Progress: {processed:,}/{total_records:,} ({percentage:.1f}%)", end='\r')
+        
+        if skipped > 0:
+            print(f"\n Skipped {skipped} rows with missing required values")
+        
+        print(f"\n Successfully inserted {inserted:,} records")
+        
+        cursor.close()
+        conn.close()
+        return inserted
+        
+    except Exception as e:
+        print(f"\n Error loading data: {e}")
+        raise
+
+# BULK LOAD (LOAD DATA LOCAL INFILE)
+
+STAGING_TABLE = 'nyc_taxi_trips_staging'
+
+# Staged rows carry their input position (split number, row in the split).
+# The merge inserts in that order, so AUTO_INCREMENT hands out ids in input
+# order no matter how many workers staged the splits, or in which order.
+STAGING_COLUMNS = ['load_split', 'load_row'] + TRIP_COLUMNS
+
+STAGE_QUERY = f"""
+INSERT INTO {STAGING_TABLE} (
+    {', '.join(STAGING_COLUMNS)}
+) VALUES ({', '.join(['%s'] * len(STAGING_COLUMNS))})
+"""
+
+MERGE_QUERY = f"""
+INSERT INTO nyc_taxi_trips (
+    {', '.join(TRIP_COLUMNS)}
+)
+SELECT {', '.join(TRIP_COLUMNS)}
+FROM {STAGING_TABLE}
+WHERE load_split BETWEEN %s AND %s
+ORDER BY load_split, load_row
+ON DUPLICATE KEY UPDATE
+    {UPSERT_UPDATES}
+"""
+
+def position_columns(columns, split, first_row):
+    """Prepend the load_split / load_row staging columns to encoded columns
+    
+    Rows are numbered from first_row (the batch's offset in its split), so
+    numbers keep increasing across the batches of a split.
+    """
+    rows = len(columns[0])
+    return [[split] * rows, list(range(first_row, first_row + rows))] + columns
+
+# LOAD DATA ... ESCAPED BY '\\' turns these escapes back into the characters;
+# an unescaped \N field is NULL
+TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def _tsv_fields(values):
+    """LOAD DATA fields for one column: \\N for None, strings escaped"""
+    return [
+        '\\N' if value is None
+        else value.translate(TSV_ESCAPES) if isinstance(value, str)
+        else str(value)
+        for value in values
+    ]
+
+def write_tsv_batch(columns, path):
+    """Write encoded staging columns as a LOAD DATA compatible TSV file (NULL as \\N)
+    
+    Fields are formatted here rather than by the csv module, which would
+    escape the backslash of the NULL marker and load it as the text "\\N".
+    """
+    fields = [_tsv_fields(values) for values in columns]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.writelines('\t'.join(row) + '\n' for row in zip(*fields))
+    return len(columns[0])
+
+def stage_tsv_file(cursor, path):
+    """LOAD DATA LOCAL INFILE one TSV batch into the staging table"""
+    cursor.execute(f"""
+        LOAD DATA LOCAL INFILE %s
+        INTO TABLE {STAGING_TABLE}
+        FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+        LINES TERMINATED BY '\\n'
+        ({', '.join(STAGING_COLUMNS)})
+    """, (path,))
+
+def merge_staging(conn, cursor, staged, split_ranges=((0, 0),)):
+    """Upsert the staging table into nyc_taxi_trips, then empty it
+    
+    Each (first, last) split range is merged by one statement. INSERT ...
+    SELECT reserves AUTO_INCREMENT values in blocks and loses the unused
+    rest when the statement ends, so callers reproducing a serial run's ids
+    must merge with the same statement boundaries.
+    
+    The per-row vendor trigger is skipped during the merge; vendor totals
+    are recomputed afterwards. unique_checks / foreign_key_checks are left
+    on: ON DUPLICATE KEY UPDATE has to probe the primary key and
+    uk_source_trip for every row whatever unique_checks says, and the
+    partitioned table has no foreign keys to check.
+    """
+    print(f"\n Merging {staged:,} staged rows into nyc_taxi_trips...")
+    merge_started = time.perf_counter()
+    cursor.execute("SET @skip_vendor_trigger = 1")
+    try:
+        for split_range in split_ranges:
+            cursor.execute(MERGE_QUERY, split_range)
+        conn.commit()
+    finally:
+        cursor.execute("SET @skip_vendor_trigger = NULL")
+    print(f" Merged in {time.perf_counter() - merge_started:.1f}s")
+    
+    cursor.execute(f"TRUNCATE TABLE {STAGING_TABLE}")
+    
+    # The trigger was skipped, so recompute vendor totals in one pass
+    cursor.callproc('update_vendor_counts')
+    conn.commit()
+
+def load_data_bulk(df, batch_size=100000):
+    """Bulk load through a staging table and one set-based upsert
+    
+    Each batch is written to a temporary TSV file and loaded into the
+    unindexed staging table with LOAD DATA LOCAL INFILE (the server needs
+    local_infile=ON). The staging rows are then merged into nyc_taxi_trips
+    with a single INSERT ... SELECT ... ON DUPLICATE KEY UPDATE in input
+    order. During the merge the per-row vendor trigger is skipped
+    (@skip_vendor_trigger); vendor counts are recomputed afterwards.
+    """
+    print(f"\n Bulk loading {len(df):,} records to database...")
+    
+    try:
+        conn = get_db_connection(local_infile=True)
+        cursor = conn.cursor()
+        
+        cursor.execute(f"TRUNCATE TABLE {STAGING_TABLE}")
         
-        # Convert dataframe to list of tuples
-        data = []
+        total_records = len(df)
+        staged = 0
         skipped = 0
+        processed = 0
         
-        for _, row in df.iterrows():
-            try:
-                data.append((
-                    str(row['id']),
-                    str(row['vendor_id']),
-                    row['pickup_date'].strftime('%Y-%m-%d %H:%M:%S'),
-                    row['dropoff_datetime'].strftime('%Y-%m-%d %H:%M:%S'),
-                    int(row['passenger_count']),
-                    float(row['pickup_longitude']),
-                    float(row['pickup_latitude']),
-                    int(row['rate_code_id']),
-                    str(row['store_and_fwd_flag'])[:5],
-                    int(row['trip_duration']),
-                    float(row['trip_distance_miles']),
-                    int(row['pickup_hour']) if pd.notna(row['pickup_hour']) else None,
-                    int(row['pickup_day_of_week']) if pd.notna(row['pickup_day_of_week']) else None,
-                    int(row['is_weekend']),
-                    str(row['time_period']) if pd.notna(row['time_period']) else None,
-                    float(row['average_speed_mph']),
-                    str(row['distance_category']) if pd.notna(row['distance_category']) else None,
-                    str(row['duration_category']) if pd.notna(row['duration_category']) else None
-                ))
-            except Exception as e:
-                skipped += 1
-                if skipped <= 5:  # Only print first 5 errors
-                    print(f" Skipping row: {e}")
+        with tempfile.TemporaryDirectory(prefix='nyc_taxi_bulk_') as tmp_dir:
+            for start in range(0, total_records, batch_size):
+                columns, batch_skipped = encode_columns(df.iloc[start:start + batch_size])
+                path = os.path.join(tmp_dir, f'batch_{start:012d}.tsv')
+                rows = write_tsv_batch(position_columns(columns, 0, start), path)
+                del columns
+                
+                if rows:
+                    stage_tsv_file(cursor, path)
+                    conn.commit()
+                os.remove(path)
+                
+                staged += rows
+                skipped += batch_skipped
+                processed += rows + batch_skipped
+                percentage = (processed / total_records) * 100
+                print(f" Staged: {processed:,}/{total_records:,} ({percentage:.1f}%)", end='\r')
         
         if skipped > 0:
-            print(f" Skipped {skipped} rows due to errors")
+            print(f"\n Skipped {skipped} rows with missing required values")
         
-        total_records = len(data)
-        inserted = 0
+        merge_staging(conn, cursor, staged)
+        
+        print(f" Successfully bulk loaded {staged:,} records")
+        
+        cursor.close()
+        conn.close()
+        return staged
+        
+    except Exception as e:
+        print(f"\n Error bulk loading data: {e}")
+        raise
+
+# PARALLEL INGEST
+
+# Target size of one CSV byte-range split; small enough to keep every
+# worker busy until the end, large enough to amortize pandas start-up
+CSV_SPLIT_BYTES = 64 * 1024 * 1024
+
+# MySQL errors worth retrying a batch for (deadlock, lock wait timeout)
+RETRYABLE_ERRORS = (1213, 1205)
+BATCH_RETRIES = 3
+
+def plan_csv_splits(path, workers):
+    """Split a CSV file into line-aligned byte ranges
+    
+    Returns (header_bytes, [(begin, end), ...]). Boundaries are moved to the
+    start of the next line, so every data line belongs to exactly one range
+    (cleaned CSVs have no quoted newlines).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        split_bytes = max(1, min(CSV_SPLIT_BYTES, -(-(size - data_start) // workers)))
         
-        for i in range(0, total_records, batch_size):
-            batch = data[i:i + batch_size]
-            cursor.executemany(insert_query, batch)
+        bounds = [data_start]
+        while bounds[-1] + split_bytes < size:
+            f.seek(bounds[-1] + split_bytes - 1)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+        bounds.append(size)
+    
+    ranges = [(begin, end) for begin, end in zip(bounds[:-1], bounds[1:]) if end > begin]
+    return header, ranges
+
+def plan_splits(path, workers, months=None, start=None, end=None):
+    """List the splits of one source file or dataset in serial read order
+    
+    CSV input is split by byte range, Parquet input by row group (row
+    groups pruned by the partition and statistics filters are left out).
+    """
+    if is_parquet_input(path):
+        partitioned = os.path.isdir(path)
+        predicate = parquet_predicate(months, start, end, partitioned)
+        dataset = open_parquet_dataset(path)
+        splits = []
+        for fragment in dataset.get_fragments(filter=predicate):
+            for row_group in fragment.split_by_row_group(predicate):
+                splits.append(('parquet', fragment.path, row_group.row_groups[0].id))
+        return splits
+    
+    header, ranges = plan_csv_splits(path, workers)
+    return [('csv', path, header, begin, end_offset) for begin, end_offset in ranges]
+
+def input_columns(path):
+    """Column names of the input without reading its rows"""
+    if is_parquet_input(path):
+        return open_parquet_dataset(path).schema.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def read_split(split, months=None, start=None, end=None):
+    """Read one split into a DataFrame with the month/date options applied"""
+    if split[0] == 'parquet':
+        _, file_path, row_group = split
+        parquet_file = pq.ParquetFile(file_path)
+        columns = [name for name in SOURCE_COLUMNS if name in parquet_file.schema_arrow.names]
+        df = parquet_file.read_row_group(row_group, columns=columns).to_pandas()
+    else:
+        _, file_path, header, begin, end_offset = split
+        with open(file_path, 'rb') as f:
+            f.seek(begin)
+            data = f.read(end_offset - begin)
+        df = pd.read_csv(io.BytesIO(header + data))
+    return filter_rows(df, months, start, end)
+
+# Per-process state of the ingest workers (one DB connection each)
+_worker_conn = None
+
+def _init_ingest_worker(mode):
+    """Pool initializer: open this worker's own connection"""
+    global _worker_conn
+    _worker_conn = get_db_connection(local_infile=(mode == 'bulk'))
+
+def _execute_batch(conn, cursor, rows):
+    """executemany one staging batch, retrying on deadlocks between workers"""
+    for attempt in range(1, BATCH_RETRIES + 1):
+        try:
+            cursor.executemany(STAGE_QUERY, rows)
             conn.commit()
-            
-            inserted += len(batch)
-            progress = min(i + batch_size, total_records)
-            percentage = (progress / total_records) * 100
-            print(f" Progress: {progress:,}/{total_records:,} ({percentage:.1f}%)", end='\r')
+            return
+        except pymysql.err.OperationalError as e:
+            conn.rollback()
+            if e.args[0] not in RETRYABLE_ERRORS or attempt == BATCH_RETRIES:
+                raise
+            time.sleep(0.1 * attempt)
+
+def _ingest_split(task):
+    """Worker: read, prepare, encode and stage one split
+    
+    Never raises; failures are reported in the returned result so the
+    parent can account for them with the rest of the run.
+    """
+    index, split, options = task
+    result = {
+        'index': index, 'read': 0, 'prepared': 0, 'loaded': 0, 'skipped': 0,
+        'first_day': None, 'last_day': None, 'timings': {}, 'parity_ok': True, 'error': None
+    }
+    
+    try:
+        df = read_split(split, options['months'], options['start'], options['end'])
+        result['read'] = len(df)
         
-        print(f"\n Successfully inserted {inserted:,} records")
+        df = prepare_data(df, verbose=False, timings=result['timings'])
+        result['prepared'] = len(df)
+        if len(df) == 0:
+            return result
+        result['first_day'] = df['pickup_date'].min().date()
+        result['last_day'] = df['pickup_date'].max().date()
+        
+        if options['verify_features']:
+            result['parity_ok'] = check_feature_parity(df)
+        
+        cursor = _worker_conn.cursor()
+        batch_size = options['batch_size']
+        with tempfile.TemporaryDirectory(prefix='nyc_taxi_bulk_') as tmp_dir:
+            for start in range(0, len(df), batch_size):
+                columns, batch_skipped = encode_columns(df.iloc[start:start + batch_size])
+                columns = position_columns(columns, index, start)
+                if options['mode'] == 'bulk':
+                    path = os.path.join(tmp_dir, f'batch_{start:012d}.tsv')
+                    rows = write_tsv_batch(columns, path)
+                    if rows:
+                        stage_tsv_file(cursor, path)
+                        _worker_conn.commit()
+                    os.remove(path)
+                else:
+                    batch = list(zip(*columns))
+                    rows = len(batch)
+                    if batch:
+                        _execute_batch(_worker_conn, cursor, batch)
+                result['loaded'] += rows
+                result['skipped'] += batch_skipped
+        cursor.close()
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    
+    return result
+
+def load_parallel(sources, workers, mode='batch', batch_size=5000, months=None, start=None,
+                  end=None, verify_features=False):
+    """Load source files with a pool of worker processes
+    
+    Every source is split by CSV byte range or Parquet row group. Each
+    worker runs prepare_data + encoding for its splits and stages them
+    through its own connection (batch: executemany, bulk: LOAD DATA). The
+    parent then merges the staging table ordered by split and row (see
+    STAGING_COLUMNS), so MySQL allocates the same ids as a serial run of
+    the same sources would. Bulk mode merges one source per statement like
+    load_data_bulk(); serial batch inserts leave no AUTO_INCREMENT gaps
+    between sources, so batch mode merges everything at once.
+    
+    Returns one {'path', 'loaded', 'first_day', 'last_day'} dict per source.
+    """
+    options = {
+        'mode': mode, 'batch_size': batch_size, 'months': months, 'start': start,
+        'end': end, 'verify_features': verify_features
+    }
+    owners = []
+    splits = []
+    for source_index, source in enumerate(sources):
+        source_splits = plan_splits(source, workers, months, start, end)
+        owners.extend([source_index] * len(source_splits))
+        splits.extend(source_splits)
+    summaries = [
+        {'path': source, 'loaded': 0, 'first_day': None, 'last_day': None}
+        for source in sources
+    ]
+    
+    print(f"\n Parallel {mode} load: {len(sources)} sources, {len(splits)} splits, {workers} workers")
+    if not splits:
+        return summaries
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"TRUNCATE TABLE {STAGING_TABLE}")
+    cursor.close()
+    conn.close()
+    
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_ingest_worker, initargs=(mode,)) as pool:
+        results = []
+        tasks = [(index, split, options) for index, split in enumerate(splits)]
+        for result in pool.imap_unordered(_ingest_split, tasks):
+            results.append(result)
+            loaded = sum(r['loaded'] for r in results)
+            elapsed = time.perf_counter() - started
+            print(f" Progress: {len(results)}/{len(splits)} splits, {loaded:,} rows "
+                  f"({loaded / elapsed if elapsed > 0 else 0:,.0f} rows/sec)", end='\r')
+    
+    results.sort(key=lambda r: r['index'])
+    print()
+    
+    read = sum(r['read'] for r in results)
+    prepared = sum(r['prepared'] for r in results)
+    loaded = sum(r['loaded'] for r in results)
+    skipped = sum(r['skipped'] for r in results)
+    timings = {}
+    for r in results:
+        for stage, seconds in r['timings'].items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    
+    print(f" Prepared {prepared:,} records (from {read:,} original)")
+    print(" Stage timings (summed over workers): "
+          + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    if skipped > 0:
+        print(f" Skipped {skipped} rows with missing required values")
+    
+    failed = [r for r in results if r['error']]
+    for r in failed:
+        print(f" Split {r['index']} of {sources[owners[r['index']]]} failed: {r['error']}")
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(splits)} splits failed to load")
+    if not all(r['parity_ok'] for r in results):
+        raise RuntimeError("vectorized features differ from the reference functions")
+    
+    if mode == 'bulk':
+        source_splits = {}
+        for index, owner in enumerate(owners):
+            first, _ = source_splits.get(owner, (index, index))
+            source_splits[owner] = (first, index)
+        split_ranges = [source_splits[owner] for owner in sorted(source_splits)]
+    else:
+        split_ranges = [(0, len(splits) - 1)]
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    merge_staging(conn, cursor, loaded, split_ranges)
+    cursor.close()
+    conn.close()
+    
+    print(f" Successfully loaded {loaded:,} records in {time.perf_counter() - started:.1f}s")
+    
+    for r in results:
+        summary = summaries[owners[r['index']]]
+        summary['loaded'] += r['loaded']
+        if r['first_day'] is not None:
+            summary['first_day'] = min(filter(None, [summary['first_day'], r['first_day']]))
+            summary['last_day'] = max(filter(None, [summary['last_day'], r['last_day']]))
+    return summaries
+
+def load_serial(sources, mode='batch', batch_size=5000, months=None, start=None,
+                end=None, verify_features=False):
+    """Load source files one after another in this process
+    
+    Returns one {'path', 'loaded', 'first_day', 'last_day', 'seconds'} dict per source.
+    """
+    summaries = []
+    for source in sources:
+        started = time.perf_counter()
+        
+        # Step 1: Load cleaned data (CSV or Parquet)
+        print(f"\n[1/5] Loading data from {source}...")
+        df = read_input(source, months=months, start=start, end=end)
+        print(f"Loaded {len(df):,} records in {time.perf_counter() - started:.2f}s")
+        
+        # Step 2: Prepare data
+        print("\n[2/5] Preparing data...")
+        df_prepared = prepare_data(df)
+        if verify_features and not check_feature_parity(df_prepared):
+            raise RuntimeError("vectorized features differ from the reference functions")
+        
+        # Step 3: Load to database
+        print("\n[3/5] Loading to database...")
+        if mode == 'bulk':
+            loaded = load_data_bulk(df_prepared, batch_size=batch_size)
+        else:
+            loaded = load_data_to_db(df_prepared, batch_size=batch_size)
+        
+        summary = {'path': source, 'loaded': loaded, 'first_day': None, 'last_day': None}
+        if len(df_prepared) > 0:
+            summary['first_day'] = df_prepared['pickup_date'].min().date()
+            summary['last_day'] = df_prepared['pickup_date'].max().date()
+        summary['seconds'] = time.perf_counter() - started
+        summaries.append(summary)
+    return summaries
+
+# INGEST MANIFEST
+
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+def file_checksum(path):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHECKSUM_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fetch_manifest():
+    """Return {source_path: row} for every file recorded in ingest_manifest"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT source_path, source_size, source_mtime_ns, checksum, row_count
+        FROM ingest_manifest
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return {row['source_path']: row for row in rows}
+
+def fingerprint_source(path, manifest):
+    """Return (size, mtime_ns, checksum) of a source file
+    
+    A file whose size and mtime match its manifest row keeps the recorded
+    checksum instead of being hashed again.
+    """
+    stat = os.stat(path)
+    recorded = manifest.get(os.path.normpath(path))
+    if (recorded and recorded['source_size'] == stat.st_size
+            and recorded['source_mtime_ns'] == stat.st_mtime_ns):
+        return stat.st_size, stat.st_mtime_ns, recorded['checksum']
+    return stat.st_size, stat.st_mtime_ns, file_checksum(path)
+
+def record_manifest(entries):
+    """Upsert one ingest_manifest row per loaded source file"""
+    if not entries:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO ingest_manifest (
+            source_path, source_size, source_mtime_ns, checksum, row_count,
+            first_pickup_day, last_pickup_day, load_seconds
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            source_size = VALUES(source_size),
+            source_mtime_ns = VALUES(source_mtime_ns),
+            checksum = VALUES(checksum),
+            row_count = VALUES(row_count),
+            first_pickup_day = VALUES(first_pickup_day),
+            last_pickup_day = VALUES(last_pickup_day),
+            load_seconds = VALUES(load_seconds),
+            loaded_at = CURRENT_TIMESTAMP
+    """, [
+        (os.path.normpath(e['path']), e['size'], e['mtime_ns'], e['checksum'], e['loaded'],
+         e['first_day'], e['last_day'],
+         round(e['seconds'], 2) if e.get('seconds') is not None else None)
+        for e in entries
+    ])
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print(f" Recorded {len(entries)} file(s) in ingest_manifest")
+
+def merge_day_ranges(ranges):
+    """Merge (first_day, last_day) ranges that overlap or touch"""
+    merged = []
+    for first, last in sorted(r for r in ranges if r[0] is not None):
+        if merged and first <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+def refresh_rollup(first_day, last_day):
+    """Rebuild the trip_rollup cube for the loaded pickup days only"""
+    print(f"\n Refreshing rollup cube for {first_day} .. {last_day}...")
+    
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.callproc('refresh_trip_rollup', (first_day, last_day))
+        conn.commit()
+        
+        cursor.execute("""
+            SELECT COUNT(*) as cells, COALESCE(SUM(trip_count), 0) as trips
+            FROM trip_rollup
+            WHERE pickup_day BETWEEN %s AND %s
+        """, (first_day, last_day))
+        result = cursor.fetchone()
+        print(f" Rollup: {result['cells']:,} cells covering {int(result['trips']):,} trips")
         
         cursor.close()
         conn.close()
         
     except Exception as e:
-        print(f"\n Error loading data: {e}")
+        print(f"Error refreshing rollup: {e}")
+        raise
+
+# QUANTILE SKETCHES
+
+# Sketched columns of nyc_taxi_trips, by metric name stored in the sketch tables
+SKETCH_METRICS = {
+    'duration': 'trip_duration',
+    'speed': 'average_speed_mph'
+}
+SKETCH_FETCH_SIZE = 100000
+SKETCH_INSERT_BATCH = 1000
+
+def build_day_sketches(cursor, first_day, last_day):
+    """Stream a day range from nyc_taxi_trips into one t-digest per (day, hour, vendor, metric)
+    
+    Each fetched batch is folded into the running digests, so memory holds
+    one batch plus the digests' centroids, not the whole range.
+    """
+    cursor.execute("""
+        SELECT DATE(pickup_date), HOUR(pickup_date), vendor_id, trip_duration, average_speed_mph
+        FROM nyc_taxi_trips
+        WHERE pickup_date >= %s
+            AND pickup_date < %s + INTERVAL 1 DAY
+            AND vendor_id IS NOT NULL
+    """, (first_day, last_day))
+    
+    digests = {}
+    counts = {}
+    while True:
+        rows = cursor.fetchmany(SKETCH_FETCH_SIZE)
+        if not rows:
+            break
+        batch = pd.DataFrame(rows, columns=[
+            'pickup_day', 'pickup_hour', 'vendor_id', 'trip_duration', 'average_speed_mph'
+        ])
+        for (day, hour, vendor), group in batch.groupby(['pickup_day', 'pickup_hour', 'vendor_id'], sort=False):
+            for metric, column in SKETCH_METRICS.items():
+                values = pd.to_numeric(group[column], errors='coerce').to_numpy(dtype=np.float64)
+                values = values[~np.isnan(values)]
+                if len(values) == 0:
+                    continue
+                # Collapse repeated values first (durations are whole seconds)
+                unique_values, value_counts = np.unique(values, return_counts=True)
+                digest = TDigest.from_weighted(unique_values.tolist(), value_counts.tolist())
+                key = (day, int(hour), vendor, metric)
+                if key in digests:
+                    digest = digests[key].merge(digest)
+                digests[key] = digest
+                counts[key] = counts.get(key, 0) + len(values)
+        del batch
+    
+    sketch_rows = []
+    for key in sorted(digests):
+        day, hour, vendor, metric = key
+        sketch_rows.append((
+            day, hour, day.weekday(), vendor, metric, counts[key], digests[key].to_bytes()
+        ))
+    return sketch_rows
+
+def refresh_day_sketches(first_day, last_day):
+    """Rebuild trip_day_quantile_sketches for a day range
+    
+    Returns the (hour, weekday, vendor) cells whose merged sketches in
+    trip_quantile_sketches are now stale.
+    """
+    print(f"\n Building quantile sketches for {first_day} .. {last_day}...")
+    
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        stream = conn.cursor(pymysql.cursors.SSCursor)
+        
+        started = time.perf_counter()
+        sketch_rows = build_day_sketches(stream, first_day, last_day)
+        stream.close()
+        
+        # Cells losing day sketches are stale as well as the ones gaining them
+        cursor.execute("""
+            SELECT DISTINCT pickup_hour, pickup_day_of_week, vendor_id
+            FROM trip_day_quantile_sketches
+            WHERE pickup_day BETWEEN %s AND %s
+        """, (first_day, last_day))
+        cells = {(row['pickup_hour'], row['pickup_day_of_week'], row['vendor_id']) for row in cursor.fetchall()}
+        cells.update((row[1], row[2], row[3]) for row in sketch_rows)
+        
+        cursor.execute("""
+            DELETE FROM trip_day_quantile_sketches
+            WHERE pickup_day BETWEEN %s AND %s
+        """, (first_day, last_day))
+        for start in range(0, len(sketch_rows), SKETCH_INSERT_BATCH):
+            cursor.executemany("""
+                INSERT INTO trip_day_quantile_sketches (
+                    pickup_day, pickup_hour, pickup_day_of_week, vendor_id,
+                    metric, trip_count, sketch
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, sketch_rows[start:start + SKETCH_INSERT_BATCH])
+        conn.commit()
+        
+        print(f" Stored {len(sketch_rows):,} day sketches in {time.perf_counter() - started:.1f}s")
+        
+        cursor.close()
+        conn.close()
+        return cells
+        
+    except Exception as e:
+        print(f"Error building quantile sketches: {e}")
+        raise
+
+def compact_quantile_sketches(cells):
+    """Merge the day sketches of the given (hour, weekday, vendor) cells into trip_quantile_sketches"""
+    if not cells:
+        return
+    print(f"\n Merging quantile sketches for {len(cells):,} (hour, weekday, vendor) cells...")
+    
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        stream = conn.cursor(pymysql.cursors.SSCursor)
+        
+        weekdays = sorted({cell[1] for cell in cells})
+        stream.execute(f"""
+            SELECT pickup_hour, pickup_day_of_week, vendor_id, metric, trip_count, sketch
+            FROM trip_day_quantile_sketches
+            WHERE pickup_day_of_week IN ({', '.join(['%s'] * len(weekdays))})
+            ORDER BY pickup_hour, pickup_day_of_week, vendor_id, metric
+        """, weekdays)
+        
+        merged_rows = []
+        for (hour, weekday, vendor, metric), rows in groupby(stream, key=lambda row: row[:4]):
+            if (hour, weekday, vendor) not in cells:
+                continue
+            rows = list(rows)
+            digest = TDigest.merge_all(TDigest.from_bytes(row[5]) for row in rows)
+            merged_rows.append((
+                hour, weekday, vendor, metric, sum(row[4] for row in rows), digest.to_bytes()
+            ))
+        stream.close()
+        
+        # Cells without any remaining day sketch are dropped
+        cursor.executemany("""
+            DELETE FROM trip_quantile_sketches
+            WHERE pickup_hour = %s AND pickup_day_of_week = %s AND vendor_id = %s
+        """, sorted(cells))
+        cursor.executemany("""
+            INSERT INTO trip_quantile_sketches (
+                pickup_hour, pickup_day_of_week, vendor_id, metric, trip_count, sketch
+            ) VALUES (%s, %s, %s, %s, %s, %s)
+        """, merged_rows)
+        conn.commit()
+        
+        print(f" Stored {len(merged_rows):,} merged sketches")
+        
+        cursor.close()
+        conn.close()
+        
+    except Exception as e:
+        print(f"Error merging quantile sketches: {e}")
+        raise
+
+def refresh_quantile_sketches(day_ranges):
+    """Rebuild the quantile sketches for the given (first_day, last_day) ranges"""
+    cells = set()
+    for first_day, last_day in day_ranges:
+        cells |= refresh_day_sketches(first_day, last_day)
+    compact_quantile_sketches(cells)
+
+def loaded_day_range():
+    """(first_day, last_day) of everything in trip_rollup, or None if empty"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(pickup_day) as first_day, MAX(pickup_day) as last_day FROM trip_rollup")
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    if row['first_day'] is None:
+        return None
+    return row['first_day'], row['last_day']
+
+def refresh_statistics(first_day, last_day):
+    """Refresh only the statistics rows touched by pickups in a day range
+    
+    hourly_statistics, trip_statistics and vendor totals are recomputed
+    from trip_rollup for the hours/vendors present in the range, instead
+    of truncating and rescanning nyc_taxi_trips (see update_statistics()).
+    """
+    print(f"\n Refreshing statistics for {first_day} .. {last_day}...")
+    
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.callproc('refresh_statistics_slice', (first_day, last_day))
+        conn.commit()
+        
+        cursor.close()
+        conn.close()
+        
+        print("Statistics updated successfully")
+        
+    except Exception as e:
+        print(f"Error refreshing statistics: {e}")
         raise
 
 def update_statistics():
@@ -314,6 +1420,28 @@ def update_statistics():
         raise
     
     
+def bump_data_version():
+    """Invalidate API response caches by bumping the data version stamp"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            INSERT INTO data_version (id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """)
+        conn.commit()
+        
+        cursor.execute("SELECT version FROM data_version WHERE id = 1")
+        print(f" Data version is now {cursor.fetchone()['version']}")
+        
+        cursor.close()
+        conn.close()
+        
+    except Exception as e:
+        print(f"Error bumping data version: {e}")
+        raise
+    
 def verify_data_load():
     """Verify data was loaded correctly"""
     print("\nVerifying data load...")
@@ -372,38 +1500,298 @@ def verify_data_load():
         print(f"Error verifying data: {e}")
         raise
 
+# PARTITIONS
+
+# Tables partitioned by pickup month (see database/migrations/007_monthly_partitions.sql),
+# with their partitioning column. Partition p<YYYYMM> holds the pickups before
+# the first of the next month; pmax catches anything beyond the last month.
+PARTITIONED_TABLES = {
+    'nyc_taxi_trips': 'pickup_date',
+    'trip_rollup': 'pickup_day'
+}
+CATCH_ALL_PARTITION = 'pmax'
+
+def add_months(month, count):
+    """First day of the month count months after the month of a date"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_partition_name(month):
+    return f"p{month:%Y%m}"
+
+def list_partitions(cursor, table):
+    """[(name, upper bound date or None for MAXVALUE)] in partition order"""
+    cursor.execute("""
+        SELECT PARTITION_NAME as name, PARTITION_DESCRIPTION as bound
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    partitions = []
+    for row in cursor.fetchall():
+        bound = row['bound'].strip("'")
+        partitions.append((row['name'], None if bound == 'MAXVALUE' else date.fromisoformat(bound[:10])))
+    return partitions
+
+def ensure_month_partitions(last_day):
+    """Split monthly partitions out of pmax up to the month of last_day
+    
+    Splitting is instant while pmax is empty; called after a load it also
+    moves the rows that landed in pmax into their new month partitions.
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        for table in PARTITIONED_TABLES:
+            partitions = list_partitions(cursor, table)
+            bounds = [bound for _, bound in partitions if bound is not None]
+            if not bounds or partitions[-1][0] != CATCH_ALL_PARTITION:
+                print(f" {table} is not partitioned by month, skipping (apply migration 007)")
+                continue
+            
+            # The highest bound is the first month without a partition
+            months = []
+            month = max(bounds)
+            while month <= last_day:
+                months.append(month)
+                month = add_months(month, 1)
+            if not months:
+                continue
+            
+            definitions = [
+                f"PARTITION {month_partition_name(month)} VALUES LESS THAN ('{add_months(month, 1)}')"
+                for month in months
+            ]
+            definitions.append(f"PARTITION {CATCH_ALL_PARTITION} VALUES LESS THAN (MAXVALUE)")
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                REORGANIZE PARTITION {CATCH_ALL_PARTITION} INTO ({', '.join(definitions)})
+            """)
+            print(f" {table}: added partitions {', '.join(month_partition_name(m) for m in months)}")
+        
+        cursor.close()
+        conn.close()
+        
+    except Exception as e:
+        print(f"Error adding partitions: {e}")
+        raise
+
+def expire_partitions(retention_months):
+    """Drop the month partitions older than the newest retention_months loaded months
+    
+    Returns the (first_day, last_day) range that was dropped, or None.
+    Dropping a partition bypasses the per-row delete trigger, so the caller
+    refreshes the sketches and statistics of that range afterwards.
+    """
+    full_range = loaded_day_range()
+    if full_range is None:
+        return None
+    first_day, last_day = full_range
+    cutoff = add_months(last_day, 1 - retention_months)
+    
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        expired_range = None
+        for table in PARTITIONED_TABLES:
+            expired = [
+                name for name, bound in list_partitions(cursor, table)
+                if bound is not None and bound <= cutoff
+            ]
+            if not expired:
+                continue
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+            print(f" {table}: dropped partitions {', '.join(expired)}")
+            expired_range = (first_day, cutoff - timedelta(days=1))
+        
+        cursor.close()
+        conn.close()
+        return expired_range
+        
+    except Exception as e:
+        print(f"Error dropping partitions: {e}")
+        raise
+
+def apply_retention(retention_months):
+    """Drop expired months and bring the derived tables in line"""
+    print(f"\n Keeping the last {retention_months} month(s) of pickups...")
+    expired = expire_partitions(retention_months)
+    if expired is None:
+        print(" No expired partitions")
+        return
+    
+    # trip_rollup lost the same months; rebuild what is derived from them
+    refresh_quantile_sketches([expired])
+    remaining = loaded_day_range()
+    if remaining:
+        refresh_statistics(*remaining)
+    bump_data_version()
+
+def requested_last_day(months=None, end=None):
+    """Last pickup day a --months/--end restricted load can contain, or None"""
+    candidates = []
+    if months:
+        last_month = date.fromisoformat(max(months) + '-01')
+        candidates.append(add_months(last_month, 1) - timedelta(days=1))
+    if end:
+        candidates.append((end - timedelta(microseconds=1)).date())
+    return min(candidates) if candidates else None
+
 # MAIN EXECUTION
 
+def parse_args():
+    """Command line options for the loader"""
+    parser = argparse.ArgumentParser(description="Load cleaned NYC taxi data into MySQL")
+    parser.add_argument(
+        '--input',
+        default=os.getenv('CSV_FILE_PATH', 'data/raw/processed/cleaned_data.csv'),
+        help="Cleaned CSV file, directory of CSV files (e.g. one per month) or Parquet "
+             "dataset directory (default: $CSV_FILE_PATH or data/raw/processed/cleaned_data.csv)"
+    )
+    parser.add_argument(
+        '--months', type=lambda value: [m.strip() for m in value.split(',') if m.strip()],
+        default=None,
+        help="Comma-separated pickup months to load, e.g. 2016-01,2016-02"
+    )
+    parser.add_argument(
+        '--start', type=datetime.fromisoformat, default=None,
+        help="Only load trips picked up at or after this date/time (YYYY-MM-DD[ HH:MM:SS])"
+    )
+    parser.add_argument(
+        '--end', type=datetime.fromisoformat, default=None,
+        help="Only load trips picked up before this date/time (exclusive)"
+    )
+    parser.add_argument(
+        '--mode', choices=['batch', 'bulk'], default='batch',
+        help="batch: executemany upserts; bulk: LOAD DATA LOCAL INFILE into a staging table + one merge"
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=None,
+        help="Rows per batch (default: 5000 for batch mode, 100000 for bulk mode)"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="Worker processes for parallel ingest (default: 1 = serial; "
+             "splits CSV input by byte range, Parquet input by row group; "
+             "workers stage the splits and one ordered merge keeps serial ids)"
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Reload files even if ingest_manifest already has their checksum"
+    )
+    parser.add_argument(
+        '--full-refresh', action='store_true',
+        help="Rebuild the statistics tables from scratch instead of only the loaded slices"
+    )
+    parser.add_argument(
+        '--rebuild-sketches', action='store_true',
+        help="When there is nothing new to load, rebuild the quantile sketches for all loaded days"
+    )
+    parser.add_argument(
+        '--retention-months', type=int,
+        default=int(os.getenv('PARTITION_RETENTION_MONTHS', 0)),
+        help="Drop pickup months older than the newest N loaded months "
+             "(default: $PARTITION_RETENTION_MONTHS or 0 = keep everything)"
+    )
+    parser.add_argument(
+        '--verify-features', action='store_true',
+        help="Check the vectorized features against the scalar reference functions"
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.retention_months < 0:
+        parser.error("--retention-months must not be negative")
+    return args
+
 if __name__ == "__main__":
     
     print("NYC TAXI DATA LOADER")
     
+    args = parse_args()
+    
     # Check for CSV file
-    data_path = os.getenv('CSV_FILE_PATH', 'data/raw/processed/cleaned_data.csv')
+    data_path = args.input
     
     if not os.path.exists(data_path):
         print(f"\nError: File not found at {data_path}")
-        print(f"   Please ensure your CSV file exists at this location")
+        print(f"   Please ensure your CSV file or Parquet dataset exists at this location")
         print(f"   Or set CSV_FILE_PATH environment variable")
         sys.exit(1)
     
     try:
-        # Step 1: Load CSV
-        print(f"\n[1/5] Loading data from {data_path}...")
-        df = pd.read_csv(data_path)
-        print(f"Loaded {len(df):,} records")
+        batch_size = args.batch_size or (100000 if args.mode == 'bulk' else 5000)
         
-        # Step 2: Prepare data
-        print("\n[2/5] Preparing data...")
-        df_prepared = prepare_data(df)
+        sources = discover_sources(data_path, args.months, args.start, args.end)
         
-        # Step 3: Load to database
-        print("\n[3/5] Loading to database...")
-        load_data_to_db(df_prepared)
+        # Only whole-file loads go through the manifest: a --months/--start/--end
+        # run loads part of a file and must not mark it as done
+        whole_files = not (args.months or args.start or args.end)
+        pending = []
+        if whole_files:
+            manifest = fetch_manifest()
+            loaded_checksums = {row['checksum'] for row in manifest.values()}
+            for source in sources:
+                size, mtime_ns, checksum = fingerprint_source(source, manifest)
+                if checksum in loaded_checksums and not args.force:
+                    print(f" Unchanged, skipping: {source}")
+                    continue
+                pending.append({'path': source, 'size': size, 'mtime_ns': mtime_ns, 'checksum': checksum})
+        else:
+            pending = [{'path': source} for source in sources]
+        
+        print(f"\n {len(pending)} of {len(sources)} source file(s) to load")
+        
+        if not pending:
+            print("\n Nothing new to load")
+            if args.rebuild_sketches:
+                full_range = loaded_day_range()
+                if full_range:
+                    refresh_quantile_sketches([full_range])
+                    bump_data_version()
+        else:
+            load_options = dict(
+                mode=args.mode, batch_size=batch_size, months=args.months,
+                start=args.start, end=args.end, verify_features=args.verify_features
+            )
+            paths = [entry['path'] for entry in pending]
+            
+            # Create the month partitions up front when the range is known,
+            # so the rows go straight to their partitions instead of pmax
+            last_day = requested_last_day(args.months, args.end)
+            if last_day:
+                ensure_month_partitions(last_day)
+            
+            if args.workers > 1:
+                # Steps 1-3 run inside the worker pool, one input split at a time
+                print(f"\n[1-3/5] Loading {len(paths)} file(s) with {args.workers} workers...")
+                summaries = load_parallel(paths, args.workers, **load_options)
+            else:
+                summaries = load_serial(paths, **load_options)
+            for entry, summary in zip(pending, summaries):
+                entry.update(summary)
+            
+            # Step 4: Update statistics (only the loaded day ranges)
+            print("\n[4/5] Updating statistics...")
+            day_ranges = merge_day_ranges((e['first_day'], e['last_day']) for e in pending)
+            if day_ranges:
+                ensure_month_partitions(day_ranges[-1][1])
+            for first_day, last_day in day_ranges:
+                refresh_rollup(first_day, last_day)
+            refresh_quantile_sketches(day_ranges)
+            if args.full_refresh:
+                update_statistics()
+            elif day_ranges:
+                refresh_statistics(day_ranges[0][0], day_ranges[-1][1])
+            bump_data_version()
+            
+            if whole_files:
+                record_manifest(pending)
         
-        # Step 4: Update statistics
-        print("\n[4/5] Updating statistics...")
-        update_statistics()
+        if args.retention_months:
+            apply_retention(args.retention_months)
         
         # Step 5: Verify
         print("\n[5/5] Verifying data...")
@@ -1,5 +1,7 @@
-﻿import sqlite3
-import math
+﻿import math
+import random
+
+from create_nyc_database import connect_for_read
 
 class NYCTripAnalyzer:
     """Custom algorithm for NYC taxi trip analysis"""
@@ -9,57 +11,142 @@ class NYCTripAnalyzer:
     
     def manual_percentile(self, data, percentile):
         """Calculate percentile manually without numpy"""
+        return self.manual_percentiles(data, [percentile])[0]
+    
+    def manual_percentiles(self, data, percentiles):
+        """Calculate several percentiles in one pass, without numpy
+        
+        Only the ranks the percentiles need are selected (multi-rank
+        introselect), so p50/p75/p90 together cost about one quickselect
+        instead of a full sort each. Interpolation between ranks is the
+        same as before, so results are unchanged.
+        """
         if not data:
-            return 0
+            return [0 for _ in percentiles]
         
-        # Manual sort
-        sorted_data = self.manual_bubble_sort(data.copy())
-        k = (len(sorted_data) - 1) * percentile / 100
-        f = math.floor(k)
-        c = math.ceil(k)
+        values = list(data)
+        positions = [(len(values) - 1) * percentile / 100 for percentile in percentiles]
+        ranks = set()
+        for k in positions:
+            ranks.add(int(math.floor(k)))
+            ranks.add(int(math.ceil(k)))
+        self.manual_select(values, sorted(ranks))
+        
+        results = []
+        for k in positions:
+            f = math.floor(k)
+            c = math.ceil(k)
+            if f == c:
+                results.append(values[int(k)])
+            else:
+                results.append(values[int(f)] * (c - k) + values[int(c)] * (k - f))
+        return results
+    
+    def manual_select(self, values, ranks):
+        """Reorder values in place so values[r] is the r-th smallest for each rank
         
-        if f == c:
-            return sorted_data[int(k)]
-        else:
-            return sorted_data[int(f)] * (c - k) + sorted_data[int(c)] * (k - f)
+        Quickselect with random median-of-three pivots and three-way partitioning
+        (durations repeat a lot), recursing only into parts that still
+        contain a requested rank. Small parts are insertion sorted and parts
+        that recurse too deep are heap sorted, so the worst case stays
+        O(n log n); with dense ranks this degrades into a single sort.
+        """
+        depth_limit = 2 * max(len(values), 1).bit_length()
+        stack = [(0, len(values) - 1, ranks, depth_limit)]
+        while stack:
+            lo, hi, wanted, depth = stack.pop()
+            if not wanted or lo >= hi:
+                continue
+            if hi - lo < 16:
+                self.manual_insertion_sort(values, lo, hi)
+                continue
+            if depth == 0:
+                self.manual_heap_sort(values, lo, hi)
+                continue
+            
+            # Median of three random elements as pivot (sorted input stays fast)
+            a = values[random.randint(lo, hi)]
+            b = values[random.randint(lo, hi)]
+            c = values[random.randint(lo, hi)]
+            if a > b:
+                a, b = b, a
+            if b > c:
+                b = c if a <= c else a
+            pivot = b
+            
+            # Three-way partition: [lo, lt) < pivot, [lt, gt] == pivot, (gt, hi] > pivot
+            lt, i, gt = lo, lo, hi
+            while i <= gt:
+                value = values[i]
+                if value < pivot:
+                    values[i] = values[lt]
+                    values[lt] = value
+                    lt += 1
+                    i += 1
+                elif value > pivot:
+                    values[i] = values[gt]
+                    values[gt] = value
+                    gt -= 1
+                else:
+                    i += 1
+            
+            stack.append((lo, lt - 1, [r for r in wanted if r < lt], depth - 1))
+            stack.append((gt + 1, hi, [r for r in wanted if r > gt], depth - 1))
     
-    def manual_bubble_sort(self, data):
-        """Manual bubble sort implementation"""
-        n = len(data)
-        for i in range(n):
-            for j in range(0, n - i - 1):
-                if data[j] > data[j + 1]:
-                    data[j], data[j + 1] = data[j + 1], data[j]
-        return data
+    def manual_insertion_sort(self, values, lo, hi):
+        """Sort values[lo..hi] in place (used for small ranges)"""
+        for i in range(lo + 1, hi + 1):
+            value = values[i]
+            j = i - 1
+            while j >= lo and values[j] > value:
+                values[j + 1] = values[j]
+                j -= 1
+            values[j + 1] = value
+    
+    def manual_heap_sort(self, values, lo, hi):
+        """Sort values[lo..hi] in place in O(n log n) (introselect fallback)"""
+        n = hi - lo + 1
+        
+        def sift_down(root, end):
+            while True:
+                child = 2 * root + 1
+                if child >= end:
+                    return
+                if child + 1 < end and values[lo + child + 1] > values[lo + child]:
+                    child += 1
+                if values[lo + root] >= values[lo + child]:
+                    return
+                values[lo + root], values[lo + child] = values[lo + child], values[lo + root]
+                root = child
+        
+        for start in range(n // 2 - 1, -1, -1):
+            sift_down(start, n)
+        for end in range(n - 1, 0, -1):
+            values[lo], values[lo + end] = values[lo + end], values[lo]
+            sift_down(0, end)
     
     def analyze_traffic_patterns(self):
         """
         Custom algorithm to analyze NYC traffic patterns
         Manual implementation without using pandas or built-in analytics
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_for_read(self.db_path)
         cursor = conn.cursor()
         
-        # Get data for analysis
+        # Get data for analysis (whole table, streamed row by row)
         cursor.execute('''
-            SELECT time_period, trip_duration, calculated_distance, efficiency_ratio 
-            FROM trips LIMIT 10000
+            SELECT time_period, trip_duration
+            FROM trips
         ''')
-        data = cursor.fetchall()
         
         # Manual analysis by time period
         time_periods = {}
-        for row in data:
-            time_period, duration, distance, efficiency = row
+        for time_period, duration in cursor:
             if time_period not in time_periods:
                 time_periods[time_period] = {
-                    'durations': [],
-                    'distances': [],
-                    'efficiencies': []
+                    'durations': []
                 }
             time_periods[time_period]['durations'].append(duration)
-            time_periods[time_period]['distances'].append(distance)
-            time_periods[time_period]['efficiencies'].append(efficiency)
         
         # Manual statistical analysis for each time period
         results = {}
@@ -74,10 +161,8 @@ class NYCTripAnalyzer:
                 count += 1
             mean_duration = total / count if count > 0 else 0
             
-            # Manual percentile calculation
-            median = self.manual_percentile(durations, 50)
-            p75 = self.manual_percentile(durations, 75)
-            p90 = self.manual_percentile(durations, 90)
+            # Manual percentile calculation (one selection pass for all three)
+            median, p75, p90 = self.manual_percentiles(durations, [50, 75, 90])
             
             results[period] = {
                 'mean_duration': mean_duration,
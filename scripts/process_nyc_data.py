@@ -1,20 +1,58 @@
-﻿import csv
+﻿import argparse
 import sqlite3
-from datetime import datetime
-import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from create_nyc_database import apply_load_profile, finish_load
+
+EARTH_RADIUS_KM = 6371
+
+# Rows read, featurized and inserted per batch
+DEFAULT_CHUNK_SIZE = 100000
+
+# get_time_period() as bins: [0, 6) late_night, [6, 10) morning_rush, ...
+TIME_PERIOD_EDGES = [6, 10, 16, 20]
+TIME_PERIOD_LABELS = np.array(['late_night', 'morning_rush', 'midday', 'evening_rush', 'night'])
+
+# "00:00" ... "23:00" for time_of_day
+HOUR_LABELS = np.array([f"{hour:02d}:00" for hour in range(24)])
+
+REQUIRED_COLUMNS = [
+    'id', 'vendor_id', 'pickup_datetime', 'dropoff_datetime', 'passenger_count',
+    'pickup_longitude', 'pickup_latitude', 'dropoff_longitude', 'dropoff_latitude',
+    'store_and_fwd_flag', 'trip_duration'
+]
+
+NUMERIC_COLUMNS = [
+    'vendor_id', 'passenger_count', 'trip_duration',
+    'pickup_longitude', 'pickup_latitude', 'dropoff_longitude', 'dropoff_latitude'
+]
+
+INSERT_SQL = '''
+    INSERT INTO trips 
+    (id, vendor_id, pickup_datetime, dropoff_datetime, passenger_count,
+     pickup_longitude, pickup_latitude, dropoff_longitude, dropoff_latitude,
+     store_and_fwd_flag, trip_duration, trip_speed, time_of_day, day_of_week, 
+     calculated_distance, time_period, is_weekend, month, day_of_month, efficiency_ratio)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
 
 def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate the great circle distance between two points on Earth"""
+    """Calculate the great circle distance between two points on Earth (km)
+    
+    Works on scalars or NumPy arrays / pandas Series (element-wise).
+    """
     # Convert coordinates from degrees to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
     
     # Haversine formula
     dlat = lat2 - lat1
     dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    r = 6371  # Earth radius in kilometers
-    return c * r
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
+    return c * EARTH_RADIUS_KM
 
 def get_time_period(hour):
     """Categorize time into periods relevant for NYC traffic"""
@@ -29,87 +67,171 @@ def get_time_period(hour):
     else:
         return "night"
 
+def get_time_periods(hours):
+    """get_time_period() for an array of hours"""
+    return TIME_PERIOD_LABELS[np.digitize(hours, TIME_PERIOD_EDGES)]
+
 def is_weekend(day_name):
     """Check if day is weekend"""
     return day_name in ['Saturday', 'Sunday']
 
-def process_nyc_taxi_data():
-    """Process the NYC Taxi Trip Duration dataset"""
+def clean_chunk(chunk):
+    """Parse types for a raw chunk; returns (valid rows, number of rejected rows)"""
+    for column in NUMERIC_COLUMNS:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+    chunk['pickup_dt'] = pd.to_datetime(chunk['pickup_datetime'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    chunk['dropoff_dt'] = pd.to_datetime(chunk['dropoff_datetime'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    
+    valid = chunk.dropna(subset=NUMERIC_COLUMNS + ['id', 'pickup_dt', 'dropoff_dt'])
+    return valid, len(chunk) - len(valid)
+
+def compute_features(df):
+    """Add the derived trip features as whole-column (NumPy) operations"""
+    pickup = df['pickup_dt'].dt
+    hours = pickup.hour.to_numpy()
+    
+    distance_km = haversine_distance(
+        df['pickup_latitude'].to_numpy(), df['pickup_longitude'].to_numpy(),
+        df['dropoff_latitude'].to_numpy(), df['dropoff_longitude'].to_numpy()
+    )
+    duration = df['trip_duration'].to_numpy(dtype=np.float64)
     
-    conn = sqlite3.connect('nyc_taxi.db')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Speed (km/h)
+        speed_kmh = np.where(duration > 0, distance_km / (duration / 3600), 0.0)
+        # Efficiency metric: rough estimate of 3 min per km in city traffic vs actual minutes
+        efficiency_ratio = np.where(duration > 0, distance_km * 3 / (duration / 60), 0.0)
+    
+    day_of_week = pickup.day_name()
+    
+    return df.assign(
+        calculated_distance=distance_km,
+        trip_speed=speed_kmh,
+        efficiency_ratio=efficiency_ratio,
+        time_of_day=HOUR_LABELS[hours],
+        time_period=get_time_periods(hours),
+        day_of_week=day_of_week,
+        is_weekend=(pickup.dayofweek >= 5).astype(int),
+        month=pickup.month,
+        day_of_month=pickup.day
+    )
+
+def chunk_rows(df):
+    """Row tuples in INSERT_SQL column order (plain Python values for sqlite3)"""
+    return list(zip(
+        df['id'].tolist(),
+        df['vendor_id'].astype(int).tolist(),
+        df['pickup_datetime'].tolist(),
+        df['dropoff_datetime'].tolist(),
+        df['passenger_count'].astype(int).tolist(),
+        df['pickup_longitude'].tolist(),
+        df['pickup_latitude'].tolist(),
+        df['dropoff_longitude'].tolist(),
+        df['dropoff_latitude'].tolist(),
+        df['store_and_fwd_flag'].tolist(),
+        df['trip_duration'].astype(int).tolist(),
+        df['trip_speed'].tolist(),
+        df['time_of_day'].tolist(),
+        df['day_of_week'].tolist(),
+        df['calculated_distance'].tolist(),
+        df['time_period'].tolist(),
+        df['is_weekend'].tolist(),
+        df['month'].tolist(),
+        df['day_of_month'].tolist(),
+        df['efficiency_ratio'].tolist()
+    ))
+
+def insert_rows_individually(cursor, rows, first_error):
+    """Fallback for a batch rejected by a constraint; returns the number of skipped rows
+    
+    The caller has rolled the batch back to its savepoint, so no row is inserted twice.
+    """
+    print(f"Batch insert failed ({first_error}); inserting rows one by one")
+    failed = 0
+    for row in rows:
+        try:
+            cursor.execute(INSERT_SQL, row)
+        except sqlite3.IntegrityError as e:
+            failed += 1
+            if failed <= 5:
+                print(f"Error inserting trip {row[0]}: {e}")
+    return failed
+
+def process_nyc_taxi_data(input_file='data/raw/train.csv', db_path='nyc_taxi.db',
+                          chunksize=DEFAULT_CHUNK_SIZE, limit=None, tuned=True):
+    """Process the NYC Taxi Trip Duration dataset
+    
+    Reads the CSV in chunks, computes all features per chunk with NumPy and
+    inserts each chunk with one executemany; the whole load is a single
+    transaction (nothing is committed if it fails midway).
+    
+    With tuned=True the load runs under the bulk-load profile of
+    create_nyc_database.py (indexes dropped, WAL, synchronous=OFF) and ends
+    with finish_load() (indexes, ANALYZE, synchronous=NORMAL). tuned=False inserts
+    into the database as it is, with default settings.
+    """
+    # Autocommit mode: the transaction and per-batch savepoints are explicit
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
+    if tuned:
+        apply_load_profile(conn)
     
+    rows_read = 0
     processed_count = 0
     error_count = 0
+    started = time.perf_counter()
     
     print("Processing NYC Taxi Trip Duration dataset...")
     
-    with open('data/raw/train.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        
-        for i, row in enumerate(reader):
+    reader = pd.read_csv(
+        input_file,
+        usecols=REQUIRED_COLUMNS,
+        dtype={'id': str, 'pickup_datetime': str, 'dropoff_datetime': str, 'store_and_fwd_flag': str},
+        chunksize=chunksize
+    )
+    
+    cursor.execute('BEGIN')
+    try:
+        for chunk in reader:
+            if limit is not None:
+                chunk = chunk.head(limit - rows_read)
+            rows_read += len(chunk)
+            
+            valid, rejected = clean_chunk(chunk)
+            error_count += rejected
+            
+            rows = chunk_rows(compute_features(valid))
+            cursor.execute('SAVEPOINT batch')
             try:
-                # Parse datetime
-                pickup_dt = datetime.strptime(row['pickup_datetime'], '%Y-%m-%d %H:%M:%S')
-                dropoff_dt = datetime.strptime(row['dropoff_datetime'], '%Y-%m-%d %H:%M:%S')
-                
-                # Extract time features
-                hour = pickup_dt.hour
-                time_period = get_time_period(hour)
-                day_of_week = pickup_dt.strftime('%A')
-                is_weekend_trip = is_weekend(day_of_week)
-                month = pickup_dt.month
-                day_of_month = pickup_dt.day
-                
-                # Calculate distance using Haversine
-                pickup_lat = float(row['pickup_latitude'])
-                pickup_lon = float(row['pickup_longitude'])
-                dropoff_lat = float(row['dropoff_latitude'])
-                dropoff_lon = float(row['dropoff_longitude'])
-                
-                distance_km = haversine_distance(pickup_lat, pickup_lon, dropoff_lat, dropoff_lon)
-                
-                # Calculate speed (km/h)
-                trip_duration_hours = int(row['trip_duration']) / 3600
-                speed_kmh = distance_km / trip_duration_hours if trip_duration_hours > 0 else 0
-                
-                # Efficiency metric
-                expected_time = distance_km * 3  # rough estimate: 3 min per km in city traffic
-                actual_time = int(row['trip_duration']) / 60  # convert to minutes
-                efficiency_ratio = expected_time / actual_time if actual_time > 0 else 0
-                
-                # Insert into database
-                cursor.execute('''
-                    INSERT INTO trips 
-                    (id, vendor_id, pickup_datetime, dropoff_datetime, passenger_count,
-                     pickup_longitude, pickup_latitude, dropoff_longitude, dropoff_latitude,
-                     store_and_fwd_flag, trip_duration, trip_speed, time_of_day, day_of_week, 
-                     calculated_distance, time_period, is_weekend, month, day_of_month, efficiency_ratio)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row['id'], int(row['vendor_id']), row['pickup_datetime'], row['dropoff_datetime'],
-                    int(row['passenger_count']), pickup_lon, pickup_lat, dropoff_lon, dropoff_lat,
-                    row['store_and_fwd_flag'], int(row['trip_duration']), speed_kmh, 
-                    f"{hour:02d}:00", day_of_week, distance_km, time_period, 
-                    is_weekend_trip, month, day_of_month, efficiency_ratio
-                ))
-                
-                processed_count += 1
-                
-                # Progress indicator
-                if processed_count % 10000 == 0:
-                    print(f"Processed {processed_count} rows...")
-                    
-                # Limit for initial testing (remove for full dataset)
-                if processed_count >= 50000:
-                    break
-                    
-            except Exception as e:
-                error_count += 1
-                if error_count <= 5:
-                    print(f"Error processing row {i}: {e}")
-    
-    conn.commit()
+                cursor.executemany(INSERT_SQL, rows)
+                skipped = 0
+            except sqlite3.IntegrityError as e:
+                # One bad row fails the whole batch: redo it row by row to skip only those
+                cursor.execute('ROLLBACK TO batch')
+                skipped = insert_rows_individually(cursor, rows, e)
+            cursor.execute('RELEASE batch')
+            
+            error_count += skipped
+            processed_count += len(rows) - skipped
+            print(f"Processed {processed_count} rows... ({time.perf_counter() - started:.1f}s)")
+            
+            if limit is not None and rows_read >= limit:
+                break
+        
+        cursor.execute('COMMIT')
+    except Exception:
+        cursor.execute('ROLLBACK')
+        conn.close()
+        raise
+    
+    load_seconds = time.perf_counter() - started
+    if tuned:
+        print("Building indexes and statistics...")
+        duplicates = finish_load(conn)
+        if duplicates:
+            print(f"Removed {duplicates} rows with duplicate trip ids")
+        error_count += duplicates
+        processed_count -= duplicates
     
     # Create summary table
     cursor.execute('''
@@ -126,12 +248,26 @@ def process_nyc_taxi_data():
         GROUP BY time_period, day_of_week, is_weekend
     ''')
     
-    conn.commit()
     conn.close()
     
-    print(f"Data processing completed!")
+    print(f"Data processing completed in {time.perf_counter() - started:.1f}s "
+          f"(load {load_seconds:.1f}s)!")
     print(f"Successfully processed: {processed_count} trips")
     print(f"Errors encountered: {error_count}")
+    return processed_count
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Load the NYC taxi CSV into the SQLite database')
+    parser.add_argument('--input', default='data/raw/train.csv', help='Input CSV file')
+    parser.add_argument('--db', default='nyc_taxi.db', help='SQLite database file')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Rows per batch (read, featurize, executemany)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Stop after this many input rows (default: the whole file)')
+    parser.add_argument('--no-tuning', action='store_true',
+                        help='Insert with default SQLite settings and existing indexes')
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    process_nyc_taxi_data()
+    args = parse_args()
+    process_nyc_taxi_data(args.input, args.db, args.chunksize, args.limit, tuned=not args.no_tuning)